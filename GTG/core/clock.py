@@ -0,0 +1,105 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) 2008-2013 - Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""
+Current day for date-relative code.
+
+Filters and the task browser ask for today's date for every task. The clock
+keeps the date of today with the timestamp at which the next day starts, so
+most calls only compare two numbers. The cached day is dropped when
+GTG.core.timer.Timer refreshes the views, e.g. after resuming from suspend.
+
+Tests can freeze the clock at a given moment with freeze().
+"""
+
+from datetime import date, datetime, time as day_time, timedelta
+import time
+
+
+class Clock():
+    """ Cached current day """
+
+    def __init__(self):
+        self._frozen = None
+        self._today = None
+        self._today_ordinal = None
+        # timestamp at which the cached day ends
+        self._day_end = 0
+        # hour -> timestamp of that hour today
+        self._hours = {}
+
+    def now(self):
+        """ Return the current datetime """
+        if self._frozen is not None:
+            return self._frozen
+        return datetime.now()
+
+    def today(self):
+        """ Return the datetime.date of today """
+        if self._frozen is None and time.time() >= self._day_end:
+            self._set_day(date.today())
+        return self._today
+
+    def today_ordinal(self):
+        """ Return the ordinal of today (see datetime.date.toordinal) """
+        if self._frozen is None and time.time() >= self._day_end:
+            self._set_day(date.today())
+        return self._today_ordinal
+
+    def tomorrow(self):
+        return self.today() + timedelta(days=1)
+
+    def has_passed(self, hour):
+        """ Return True if it is at least hour o'clock today """
+        if self._frozen is not None:
+            return self._frozen.hour >= hour
+
+        self.today()
+        timestamp = self._hours.get(hour)
+        if timestamp is None:
+            timestamp = datetime.combine(
+                self._today, day_time(hour)).timestamp()
+            self._hours[hour] = timestamp
+        return time.time() >= timestamp
+
+    def invalidate(self):
+        """ Look at the system clock again, e.g. after suspend """
+        self._day_end = 0
+
+    def freeze(self, moment):
+        """ Stop the clock at moment, a datetime """
+        self._frozen = moment
+        self._set_day(moment.date())
+
+    def unfreeze(self):
+        self._frozen = None
+        self.invalidate()
+
+    def is_frozen(self):
+        return self._frozen is not None
+
+    def _set_day(self, day):
+        self._today = day
+        self._today_ordinal = day.toordinal()
+        self._hours.clear()
+        next_day = datetime.combine(day + timedelta(days=1), day_time())
+        self._day_end = next_day.timestamp()
+
+
+# The clock used by GTG
+clock = Clock()
@@ -20,6 +20,7 @@
 Classes responsible for handling user configuration
 """
 
+from collections import Counter
 import configparser
 import os
 import re
@@ -94,7 +95,8 @@ def open_config_file(config_file):
 class SectionConfig():
     """ Configuration only for a section (system or a task) """
 
-    def __init__(self, section_name, section, defaults, save_function):
+    def __init__(self, section_name, section, defaults, save_function,
+                 generations=None):
         """ Initiatizes section config:
 
          - section_name: name for writing error logs
@@ -102,11 +104,21 @@ class SectionConfig():
          - defaults: dictionary of default values
          - save_function: function to be called to save changes (this function
                           needs to save the whole config)
+         - generations: Counter of the changes by section name, shared by
+                        the objects handling the same section
         """
         self._section_name = section_name
         self._section = section
         self._defaults = defaults
         self._save_function = save_function
+        if generations is None:
+            generations = Counter()
+        self._generations = generations
+
+    @property
+    def generation(self):
+        """ Number increased whenever an option of the section is set """
+        return self._generations[self._section_name]
 
     def _getlist(self, option):
         """ Parses string representation of list from configuration
@@ -175,6 +187,7 @@ class SectionConfig():
         else:
             value = str(value)
         self._section[option] = value
+        self._generations[self._section_name] += 1
         # Immediately save the configuration
         self.save()
 
@@ -195,6 +208,9 @@ class CoreConfig():
         self._backends_conf_path = os.path.join(CONFIG_DIR, 'backends.conf')
         self._backends_conf = open_config_file(self._backends_conf_path)
 
+        # section name -> number of changes, see SectionConfig.generation
+        self._generations = Counter()
+
     def save_gtg_config(self):
         self._conf.write(open(self._conf_path, 'w'))
 
@@ -210,7 +226,8 @@ class CoreConfig():
             self._conf.add_section(name)
         defaults = DEFAULTS.get(name, dict())
         return SectionConfig(
-            name, self._conf[name], defaults, self.save_gtg_config)
+            name, self._conf[name], defaults, self.save_gtg_config,
+            self._generations)
 
     def get_task_config(self, task_id):
         if task_id not in self._task_conf:
@@ -29,7 +29,14 @@ from GTG.backends.backend_signals import BackendSignals
 from GTG.backends.generic_backend import GenericBackend
 from GTG.core.config import CoreConfig
 from GTG.core import requester
-from GTG.core.search import parse_search_query, search_filter, InvalidQuery
+from GTG.core.date_boundaries import DateBoundaries
+from GTG.core.filter_bitmaps import FilterBitmaps
+from GTG.core.live_search import LiveSearch
+from GTG.core.saved_searches import SavedSearches
+from GTG.core.subtree_aggregates import SubtreeAggregates
+from GTG.core.tag_closure import TagClosure
+from GTG.core.tag_counters import TagCounters
+from GTG.core.search import parse_search_query, InvalidQuery
 from GTG.core.tag import Tag, SEARCH_TAG, SEARCH_TAG_PREFIX
 from GTG.core.task import Task
 from GTG.core.treefactory import TreeFactory
@@ -57,9 +64,25 @@ class DataStore():
         self.backends = {}
         self.treefactory = TreeFactory()
         self._tasks = self.treefactory.get_tasks_tree()
+        # Must be created before any view of the task tree, so the results of
+        # saved searches are updated before the views are filtered
+        self.saved_searches = SavedSearches(self._tasks,
+                                            self._on_count_changed)
+        self.live_search = LiveSearch(self._tasks)
+        self.subtree_aggregates = SubtreeAggregates(self._tasks)
+        self.date_boundaries = DateBoundaries(self._tasks)
+        # Registered last: filters use the results of searches
+        self.filter_bitmaps = FilterBitmaps(self._tasks)
+        task_filters = self.treefactory.get_task_filters()
+        for name, (func, param) in task_filters.items():
+            self.filter_bitmaps.add_filter(name, func, param)
         self.requester = requester.Requester(self, global_conf)
         self.tagfile_loaded = False
         self._tagstore = self.treefactory.get_tags_tree(self.requester)
+        self.tag_closure = TagClosure(self._tagstore)
+        self.filter_bitmaps.set_tag_closure(self.tag_closure)
+        self.tag_counters = TagCounters(self._tasks, self.tag_closure,
+                                        self._on_count_changed)
         self._backend_signals = BackendSignals()
         self.conf = global_conf
         self.tag_idmap = {}
@@ -108,6 +131,7 @@ class DataStore():
             raise IndexError(f'tag {name} was already in the datastore')
 
         self._tasks.add_filter(name, filter_func, parameters=parameters)
+        self.filter_bitmaps.add_filter(name, filter_func, parameters)
         self._tagstore.add_node(tag, parent_id=parent_id)
         tag.set_save_callback(self.save)
 
@@ -141,8 +165,9 @@ class DataStore():
 
         name = SEARCH_TAG_PREFIX + name
         tag = Tag(name, req=self.requester, attributes=init_attr, tid=tid)
-        self._add_new_tag(name, tag, search_filter, parameters,
-                          parent_id=SEARCH_TAG)
+        self._add_new_tag(name, tag, self.saved_searches.filter,
+                          {'name': name}, parent_id=SEARCH_TAG)
+        self.saved_searches.add(name, query, parameters)
 
         if save:
             self.save_tagtree()
@@ -153,6 +178,8 @@ class DataStore():
         """ Removes a tag from the tagtree """
         if self._tagstore.has_node(name):
             self._tagstore.del_node(name)
+            self.saved_searches.remove(name)
+            self.filter_bitmaps.remove_filter(name)
             self.save_tagtree()
         else:
             raise IndexError(f"There is no tag {name}")
@@ -213,6 +240,69 @@ class DataStore():
 
         self.new_search_tag(label, query, {}, tag.tid)
 
+    def _on_count_changed(self, name):
+        """ Refresh the tag or saved search in the sidebar when its count
+        changed """
+        tag = self.get_tag(name)
+        if tag is not None:
+            tag.modified()
+
+    def get_saved_searches(self):
+        """
+        Return the materialized results of saved searches
+
+        @return GTG.core.saved_searches.SavedSearches
+        """
+        return self.saved_searches
+
+    def get_live_search(self):
+        """
+        Return the cache of queries typed in the search bar
+
+        @return GTG.core.live_search.LiveSearch
+        """
+        return self.live_search
+
+    def get_tag_closure(self):
+        """
+        Return the cached relations of the tag hierarchy
+
+        @return GTG.core.tag_closure.TagClosure
+        """
+        return self.tag_closure
+
+    def get_tag_counters(self):
+        """
+        Return the number of active tasks of every tag
+
+        @return GTG.core.tag_counters.TagCounters
+        """
+        return self.tag_counters
+
+    def get_subtree_aggregates(self):
+        """
+        Return the cached aggregates over subtasks (urgent date, counts)
+
+        @return GTG.core.subtree_aggregates.SubtreeAggregates
+        """
+        return self.subtree_aggregates
+
+    def get_date_boundaries(self):
+        """
+        Return the tasks indexed by the next day their filters change
+
+        @return GTG.core.date_boundaries.DateBoundaries
+        """
+        return self.date_boundaries
+
+    def get_filter_bitmaps(self):
+        """
+        Return the bitmaps used to combine task filters
+
+        @return GTG.core.filter_bitmaps.FilterBitmaps
+        """
+        return self.filter_bitmaps
+
     def get_tag(self, tagname):
         """
         Returns tag object
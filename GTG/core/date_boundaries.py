@@ -0,0 +1,142 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) 2008-2013 - Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""
+Tasks indexed by the next day on which date-relative filters change.
+
+Filters like started, workdue or the workview compare the start and due
+dates of tasks with today. When the day changes, only tasks whose start or
+due date was crossed get a different result; instead of filtering all the
+tasks again, every task is put in the slot of the next day its filters
+change (a timer wheel with one slot per day). When the day changes, refresh()
+signals the tasks of the slots which are due as modified, so the filters and
+the views only test them.
+
+Fuzzy dates are always at the same distance from today and never cross it.
+"""
+
+import heapq
+
+from GTG.core.clock import clock
+
+
+def get_boundaries(task):
+    """ Return ordinals of the days on which filters of the task change """
+    boundaries = []
+    start_date = task.get_start_date()
+    if start_date and not start_date.is_fuzzy():
+        start = start_date.date().toordinal()
+        # Tasks start in the morning of the start date, see is_started()
+        boundaries.extend((start, start + 1))
+
+    due_date = task.get_due_date()
+    if due_date and not due_date.is_fuzzy():
+        due = due_date.date().toordinal()
+        # Due tomorrow (workdue), today and late
+        boundaries.extend((due - 1, due, due + 1))
+    return boundaries
+
+
+class DateBoundaries():
+    """ Timer wheel of the tasks """
+
+    def __init__(self, tasktree):
+        self._tree = tasktree
+        # day ordinal -> set of task ids
+        self._slots = {}
+        # heap of the day ordinals which had a slot, and the same as a set
+        self._days = []
+        self._queued = set()
+        # task id -> day ordinal of its slot
+        self._scheduled = {}
+
+        view = tasktree.get_main_view()
+        view.register_cllbck('node-added', self._on_task_changed)
+        view.register_cllbck('node-modified', self._on_task_changed)
+        view.register_cllbck('node-deleted', self._on_task_deleted)
+
+    def get_next_day(self, tid):
+        """ Return the ordinal of the next day the task changes or None """
+        return self._scheduled.get(tid)
+
+    def pop_due(self, today=None):
+        """ Return ids of the tasks whose slots are due and schedule them
+        again
+
+        @param today: ordinal of today, clock.today_ordinal() by default
+        """
+        if today is None:
+            today = clock.today_ordinal()
+
+        tids = []
+        while self._days and self._days[0] <= today:
+            day = heapq.heappop(self._days)
+            self._queued.discard(day)
+            for tid in self._slots.pop(day, ()):
+                del self._scheduled[tid]
+                tids.append(tid)
+
+        for tid in tids:
+            if self._tree.has_node(tid):
+                self._schedule(self._tree.get_node(tid), today)
+        return tids
+
+    def refresh(self):
+        """ Signal tasks whose filters changed since the last refresh as
+        modified and return their ids """
+        tids = self.pop_due()
+        for tid in tids:
+            if self._tree.has_node(tid):
+                self._tree.get_node(tid).modified()
+        return tids
+
+    def _schedule(self, task, today):
+        tid = task.get_id()
+        self._unschedule(tid)
+
+        upcoming = [day for day in get_boundaries(task) if day > today]
+        if not upcoming:
+            return
+
+        day = min(upcoming)
+        slot = self._slots.get(day)
+        if slot is None:
+            slot = self._slots[day] = set()
+            if day not in self._queued:
+                heapq.heappush(self._days, day)
+                self._queued.add(day)
+        slot.add(tid)
+        self._scheduled[tid] = day
+
+    def _unschedule(self, tid):
+        day = self._scheduled.pop(tid, None)
+        if day is None:
+            return
+
+        slot = self._slots[day]
+        slot.discard(tid)
+        if not slot:
+            # The day stays in the heap, pop_due() skips missing slots
+            del self._slots[day]
+
+    def _on_task_changed(self, tid, path=None):
+        if self._tree.has_node(tid):
+            self._schedule(self._tree.get_node(tid), clock.today_ordinal())
+
+    def _on_task_deleted(self, tid, path=None):
+        self._unschedule(tid)
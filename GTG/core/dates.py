@@ -24,18 +24,24 @@ someday, later or no date.
 Date.parse() parses all possible representations of a datetime.date. """
 
 import calendar
+import functools
 import locale
 from datetime import date, datetime, timedelta, timezone
 from enum import Enum
 from gettext import gettext as _
 from gettext import ngettext
 
+from GTG.core.clock import clock
+
 __all__ = ['Date', 'Accuracy']
 
 # trick to obtain the timezone of the machine GTG is executed on
 LOCAL_TIMEZONE = datetime.now(timezone.utc).astimezone().tzinfo
 NOW, SOON, SOMEDAY, NODATE = list(range(4))
 
+# Fuzzy dates are compared with real dates as this many days from today
+FUZZY_OFFSETS = {SOON: 15, SOMEDAY: 365, NODATE: 9999}
+
 # Localized strings for fuzzy values
 STRINGS = {
     # Translators: Used for display
@@ -102,6 +108,146 @@ DATE_FORMATS = [(locale.nl_langinfo(locale.D_T_FMT), Accuracy.datetime),
                 ('%Y-%m-%d', Accuracy.date)]
 
 
+# How many distinct date strings are remembered by _parse_dt_str()
+PARSE_CACHE_SIZE = 4096
+
+_NOW_STRINGS = {'now', _('now').lower()}
+
+# Fuzzy dates as written by str(Date)
+_WRITTEN_FUZZY_DATES = {'soon': SOON, 'someday': SOMEDAY}
+
+
+def _parse_iso(string):
+    """Parse the formats written by str(Date) (see xml.task_to_element()):
+    YYYY-MM-DD and datetime.isoformat(), optionally with microseconds and a
+    timezone. Return None for other strings."""
+    try:
+        if len(string) == 10 and string[4] == '-' and string[7] == '-':
+            return date.fromisoformat(string)
+        if len(string) > 10 and string[4] == '-' and string[10] in 'T ':
+            return datetime.fromisoformat(string)
+    except ValueError:
+        pass
+    return _WRITTEN_FUZZY_DATES.get(string)
+
+
+@functools.lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse_dt_str(string):
+    """Cast string into a datetime, a date, a fuzzy date or None.
+
+    Dates and datetimes are immutable, results are cached because a lot of
+    tasks share the same dates."""
+    dt_value = _parse_iso(string)
+    if dt_value is not None:
+        return dt_value
+
+    for cls in date, datetime:
+        try:
+            return cls.fromisoformat(string)
+        except (ValueError,  # ignoring no iso format value
+                AttributeError):  # ignoring python < 3.7
+            pass
+    for date_format, accuracy in DATE_FORMATS:
+        try:
+            dt_value = datetime.strptime(string, date_format)
+            if accuracy is Accuracy.date:
+                dt_value = dt_value.date()
+            return dt_value
+        except ValueError:
+            pass
+    return LOOKUP.get(str(string).lower(), None)
+
+
+# Kinds of keywords of natural language dates, see get_keyword()
+KEYWORD_DAYS, KEYWORD_MONTH, KEYWORD_YEAR, KEYWORD_WEEKDAY = range(4)
+
+def _build_keywords(recurring):
+    """Return a dictionary: lowercased keyword -> (kind, value)"""
+    if recurring:
+        keywords = [
+            ('day', (KEYWORD_DAYS, 1)),
+            # Translators: Used in recurring parsing, made lowercased in code
+            (_('day'), (KEYWORD_DAYS, 1)),
+            ('other-day', (KEYWORD_DAYS, 2)),
+            # Translators: Used in recurring parsing, made lowercased in code
+            (_('other-day'), (KEYWORD_DAYS, 2)),
+            ('week', (KEYWORD_DAYS, 7)),
+            # Translators: Used in recurring parsing, made lowercased in code
+            (_('week'), (KEYWORD_DAYS, 7)),
+            ('month', (KEYWORD_MONTH, None)),
+            # Translators: Used in recurring parsing, made lowercased in code
+            (_('month'), (KEYWORD_MONTH, None)),
+            ('year', (KEYWORD_YEAR, None)),
+            # Translators: Used in recurring parsing, made lowercased in code
+            (_('year'), (KEYWORD_YEAR, None)),
+        ]
+    else:
+        keywords = [
+            ('today', (KEYWORD_DAYS, 0)),
+            # Translators: Used in parsing, made lowercased in code
+            (_('today'), (KEYWORD_DAYS, 0)),
+            ('tomorrow', (KEYWORD_DAYS, 1)),
+            # Translators: Used in parsing, made lowercased in code
+            (_('tomorrow'), (KEYWORD_DAYS, 1)),
+            ('next week', (KEYWORD_DAYS, 7)),
+            # Translators: Used in parsing, made lowercased in code
+            (_('next week'), (KEYWORD_DAYS, 7)),
+            ('next month', (KEYWORD_MONTH, None)),
+            # Translators: Used in parsing, made lowercased in code
+            (_('next month'), (KEYWORD_MONTH, None)),
+            ('next year', (KEYWORD_YEAR, None)),
+            # Translators: Used in parsing, made lowercased in code
+            (_('next year'), (KEYWORD_YEAR, None)),
+        ]
+
+    # week day names in English and in the current locale
+    for i, (english, local) in enumerate([
+        ("Monday", _("Monday")),
+        ("Tuesday", _("Tuesday")),
+        ("Wednesday", _("Wednesday")),
+        ("Thursday", _("Thursday")),
+        ("Friday", _("Friday")),
+        ("Saturday", _("Saturday")),
+        ("Sunday", _("Sunday")),
+    ]):
+        keywords.append((english, (KEYWORD_WEEKDAY, i)))
+        keywords.append((local, (KEYWORD_WEEKDAY, i)))
+
+    return {keyword.lower(): kind for keyword, kind in keywords}
+
+
+@functools.lru_cache(maxsize=8)
+def _get_keywords(language, recurring):
+    return _build_keywords(recurring)
+
+
+def get_keyword(string, recurring=False):
+    """Return (kind, value) of a lowercased natural language date or None
+
+    The tables of keywords are built once for each language. """
+    language = locale.setlocale(locale.LC_MESSAGES)
+    return _get_keywords(language, recurring).get(string)
+
+
+def keyword_offset(kind, value, day):
+    """Return the number of days between day and the day meant by the
+    keyword of the given kind"""
+    if kind == KEYWORD_DAYS:
+        return value
+    if kind == KEYWORD_MONTH:
+        return calendar.mdays[day.month]
+    if kind == KEYWORD_YEAR:
+        return 365 + int(calendar.isleap(day.year))
+    # the next such week day, a week later if it is today
+    weekday = day.weekday()
+    return value - weekday + 7 * int(value <= weekday)
+
+
+def _is_numerical(string):
+    """True if string could be in one of the numerical formats"""
+    return string.replace('/', '').isdigit()
+
+
 class Date:
     """A date class that supports fuzzy dates.
 
@@ -114,7 +260,7 @@ class Date:
       - a string containing a locale format date.
     """
 
-    __slots__ = ['dt_value']
+    __slots__ = ['dt_value', '_ordinal', '_offset']
 
     def __init__(self, value=None):
         self.dt_value = None
@@ -128,32 +274,27 @@ class Date:
         elif isinstance(value, str):
             self.dt_value = self.__parse_dt_str(value)
         elif value == 0:  # support for dropped falsly fuzzy NOW
-            self.dt_value = datetime.now()
+            self.dt_value = clock.now()
         elif value in LOOKUP:
             self.dt_value = LOOKUP[value]
         if self.dt_value is None:
             raise ValueError(f"Unknown value for date: '{value}'")
 
+        # Comparison keys: the ordinal of a datetime.date or the offset of a
+        # fuzzy date, None for datetimes which are compared by accuracy
+        self._ordinal = self._offset = None
+        if self.dt_value.__class__ is date:
+            self._ordinal = self.dt_value.toordinal()
+        elif self.dt_value.__class__ is int:
+            self._offset = FUZZY_OFFSETS.get(self.dt_value)
+
     @staticmethod
     def __parse_dt_str(string):
         """Will try casting given string into a datetime or a date."""
-        for cls in date, datetime:
-            try:
-                return cls.fromisoformat(string)
-            except (ValueError,  # ignoring no iso format value
-                    AttributeError):  # ignoring python < 3.7
-                pass
-        for date_format, accuracy in DATE_FORMATS:
-            try:
-                dt_value = datetime.strptime(string, date_format)
-                if accuracy is Accuracy.date:
-                    dt_value = dt_value.date()
-                return dt_value
-            except ValueError:
-                pass
-        if string in {'now', _('now').lower()}:
-            return datetime.now()
-        return LOOKUP.get(str(string).lower(), None)
+        if string in _NOW_STRINGS:
+            # Not cached, it changes every time
+            return clock.now()
+        return _parse_dt_str(string)
 
     @property
     def accuracy(self):
@@ -198,9 +339,8 @@ class Date:
         if wanted_accuracy == self.accuracy:
             return self.dt_value
         if self.accuracy is Accuracy.fuzzy:
-            now = datetime.now()
-            delta_days = {SOON: 15, SOMEDAY: 365, NODATE: 9999}
-            gtg_date = Date(now + timedelta(delta_days[self.dt_value]))
+            now = clock.now()
+            gtg_date = Date(now + timedelta(FUZZY_OFFSETS[self.dt_value]))
             if gtg_date.accuracy is wanted_accuracy:
                 return gtg_date.dt_value
             return self._dt_by_accuracy(gtg_date.dt_value, gtg_date.accuracy,
@@ -228,6 +368,34 @@ class Date:
         return (self.dt_by_accuracy(Accuracy.fuzzy),
                 other.dt_by_accuracy(Accuracy.fuzzy))
 
+    def _comparison_keys(self, other):
+        """Return ordinals to compare two dates or fuzzy dates.
+
+        Fuzzy dates are compared with each other by their offsets and with
+        dates as today plus their offset. None is returned when a datetime
+        is involved, _cast_for_operation() is needed then.
+        """
+        if other.__class__ is not Date:
+            if other.__class__ is not date:
+                return None
+            other_ordinal, other_offset = other.toordinal(), None
+        else:
+            other_ordinal, other_offset = other._ordinal, other._offset
+
+        ordinal = self._ordinal
+        if ordinal is None:
+            if self._offset is None:
+                return None
+            if other_offset is not None:
+                return self._offset, other_offset
+            ordinal = clock.today_ordinal() + self._offset
+
+        if other_ordinal is None:
+            if other_offset is None:
+                return None
+            other_ordinal = clock.today_ordinal() + other_offset
+        return ordinal, other_ordinal
+
     def __add__(self, other):
         a, b = self._cast_for_operation(other, is_comparison=False)
         return a + b
@@ -240,27 +408,37 @@ class Date:
     __rsub__ = __sub__
 
     def __lt__(self, other):
-        a, b = self._cast_for_operation(other)
-        return a < b
+        keys = self._comparison_keys(other)
+        if keys is None:
+            keys = self._cast_for_operation(other)
+        return keys[0] < keys[1]
 
     def __le__(self, other):
-        a, b = self._cast_for_operation(other)
-        return a <= b
+        keys = self._comparison_keys(other)
+        if keys is None:
+            keys = self._cast_for_operation(other)
+        return keys[0] <= keys[1]
 
     def __eq__(self, other):
-        a, b = self._cast_for_operation(other)
-        return a == b
+        keys = self._comparison_keys(other)
+        if keys is None:
+            keys = self._cast_for_operation(other)
+        return keys[0] == keys[1]
 
     def __ne__(self, other):
         return not self.__eq__(other)
 
     def __gt__(self, other):
-        a, b = self._cast_for_operation(other)
-        return a > b
+        keys = self._comparison_keys(other)
+        if keys is None:
+            keys = self._cast_for_operation(other)
+        return keys[0] > keys[1]
 
     def __ge__(self, other):
-        a, b = self._cast_for_operation(other)
-        return a >= b
+        keys = self._comparison_keys(other)
+        if keys is None:
+            keys = self._cast_for_operation(other)
+        return keys[0] >= keys[1]
 
     def __str__(self):
         """ String representation - fuzzy dates are in English """
@@ -278,7 +456,7 @@ class Date:
             return STRINGS[self.dt_value]
         if self.accuracy is Accuracy.datetime:
             span = timedelta(hours=1)
-            now = datetime.now()
+            now = clock.now()
             if now - span <= self.dt_value < now + span:
                 return _('now')
         return self.date().strftime(locale.nl_langinfo(locale.D_FMT))
@@ -300,17 +478,17 @@ class Date:
         """ Return the difference between the date and today in dates """
         if self.dt_value == NODATE:
             return None
-        return (self.dt_by_accuracy(Accuracy.date) - date.today()).days
+        return (self.dt_by_accuracy(Accuracy.date) - clock.today()).days
 
     @classmethod
     def today(cls):
         """ Return date for today """
-        return cls(date.today())
+        return cls(clock.today())
 
     @classmethod
     def tomorrow(cls):
         """ Return date for tomorrow """
-        return cls(date.today() + timedelta(days=1))
+        return cls(clock.tomorrow())
 
     @classmethod
     def now(cls):
@@ -322,6 +500,15 @@ class Date:
         """ Return date representing no (set) date """
         return _GLOBAL_DATE_NODATE
 
+    @staticmethod
+    def shared(value=None):
+        """ Return Date(value), reusing a single instance for no date, soon
+        and someday. Dates are never modified, so tasks can share them. """
+        new_date = value if isinstance(value, Date) else Date(value)
+        if new_date.is_fuzzy():
+            return _GLOBAL_FUZZY_DATES.get(new_date.dt_value, new_date)
+        return new_date
+
     @staticmethod
     def soon():
         """ Return date representing fuzzy date soon """
@@ -342,7 +529,7 @@ class Date:
         except ValueError:
             return None
 
-        today = date.today()
+        today = clock.today()
         try:
             result = today.replace(day=mday)
         except ValueError:
@@ -367,7 +554,9 @@ class Date:
     def _parse_numerical_format(string):
         """ Parse numerical formats like %Y/%m/%d, %Y%m%d or %m%d """
         result = None
-        today = date.today()
+        if not _is_numerical(string):
+            return None
+        today = clock.today()
         for fmt in ['%Y/%m/%d', '%Y%m%d', '%m%d']:
             try:
                 result = datetime.strptime(string, fmt).date()
@@ -386,45 +575,12 @@ class Date:
     @staticmethod
     def _parse_text_representation(string):
         """ Match common text representation for date """
-        today = date.today()
-
-        # accepted date formats
-        formats = {
-            'today': 0,
-            # Translators: Used in parsing, made lowercased in code
-            _('today').lower(): 0,
-            'tomorrow': 1,
-            # Translators: Used in parsing, made lowercased in code
-            _('tomorrow').lower(): 1,
-            'next week': 7,
-            # Translators: Used in parsing, made lowercased in code
-            _('next week').lower(): 7,
-            'next month': calendar.mdays[today.month],
-            # Translators: Used in parsing, made lowercased in code
-            _('next month').lower(): calendar.mdays[today.month],
-            'next year': 365 + int(calendar.isleap(today.year)),
-            # Translators: Used in parsing, made lowercased in code
-            _('next year').lower(): 365 + int(calendar.isleap(today.year)),
-        }
-
-        # add week day names in the current locale
-        for i, (english, local) in enumerate([
-            ("Monday", _("Monday")),
-            ("Tuesday", _("Tuesday")),
-            ("Wednesday", _("Wednesday")),
-            ("Thursday", _("Thursday")),
-            ("Friday", _("Friday")),
-            ("Saturday", _("Saturday")),
-            ("Sunday", _("Sunday")),
-        ]):
-            offset = i - today.weekday() + 7 * int(i <= today.weekday())
-            formats[english.lower()] = offset
-            formats[local.lower()] = offset
-
-        offset = formats.get(string, None)
-        if offset is None:
+        keyword = get_keyword(string)
+        if keyword is None:
             return None
-        return today + timedelta(offset)
+
+        today = clock.today()
+        return today + timedelta(keyword_offset(*keyword, today))
 
     @classmethod
     def parse(cls, string):
@@ -496,6 +652,8 @@ class Date:
     def _parse_numerical_format_for_recurrency(self, string, newtask=True):
         """ Parse numerical formats like %Y/%m/%d,
         %Y%m%d or %m%d and calculated from a certain date"""
+        if not _is_numerical(string):
+            return None
         self_date = self.dt_by_accuracy(Accuracy.date)
         result = None
         if not newtask:
@@ -523,46 +681,16 @@ class Date:
             string (str): text representation.
             newtask (bool, optional): depending on the task if it is new, the offset changes
         """
-        # accepted date formats
+        keyword = get_keyword(string, recurring=True)
+        if keyword is None:
+            return None
+
         self_date = self.dt_by_accuracy(Accuracy.date)
-        formats = {
+        kind, value = keyword
+        if newtask and kind != KEYWORD_WEEKDAY:
             # change the offset depending on the task.
-            'day': 0 if newtask else 1,
-            # Translators: Used in recurring parsing, made lowercased in code
-            _('day').lower(): 0 if newtask else 1,
-            'other-day': 0 if newtask else 2,
-            # Translators: Used in recurring parsing, made lowercased in code
-            _('other-day').lower(): 0 if newtask else 2,
-            'week': 0 if newtask else 7,
-            # Translators: Used in recurring parsing, made lowercased in code
-            _('week').lower(): 0 if newtask else 7,
-            'month': 0 if newtask else calendar.mdays[self_date.month],
-            # Translators: Used in recurring parsing, made lowercased in code
-            _('month').lower(): 0 if newtask else calendar.mdays[self_date.month],
-            'year': 0 if newtask else 365 + int(calendar.isleap(self_date.year)),
-            # Translators: Used in recurring parsing, made lowercased in code
-            _('year').lower(): 0 if newtask else 365 + int(calendar.isleap(self_date.year)),
-        }
-
-        # add week day names in the current locale
-        for i, (english, local) in enumerate([
-            ("Monday", _("Monday")),
-            ("Tuesday", _("Tuesday")),
-            ("Wednesday", _("Wednesday")),
-            ("Thursday", _("Thursday")),
-            ("Friday", _("Friday")),
-            ("Saturday", _("Saturday")),
-            ("Sunday", _("Sunday")),
-        ]):
-            offset = i - self_date.weekday() + 7 * int(i <= self_date.weekday())
-            formats[english.lower()] = offset
-            formats[local.lower()] = offset
-
-        offset = formats.get(string, None)
-        if offset is None:
-            return None
-        else:
-            return self_date + timedelta(offset)
+            return self_date
+        return self_date + timedelta(keyword_offset(kind, value, self_date))
 
     def parse_from_date(self, string, newtask=False):
         """parse_from_date returns the date from a string
@@ -610,7 +738,7 @@ class Date:
                 {'days': days_left}
         else:
             locale_format = locale.nl_langinfo(locale.D_FMT)
-            if calendar.isleap(date.today().year):
+            if calendar.isleap(clock.today().year):
                 year_len = 366
             else:
                 year_len = 365
@@ -624,3 +752,8 @@ class Date:
 _GLOBAL_DATE_SOON = Date(SOON)
 _GLOBAL_DATE_NODATE = Date(NODATE)
 _GLOBAL_DATE_SOMEDAY = Date(SOMEDAY)
+_GLOBAL_FUZZY_DATES = {
+    SOON: _GLOBAL_DATE_SOON,
+    NODATE: _GLOBAL_DATE_NODATE,
+    SOMEDAY: _GLOBAL_DATE_SOMEDAY,
+}
@@ -0,0 +1,295 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) 2008-2013 - Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""
+Combination of task filters with bitmaps.
+
+Every task gets a dense ordinal (ordinals of deleted tasks are reused). The
+membership of a filter is kept as a bitmap stored in a Python int: bit n is
+set when the task with the ordinal n passes the filter. Bitmaps are computed
+the first time they are needed and then updated when a task is added,
+modified or deleted.
+
+Filters of tags and the workview also depend on the tag hierarchy and on
+nonactionable tags: all the bitmaps are dropped when the generation of the
+TagClosure changed (see set_tag_closure()).
+
+Combining the selected tags, the pane filter and the search of the browser
+is then a few bitwise AND of those bitmaps. The views apply a single liblarch
+filter (see get_view_filter()) which only checks one bit of the combined
+bitmap for each task.
+"""
+
+import logging
+
+log = logging.getLogger(__name__)
+
+# Prefix of the liblarch filters combining filters for a view
+VIEW_FILTER_PREFIX = 'gtg-combined-'
+
+
+def iter_bits(bitmap):
+    """ Yield the positions of the bits set in bitmap """
+    while bitmap:
+        lowest = bitmap & -bitmap
+        yield lowest.bit_length() - 1
+        bitmap ^= lowest
+
+
+class TaskOrdinals():
+    """ Dense numbering of tasks """
+
+    def __init__(self):
+        # task id -> ordinal
+        self._ordinals = {}
+        # ordinal -> task id (None for free ordinals)
+        self._tids = []
+        self._free = []
+        # bitmap of the ordinals which are used
+        self.used = 0
+
+    def __len__(self):
+        return len(self._ordinals)
+
+    def add(self, tid):
+        """ Return the ordinal of the task, assign a new one if needed """
+        ordinal = self._ordinals.get(tid)
+        if ordinal is not None:
+            return ordinal
+
+        if self._free:
+            ordinal = self._free.pop()
+            self._tids[ordinal] = tid
+        else:
+            ordinal = len(self._tids)
+            self._tids.append(tid)
+
+        self._ordinals[tid] = ordinal
+        self.used |= 1 << ordinal
+        return ordinal
+
+    def remove(self, tid):
+        """ Release the ordinal of the task and return it (or None) """
+        ordinal = self._ordinals.pop(tid, None)
+        if ordinal is not None:
+            self._tids[ordinal] = None
+            self._free.append(ordinal)
+            self.used &= ~(1 << ordinal)
+        return ordinal
+
+    def get(self, tid):
+        return self._ordinals.get(tid)
+
+    def get_tid(self, ordinal):
+        return self._tids[ordinal]
+
+
+class FilterBitmaps():
+    """ Membership bitmaps of task filters """
+
+    def __init__(self, tasktree):
+        self._tree = tasktree
+        self._ordinals = TaskOrdinals()
+        # name -> (filter function, parameters)
+        self._filters = {}
+        # names of filters which display tasks without hierarchy
+        self._flat = set()
+        # name -> bitmap, only for filters which were already used
+        self._bitmaps = {}
+        # names of liblarch filters registered by get_view_filter()
+        self._view_filters = set()
+
+        # Increased whenever a bitmap changed
+        self._generation = 0
+        # tuple of names -> (generation, combined bitmap)
+        self._combined = {}
+        self._closure = None
+        # generation of the tag closure the bitmaps were computed with
+        self._closure_generation = None
+
+        view = tasktree.get_main_view()
+        view.register_cllbck('node-added', self._on_task_changed)
+        view.register_cllbck('node-modified', self._on_task_changed)
+        view.register_cllbck('node-deleted', self._on_task_deleted)
+
+    def set_tag_closure(self, tag_closure):
+        """ Drop the bitmaps whenever the tag hierarchy changes """
+        self._closure = tag_closure
+        self._closure_generation = tag_closure.generation
+
+    def add_filter(self, name, func, parameters=None):
+        """ Register a filter, with the same arguments as in liblarch """
+        self._filters[name] = (func, parameters)
+        if parameters and parameters.get('flat', False):
+            self._flat.add(name)
+        else:
+            self._flat.discard(name)
+        self._drop(name)
+
+    def remove_filter(self, name):
+        self._filters.pop(name, None)
+        self._flat.discard(name)
+        self._drop(name)
+
+    def has_filter(self, name):
+        return name in self._filters
+
+    def set_parameters(self, name, parameters):
+        """ Replace parameters of a filter, e.g. a new search query """
+        if name in self._filters:
+            self._filters[name] = (self._filters[name][0], parameters)
+            self._drop(name)
+
+    def invalidate(self, name=None):
+        """ Compute the bitmap again next time it is needed
+
+        Without a name, all bitmaps are dropped, e.g. when the day changed and
+        filters depending on the date give different results. """
+        if name is None:
+            self._bitmaps.clear()
+            self._combined.clear()
+            self._generation += 1
+        else:
+            self._drop(name)
+
+    def is_flat(self, names):
+        """ Return True if one of filters displays tasks without hierarchy """
+        return any(name in self._flat for name in names)
+
+    def get_bitmap(self, name):
+        """ Return the bitmap of tasks passing the filter
+
+        Unknown filters let all tasks pass (and are ignored by combine()). """
+        self._check_closure()
+        bitmap = self._bitmaps.get(name)
+        if bitmap is not None:
+            return bitmap
+
+        if name not in self._filters:
+            log.debug("Unknown filter %r", name)
+            return self._ordinals.used
+
+        bitmap = 0
+        known = len(self._ordinals)
+        view = self._tree.get_main_view()
+        for tid in view.get_all_nodes():
+            ordinal = self._ordinals.add(tid)
+            if self._evaluate(name, view.get_node(tid)):
+                bitmap |= 1 << ordinal
+
+        if len(self._ordinals) != known:
+            # Combinations computed before miss the new tasks
+            self._generation += 1
+        self._bitmaps[name] = bitmap
+        return bitmap
+
+    def combine(self, names):
+        """ Return the bitmap of tasks passing all the filters """
+        self._check_closure()
+        key = tuple(names)
+        cached = self._combined.get(key)
+        if cached is not None and cached[0] == self._generation:
+            return cached[1]
+
+        bitmaps = [self.get_bitmap(name) for name in names
+                   if name in self._filters]
+        bitmap = self._ordinals.used
+        for other in bitmaps:
+            bitmap &= other
+
+        self._combined[key] = (self._generation, bitmap)
+        return bitmap
+
+    def get_tasks(self, bitmap):
+        """ Return ids of the tasks in the bitmap """
+        return [self._ordinals.get_tid(ordinal)
+                for ordinal in iter_bits(bitmap)]
+
+    def get_view_filter(self, view_name):
+        """ Return the name of the liblarch filter for the view
+
+        The filter is applied with parameters {'filters': names} and shows
+        tasks passing all the named filters. Every view gets its own filter,
+        because liblarch shares filter parameters between views. """
+        name = VIEW_FILTER_PREFIX + view_name
+        if name not in self._view_filters:
+            self._tree.add_filter(name, self.filter, {'filters': ()})
+            self._view_filters.add(name)
+        return name
+
+    def filter(self, task, parameters=None):
+        """ liblarch filter function combining filters """
+        names = parameters.get('filters', ()) if parameters else ()
+        ordinal = self._ordinals.get(task.get_id())
+        if ordinal is None:
+            # Not indexed yet, evaluate filters directly
+            return all(self._evaluate(name, task) for name in names
+                       if name in self._filters)
+
+        return bool(self.combine(names) >> ordinal & 1)
+
+    def _evaluate(self, name, task):
+        func, parameters = self._filters[name]
+        if parameters is None:
+            return bool(func(task))
+        return bool(func(task, parameters))
+
+    def _check_closure(self):
+        if self._closure is None:
+            return
+        generation = self._closure.generation
+        if generation != self._closure_generation:
+            self._closure_generation = generation
+            self.invalidate()
+
+    def _drop(self, name):
+        if self._bitmaps.pop(name, None) is not None:
+            self._generation += 1
+
+    def _on_task_changed(self, tid, path=None):
+        if not self._tree.has_node(tid):
+            return
+
+        task = self._tree.get_node(tid)
+        is_new = self._ordinals.get(tid) is None
+        ordinal = self._ordinals.add(tid)
+        bit = 1 << ordinal
+        changed = is_new
+
+        for name, bitmap in self._bitmaps.items():
+            if self._evaluate(name, task):
+                new_bitmap = bitmap | bit
+            else:
+                new_bitmap = bitmap & ~bit
+
+            if new_bitmap != bitmap:
+                self._bitmaps[name] = new_bitmap
+                changed = True
+
+        if changed:
+            self._generation += 1
+
+    def _on_task_deleted(self, tid, path=None):
+        ordinal = self._ordinals.remove(tid)
+        if ordinal is None:
+            return
+
+        mask = ~(1 << ordinal)
+        for name in self._bitmaps:
+            self._bitmaps[name] &= mask
+        self._generation += 1
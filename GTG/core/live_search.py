@@ -0,0 +1,275 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) 2008-2013 - Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""
+Search-as-you-type support.
+
+The results of the last few queries typed in the search bar are cached as
+sets of task ids. When the new query only narrows one of them (an additional
+term, a longer word, see search.is_refinement()), only the tasks of the
+previous result are tested instead of the whole tree.
+
+Cached results are kept up to date when a task is added, modified or deleted,
+so they can be reused while the user keeps typing.
+
+On huge task stores, a query can be evaluated by a SearchJob in small time
+slices from GLib idle callbacks, so the main loop is never blocked. Partial
+results are published while the job runs and the job is cancelled as soon
+as the query changes.
+"""
+
+from collections import OrderedDict
+import functools
+import logging
+import time
+
+from GTG.core.interruptible import interruptible, _cancellation_point
+from GTG.core.search import parse_search_query, search_filter, is_refinement
+
+log = logging.getLogger(__name__)
+
+
+class SearchResult():
+    """ Set of tasks matching a query """
+
+    def __init__(self, parameters, matches, complete=True):
+        self.parameters = parameters
+        self.matches = matches
+        # False while a SearchJob is still evaluating the query
+        self.complete = complete
+
+
+class SearchJob():
+    """ Evaluation of a query split into time slices
+
+    step() is meant to be used as a GLib idle callback: it tests tasks during
+    TIME_SLICE seconds and returns True while some tasks are left. When the
+    query changes, cancel() stops the job at its next step.
+    """
+
+    # Seconds spent testing tasks in a single step
+    TIME_SLICE = 0.02
+    # Minimal delay in seconds between two publications of partial results
+    PUBLISH_INTERVAL = 0.2
+
+    def __init__(self, live_search, query, result, candidates,
+                 on_progress=None):
+        """
+        @param on_progress: function called with the job when partial
+            results are available and when the job is done
+        """
+        self.query = query
+        self.parameters = result.parameters
+        self.matches = result.matches
+        self.done = result.complete
+
+        self._live_search = live_search
+        self._result = result
+        self._pending = iter(list(candidates))
+        self._on_progress = on_progress
+        self._last_publish = time.monotonic()
+        self._cancelled = False
+        self.cancellation_point = functools.partial(
+            _cancellation_point, lambda: self._cancelled)
+
+    def cancel(self):
+        """ Stop the job and forget its partial result """
+        if not self._cancelled and not self.done:
+            self._cancelled = True
+            self._live_search._discard(self.query, self._result)
+
+    def is_cancelled(self):
+        return self._cancelled
+
+    # Interrupted step returns None which removes the GLib idle source
+    @interruptible
+    def step(self):
+        """ Test tasks for a while, return True if there is more to do """
+        self.cancellation_point()
+        if self.done:
+            self._publish()
+            return False
+
+        tree = self._live_search.get_tree()
+        start = time.monotonic()
+        for tid in self._pending:
+            if tree.has_node(tid) and \
+                    search_filter(tree.get_node(tid), self.parameters):
+                self.matches.add(tid)
+
+            if time.monotonic() - start >= self.TIME_SLICE:
+                break
+        else:
+            self.done = True
+            self._result.complete = True
+            log.debug("Search for %r done, %d results",
+                      self.query, len(self.matches))
+            self._publish()
+            return False
+
+        if time.monotonic() - self._last_publish >= self.PUBLISH_INTERVAL:
+            self._publish()
+        return True
+
+    def _publish(self):
+        self._last_publish = time.monotonic()
+        if self._on_progress is not None:
+            self._on_progress(self)
+
+
+class LiveSearch():
+    """ Evaluate queries of the search bar and cache their results """
+
+    # How many results of previous queries are kept
+    CACHE_SIZE = 5
+
+    def __init__(self, tasktree):
+        self._tree = tasktree
+        # query -> SearchResult
+        self._results = OrderedDict()
+
+        view = tasktree.get_main_view()
+        view.register_cllbck('node-added', self._on_task_changed)
+        view.register_cllbck('node-modified', self._on_task_changed)
+        view.register_cllbck('node-deleted', self._on_task_deleted)
+
+    def get_tree(self):
+        return self._tree
+
+    def search(self, query):
+        """ Evaluate query and return parameters for the liblarch filter
+
+        InvalidQuery is raised for malformed queries.
+        """
+        result = self._get_complete(query)
+        if result is not None:
+            return result.parameters
+
+        result, candidates = self._prepare(query)
+        view = self._tree.get_main_view()
+        for tid in candidates:
+            if search_filter(view.get_node(tid), result.parameters):
+                result.matches.add(tid)
+
+        result.complete = True
+        return result.parameters
+
+    def start_search(self, query, on_progress=None):
+        """ Return a SearchJob evaluating query in time slices
+
+        The partial result is used by the filter while the job is running.
+        InvalidQuery is raised for malformed queries.
+        """
+        result = self._get_complete(query)
+        if result is not None:
+            return SearchJob(self, query, result, [], on_progress)
+
+        result, candidates = self._prepare(query, complete=False)
+        return SearchJob(self, query, result, candidates, on_progress)
+
+    def get_matches(self, query):
+        """ Return the cached set of tasks matching query or None
+
+        The set could be incomplete while a SearchJob is running. """
+        try:
+            return self._results[query].matches
+        except KeyError:
+            return None
+
+    def filter(self, task, parameters=None):
+        """ liblarch filter function for the search bar
+
+        Uses the cached result when available and evaluates the query
+        otherwise. """
+        if not parameters or 'q' not in parameters:
+            return False
+
+        matches = self.get_matches(parameters.get('query'))
+        if matches is None:
+            return search_filter(task, parameters)
+        return task.get_id() in matches
+
+    def clear(self):
+        """ Forget all the results, e.g. when the day changed and queries
+        like !today have a different meaning """
+        self._results.clear()
+
+    def _get_complete(self, query):
+        result = self._results.get(query)
+        if result is None or not result.complete:
+            return None
+
+        self._results.move_to_end(query)
+        return result
+
+    def _prepare(self, query, complete=True):
+        """ Parse the query, store an empty result for it and return it with
+        the task ids which have to be tested """
+        parameters = parse_search_query(query)
+        parameters['query'] = query
+
+        candidates = self._find_candidates(parameters)
+        if candidates is None:
+            candidates = self._tree.get_main_view().get_all_nodes()
+            log.debug("Searching %r in all tasks", query)
+        else:
+            candidates = list(candidates)
+            log.debug("Refining %r within %d tasks", query, len(candidates))
+
+        result = SearchResult(parameters, set(), complete)
+        self._store(query, result)
+        return result, candidates
+
+    def _find_candidates(self, parameters):
+        """ Return the smallest cached result which contains all the results
+        of the new query or None """
+        best = None
+        for result in self._results.values():
+            if not result.complete:
+                continue
+            if best is not None and len(result.matches) >= len(best):
+                continue
+            if is_refinement(result.parameters, parameters):
+                best = result.matches
+        return best
+
+    def _store(self, query, result):
+        self._results[query] = result
+        self._results.move_to_end(query)
+        while len(self._results) > self.CACHE_SIZE:
+            self._results.popitem(last=False)
+
+    def _discard(self, query, result):
+        """ Forget the result of a cancelled job """
+        if self._results.get(query) is result:
+            del self._results[query]
+
+    def _on_task_changed(self, tid, path=None):
+        if not self._results or not self._tree.has_node(tid):
+            return
+
+        task = self._tree.get_node(tid)
+        for result in self._results.values():
+            if search_filter(task, result.parameters):
+                result.matches.add(tid)
+            else:
+                result.matches.discard(tid)
+
+    def _on_task_deleted(self, tid, path=None):
+        for result in self._results.values():
+            result.matches.discard(tid)
@@ -198,15 +198,8 @@ class PluginAPI():
         NOTE: This function stronglye depend on browser and could be easily
         broken by changes in browser code
         """
-        browser = self.get_browser()
-
-        # set default bgcolor?
-        if func is None:
-            func = browser.tv_factory.get_task_bg_color
-
-        for pane in browser.vtree_panes.values():
-            pane.set_bg_color(func, 'bg_color')
-            pane.basetree.get_basetree().refresh_all()
+        # Without func, the default bgcolor is set
+        self.get_browser().set_bg_color_func(func)
 
 # file saving/loading =======================================================
     def load_configuration_object(self, plugin_name, filename,
@@ -0,0 +1,224 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) 2008-2013 - Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""
+Next occurrences of recurring tasks.
+
+Date.parse_from_date() computes one occurrence after a date and has to parse
+the recurring term again each time. When a recurring task was overdue for a
+long time, finding the next occurrence after today took one parse for every
+missed occurrence.
+
+A recurring term is compiled once into a rule (see compile_term()). Rules of
+days, weeks and days of the week jump directly to the first occurrence after
+a date, as do rules of years. Rules of months jump from one leap February
+to the next. Other terms fall back to repeated calls of
+Date.parse_from_date().
+"""
+
+import calendar
+import functools
+from datetime import date, timedelta
+
+from GTG.core.dates import (Date, Accuracy, get_keyword, KEYWORD_DAYS,
+                            KEYWORD_MONTH, KEYWORD_WEEKDAY)
+
+class StepRule():
+    """ Rule computing occurrences one by one with Date.parse_from_date() """
+
+    def __init__(self, term):
+        self.term = term
+
+    def next_date(self, day):
+        """ Return the occurrence following the Date day """
+        return day.parse_from_date(self.term, newtask=False)
+
+    def first_occurrence(self, start, limit, strict=False):
+        """ Return the first occurrence following the Date start which is
+        after limit (or on limit if strict is False) """
+        nextdate = self.next_date(start)
+        while nextdate <= limit if strict else nextdate < limit:
+            nextdate = self.next_date(nextdate)
+        return nextdate
+
+    def next_occurrence(self, due_date, today):
+        """ Return the next due date of a task which was due on due_date
+
+        When the task is done before or on its due date, it is the first
+        occurrence after the due date. Otherwise, it is the first occurrence
+        which is not before today.
+        """
+        if today <= due_date:
+            return self.first_occurrence(due_date, due_date, strict=True)
+        return self.first_occurrence(due_date, today)
+
+
+class ArithmeticRule(StepRule):
+    """ Rule computing occurrences with date arithmetic
+
+    Rules define _step(day), which returns the datetime.date of the
+    occurrence following the datetime.date day.
+    """
+
+    def first_occurrence(self, start, limit, strict=False):
+        start = Date(start).dt_by_accuracy(Accuracy.date)
+        limit = Date(limit).dt_by_accuracy(Accuracy.date)
+        if strict:
+            limit += timedelta(1)
+        return Date(self._first_from(start, limit))
+
+    def next_date(self, day):
+        day = Date(day).dt_by_accuracy(Accuracy.date)
+        return Date(self._step(day))
+
+    def _first_from(self, start, limit):
+        """ Return the first occurrence following start which is on or after
+        limit, both datetime.date """
+        day = self._step(start)
+        while day < limit:
+            day = self._step(day)
+        return day
+
+
+class PeriodRule(ArithmeticRule):
+    """ Occurrences separated by a fixed number of days """
+
+    def __init__(self, term, days):
+        super().__init__(term)
+        self.days = days
+
+    def _step(self, day):
+        return day + timedelta(self.days)
+
+    def _first_from(self, start, limit):
+        # At least one period, then as many as needed to reach limit
+        periods = max(1, -(-(limit - start).days // self.days))
+        return start + timedelta(self.days * periods)
+
+
+class WeekdayRule(PeriodRule):
+    """ Occurrences on a day of the week """
+
+    def __init__(self, term, weekday):
+        super().__init__(term, 7)
+        self.weekday = weekday
+
+    def _step(self, day):
+        weekday = day.weekday()
+        offset = self.weekday - weekday + 7 * int(self.weekday <= weekday)
+        return day + timedelta(offset)
+
+    def _first_from(self, start, limit):
+        return super()._first_from(self._step(start) - timedelta(7), limit)
+
+
+class MonthRule(ArithmeticRule):
+    """ Occurrences every month
+
+    Like Date.parse_from_date(), the length of the month of an occurrence is
+    added to get the next one, without leap days. Occurrences stay on the
+    same day of the month until a leap February or a day after the 28th.
+    """
+
+    def _step(self, day):
+        return day + timedelta(calendar.mdays[day.month])
+
+    def _first_from(self, start, limit):
+        day = self._step(start)
+        while day < limit:
+            if day.day > 28 or (day.month == 2 and calendar.isleap(day.year)):
+                # The day of the month changes, follow it one step
+                day = self._step(day)
+                continue
+
+            month = _month_index(day)
+            # Months to the first occurrence on or after limit
+            months = _month_index(limit) - month
+            if day.day < limit.day:
+                months += 1
+            # Stop at the next leap February
+            year = day.year if day.month < 2 else day.year + 1
+            while not calendar.isleap(year):
+                year += 1
+            months = min(months, year * 12 + 1 - month)
+
+            month += months
+            day = date(month // 12, month % 12 + 1, day.day)
+        return day
+
+
+class YearRule(ArithmeticRule):
+    """ Occurrences every year
+
+    Like Date.parse_from_date(), 366 days are added during leap years, so
+    occurrences stay on the same day of the year.
+    """
+
+    def _step(self, day):
+        return day + timedelta(365 + int(calendar.isleap(day.year)))
+
+    def _first_from(self, start, limit):
+        # After the 366th day of a leap year, the next occurrence is on the
+        # first day of the year after the next one
+        day = self._step(start)
+        if day >= limit:
+            return day
+
+        yearday = day.toordinal() - date(day.year, 1, 1).toordinal()
+        day = date.fromordinal(date(limit.year, 1, 1).toordinal() + yearday)
+        if day < limit:
+            day = date.fromordinal(
+                date(limit.year + 1, 1, 1).toordinal() + yearday)
+        return day
+
+
+def _month_index(day):
+    """ Return the number of months from year 0 to the month of day """
+    return day.year * 12 + day.month - 1
+
+
+@functools.lru_cache(maxsize=128)
+def compile_term(term):
+    """ Return the rule of a recurring term
+
+    ValueError is raised for invalid terms. """
+    term = '' if term is None else term.lower()
+
+    # Validate the term in the same way as the tasks do
+    Date.today().parse_from_date(term, newtask=False)
+
+    try:
+        # A date or a fuzzy date gives always the same occurrence
+        Date(term)
+        return StepRule(term)
+    except ValueError:
+        pass
+
+    keyword = get_keyword(term, recurring=True)
+    if keyword is None or term.isdigit():
+        # Days of month and numerical dates
+        return StepRule(term)
+
+    kind, value = keyword
+    if kind == KEYWORD_DAYS:
+        return PeriodRule(term, value)
+    if kind == KEYWORD_WEEKDAY:
+        return WeekdayRule(term, value)
+    if kind == KEYWORD_MONTH:
+        return MonthRule(term)
+    return YearRule(term)
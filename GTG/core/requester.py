@@ -61,22 +61,16 @@ class Requester(GObject.GObject):
 
     def apply_global_filter(self, tree, filtername):
         """
-        This method also update the viewcount of tags
+        Counts of tags are not filtered, see GTG.core.tag_counters
         TODO(jakubbrindza): Evaluate if this is used somewhere before release
         """
         tree.apply_filter(filtername)
-        for t in self.get_all_tags():
-            ta = self.get_tag(t)
-            ta.apply_filter(filtername)
 
     def unapply_global_filter(self, tree, filtername):
         """
         TODO(jakubbrindza): Evaluate if this is used somewhere before release
         """
         tree.unapply_filter(filtername)
-        for t in self.get_all_tags():
-            ta = self.get_tag(t)
-            ta.unapply_filter(filtername)
 
     # Filters bank #######################
     # List, by name, all available filters
@@ -209,6 +203,40 @@ class Requester(GObject.GObject):
 
         return SEARCH_TAG_PREFIX + name
 
+    def get_saved_searches(self):
+        """ Return the materialized results of saved searches """
+        return self.ds.get_saved_searches()
+
+    def get_live_search(self):
+        """ Return the cache of queries typed in the search bar """
+        return self.ds.get_live_search()
+
+    def get_tag_closure(self):
+        """ Return the cached relations of the tag hierarchy """
+        return self.ds.get_tag_closure()
+
+    def get_tag_counters(self):
+        """ Return the number of active tasks of every tag """
+        return self.ds.get_tag_counters()
+
+    def get_subtree_aggregates(self):
+        """ Return the cached aggregates over subtasks of every task """
+        return self.ds.get_subtree_aggregates()
+
+    def get_date_boundaries(self):
+        """ Return the tasks indexed by the next day their filters change """
+        return self.ds.get_date_boundaries()
+
+    def get_filter_bitmaps(self):
+        """ Return the bitmaps used to combine task filters """
+        return self.ds.get_filter_bitmaps()
+
+    def refresh_saved_searches(self):
+        """ Evaluate again saved searches which depend on the current date
+
+        Return the names of those searches. """
+        return self.ds.get_saved_searches().refresh_date_relative()
+
     def remove_tag(self, name):
         """ calls datastore to remove a given tag """
         self.ds.remove_tag(name)
@@ -0,0 +1,221 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) 2008-2013 - Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""
+Materialized result sets for saved searches.
+
+Instead of evaluating every saved search against every task each time a view
+is filtered, the result of each saved search is kept as a set of task ids.
+When a task is added, modified or deleted, only that task is tested again
+against the (already parsed) queries. Queries depending on the current date
+(!today, !before "next month", ...) are evaluated again only when the day
+changes, see refresh_date_relative().
+
+The liblarch filter of a saved search is then a simple set lookup.
+"""
+
+import logging
+
+from GTG.core.search import parse_search_query, search_filter
+from GTG.core.search import is_date_relative, InvalidQuery
+
+log = logging.getLogger(__name__)
+
+
+class SavedSearches():
+    """ Keep the matching tasks of every saved search up to date """
+
+    def __init__(self, tasktree, count_changed=None):
+        """
+        @param tasktree: liblarch tree of the tasks
+        @param count_changed: function called with the name of the saved
+            search when the number of its active matches changed
+        """
+        self._tree = tasktree
+        self._count_changed = count_changed
+
+        # name -> parsed query
+        self._parameters = {}
+        # name -> query as typed by the user
+        self._queries = {}
+        # name -> set of matching task ids
+        self._matches = {}
+        # name -> set of matching task ids which are active
+        self._active = {}
+        # names of the searches which depend on the current date
+        self._date_relative = set()
+        # task ids which were already tested
+        self._known = set()
+        # task id -> sorted names of the searches it matches
+        self._task_searches = {}
+
+        view = tasktree.get_main_view()
+        view.register_cllbck('node-added', self._on_task_changed)
+        view.register_cllbck('node-modified', self._on_task_changed)
+        view.register_cllbck('node-deleted', self._on_task_deleted)
+
+    def add(self, name, query, parameters=None):
+        """ Register a saved search and compute its result set
+
+        If parameters are not provided, the query is parsed here.
+        InvalidQuery is raised for malformed queries.
+        """
+        if parameters is None:
+            parameters = parse_search_query(query)
+
+        self._queries[name] = query
+        self._parameters[name] = parameters
+        if is_date_relative(parameters):
+            self._date_relative.add(name)
+        else:
+            self._date_relative.discard(name)
+
+        self._evaluate(name)
+
+    def remove(self, name):
+        """ Forget the saved search """
+        self._task_searches.clear()
+        self._queries.pop(name, None)
+        self._parameters.pop(name, None)
+        self._matches.pop(name, None)
+        self._active.pop(name, None)
+        self._date_relative.discard(name)
+
+    def has_search(self, name):
+        return name in self._parameters
+
+    def get_parameters(self, name):
+        """ Return parsed query of the saved search or None """
+        return self._parameters.get(name)
+
+    def get_matches(self, name):
+        """ Return a copy of the set of task ids matching the search """
+        return set(self._matches.get(name, ()))
+
+    def get_count(self, name, active_only=True):
+        """ Return the number of tasks matching the search """
+        if active_only:
+            return len(self._active.get(name, ()))
+        else:
+            return len(self._matches.get(name, ()))
+
+    def is_match(self, name, tid):
+        """ Return True if task tid matches the saved search name """
+        return tid in self._matches.get(name, ())
+
+    def get_searches_for_task(self, tid):
+        """ Return a sorted tuple of the saved searches the task matches """
+        names = self._task_searches.get(tid)
+        if names is None:
+            names = tuple(sorted(name for name, matches
+                                 in self._matches.items() if tid in matches))
+            self._task_searches[tid] = names
+        return names
+
+    def filter(self, task, parameters=None):
+        """ liblarch filter function of a saved search
+
+        The name of the search is expected as parameters['name'].
+        """
+        name = parameters['name']
+        if name not in self._matches:
+            return False
+
+        tid = task.get_id()
+        if tid not in self._known:
+            self._update_task(task)
+        return tid in self._matches[name]
+
+    def refresh_date_relative(self):
+        """ Evaluate again searches whose result depends on today.
+
+        This should be called whenever the day changes. Return the names of
+        those searches. """
+        names = list(self._date_relative)
+        for name in names:
+            try:
+                self._parameters[name] = parse_search_query(
+                    self._queries[name])
+            except InvalidQuery as error:
+                log.warning("Problem with parsing query %r: %s",
+                            self._queries[name], error)
+                continue
+            self._evaluate(name)
+        return names
+
+    def _evaluate(self, name):
+        """ Compute the result set of a search against all tasks """
+        parameters = self._parameters[name]
+        old_count = len(self._active.get(name, ()))
+        self._task_searches.clear()
+        matches, active = set(), set()
+
+        view = self._tree.get_main_view()
+        for tid in view.get_all_nodes():
+            task = view.get_node(tid)
+            if search_filter(task, parameters):
+                matches.add(tid)
+                if task.get_status() == task.STA_ACTIVE:
+                    active.add(tid)
+
+        self._matches[name] = matches
+        self._active[name] = active
+        if old_count != len(active):
+            self._notify(name)
+
+    def _update_task(self, task):
+        """ Test a single task against every saved search """
+        tid = task.get_id()
+        self._known.add(tid)
+        self._task_searches.pop(tid, None)
+        is_active = task.get_status() == task.STA_ACTIVE
+
+        for name, parameters in self._parameters.items():
+            matches, active = self._matches[name], self._active[name]
+            was_counted = tid in active
+
+            if search_filter(task, parameters):
+                matches.add(tid)
+                if is_active:
+                    active.add(tid)
+                else:
+                    active.discard(tid)
+            else:
+                matches.discard(tid)
+                active.discard(tid)
+
+            if was_counted != (tid in active):
+                self._notify(name)
+
+    def _on_task_changed(self, tid, path=None):
+        if not self._tree.has_node(tid):
+            return
+        self._update_task(self._tree.get_node(tid))
+
+    def _on_task_deleted(self, tid, path=None):
+        self._known.discard(tid)
+        self._task_searches.pop(tid, None)
+        for name, matches in self._matches.items():
+            matches.discard(tid)
+            if tid in self._active[name]:
+                self._active[name].discard(tid)
+                self._notify(name)
+
+    def _notify(self, name):
+        if self._count_changed is not None:
+            self._count_changed(name)
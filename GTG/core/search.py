@@ -243,6 +243,55 @@ def parse_search_query(query):
     return {'q': commands}
 
 
+# Commands whose result depends on the current date
+DATE_COMMANDS = {'after', 'before', 'today', 'tomorrow', 'now', 'soon',
+                 'someday'}
+
+
+def is_date_relative(parameters):
+    """ Return True if the result of the query could change from one day
+    to the next one without the task being modified """
+
+    def check_commands(commands_list):
+        for command in commands_list:
+            if command[0] == 'or':
+                if check_commands(command[2]):
+                    return True
+            elif command[0] in DATE_COMMANDS:
+                return True
+        return False
+
+    return check_commands(parameters.get('q', []))
+
+
+def _implies(new_cmd, old_cmd):
+    """ Return True if every task satisfying new_cmd satisfies old_cmd """
+    if new_cmd[0] == 'or':
+        return all(_implies(sub_cmd, old_cmd) for sub_cmd in new_cmd[2])
+    if old_cmd[0] == 'or':
+        return any(_implies(new_cmd, sub_cmd) for sub_cmd in old_cmd[2])
+
+    if new_cmd[0] == old_cmd[0] == 'word' and new_cmd[1] == old_cmd[1]:
+        if new_cmd[1]:
+            # Containing "milk" implies containing "mil"
+            return old_cmd[2] in new_cmd[2]
+        else:
+            # Not containing "mil" implies not containing "milk"
+            return new_cmd[2] in old_cmd[2]
+
+    return new_cmd == old_cmd
+
+
+def is_refinement(old_parameters, new_parameters):
+    """ Return True if the result of the new query is a subset of the result
+    of the old query, e.g. when the user added a term or typed a longer word.
+
+    In that case, only tasks matching the old query need to be tested. """
+    new_commands = new_parameters['q']
+    return all(any(_implies(new_cmd, old_cmd) for new_cmd in new_commands)
+               for old_cmd in old_parameters['q'])
+
+
 def search_filter(task, parameters=None):
     """ Check if task satisfies all search parameters """
 
@@ -257,7 +306,7 @@ def search_filter(task, parameters=None):
         def fulltext_search(task, word):
             """ check if task contains the word """
             word = word.lower()
-            text = task.get_excerpt(strip_tags=False).lower()
+            text = task.get_search_text()
             title = task.get_title().lower()
 
             return word in text or word in title
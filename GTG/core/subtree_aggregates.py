@@ -0,0 +1,188 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) 2008-2013 - Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""
+Cached aggregates over the subtasks of every task.
+
+The most urgent due date of a task and its active subtasks, the number of
+active children and the number of active descendants are needed for every
+row of the task browser, in sort functions and in the workview filter (a
+task is workable when it has no active children). The urgency color plugin
+colors tasks like their most urgent active descendant. Instead of walking the
+subtasks each time, they are computed once per task from the aggregates of
+its children. When a task is added, modified or deleted, only the task and
+its ancestors are computed again, stopping as soon as nothing changed.
+"""
+
+from collections import deque, namedtuple
+
+# urgent_descendant is (due date, task id) of the active descendant with the
+# most urgent due date, or None
+Aggregate = namedtuple('Aggregate', ['is_active', 'urgent_date',
+                                     'active_children', 'active_descendants',
+                                     'urgent_descendant'])
+
+
+class SubtreeAggregates():
+    """ Keep the aggregates of every task up to date """
+
+    def __init__(self, tasktree):
+        self._tree = tasktree
+        # task id -> Aggregate
+        self._aggregates = {}
+        # task id -> parents of the task when its aggregate was computed
+        self._parents = {}
+
+        view = tasktree.get_main_view()
+        view.register_cllbck('node-added', self._on_task_changed)
+        view.register_cllbck('node-modified', self._on_task_changed)
+        view.register_cllbck('node-deleted', self._on_task_deleted)
+
+    def get_urgent_date(self, task):
+        """ Return the most urgent due date among the task and its active
+        subtasks """
+        return self._get(task).urgent_date
+
+    def get_urgent_descendant(self, task):
+        """ Return the id of the active descendant with the most urgent
+        due date or None if no active descendant has a due date
+
+        Active descendants of closed subtasks are taken into account too. """
+        urgent_descendant = self._get(task).urgent_descendant
+        if urgent_descendant is None:
+            return None
+        return urgent_descendant[1]
+
+    def get_active_children_count(self, task):
+        return self._get(task).active_children
+
+    def get_active_descendants_count(self, task):
+        """ Return the number of active subtasks at any depth
+
+        Subtasks are counted whatever the filters of the views. A subtask
+        with several parents is counted once for each path leading to it. """
+        return self._get(task).active_descendants
+
+    def is_workable(self, task):
+        """ Return True if the task has no active children """
+        return self._get(task).active_children == 0
+
+    def _get(self, task):
+        aggregate = self._aggregates.get(task.get_id())
+        if aggregate is None:
+            self._store_descendants(task)
+            if self._tree.has_node(task.get_id()):
+                aggregate = self._store(task)
+            else:
+                # Not in the tree yet, don't cache it
+                aggregate = self._compute(task)
+        return aggregate
+
+    def _store_descendants(self, task):
+        """ Compute the missing aggregates of the descendants of the task,
+        children after their own descendants
+
+        The hierarchy can be deep, an explicit stack is used instead of
+        recursion. """
+        pending = [(child_id, False) for child_id in task.get_children()]
+        visiting = set()
+        while pending:
+            tid, expanded = pending.pop()
+            if tid in self._aggregates or not self._tree.has_node(tid):
+                continue
+
+            node = self._tree.get_node(tid)
+            if expanded:
+                self._store(node)
+            elif tid not in visiting:
+                visiting.add(tid)
+                pending.append((tid, True))
+                pending.extend((child_id, False)
+                               for child_id in node.get_children()
+                               if child_id not in self._aggregates)
+
+    def _compute(self, task):
+        urgent_date = task.get_due_date()
+        active_children = active_descendants = 0
+        urgent_descendant = None
+
+        for child_id in task.get_children():
+            if not self._tree.has_node(child_id):
+                continue
+
+            child_node = self._tree.get_node(child_id)
+            child = self._get(child_node)
+            # The child could have got this parent without being modified
+            self._parents[child_id] = list(child_node.get_parents())
+            if child.is_active:
+                active_children += 1
+                active_descendants += 1
+                urgent_date = min(urgent_date, child.urgent_date)
+            active_descendants += child.active_descendants
+
+            # Descendants of the child come before the child, the first
+            # found wins on ties like in a depth-first walk
+            candidates = [child.urgent_descendant]
+            if child.is_active and child_node.get_due_date():
+                candidates.append((child_node.get_due_date(), child_id))
+            for candidate in candidates:
+                if candidate is None:
+                    continue
+                if urgent_descendant is None or \
+                        candidate[0] < urgent_descendant[0]:
+                    urgent_descendant = candidate
+
+        is_active = task.get_status() == task.STA_ACTIVE
+        return Aggregate(is_active, urgent_date, active_children,
+                         active_descendants, urgent_descendant)
+
+    def _store(self, task):
+        aggregate = self._compute(task)
+        self._aggregates[task.get_id()] = aggregate
+        self._parents[task.get_id()] = list(task.get_parents())
+        return aggregate
+
+    def _update(self, tid):
+        """ Compute the aggregate of the task and of its ancestors again """
+        pending = deque([(tid, True)])
+        seen = set()
+        while pending:
+            tid, force = pending.popleft()
+            if tid in seen or not self._tree.has_node(tid):
+                continue
+            seen.add(tid)
+
+            old = self._aggregates.get(tid)
+            old_parents = self._parents.get(tid, [])
+            new = self._store(self._tree.get_node(tid))
+            parents = self._parents[tid]
+            if not force and old == new and old_parents == parents:
+                # Ancestors are not affected
+                continue
+
+            for parent_id in set(parents) | set(old_parents):
+                pending.append((parent_id, False))
+
+    def _on_task_changed(self, tid, path=None):
+        self._update(tid)
+
+    def _on_task_deleted(self, tid, path=None):
+        self._aggregates.pop(tid, None)
+        old_parents = self._parents.pop(tid, [])
+        for parent_id in old_parents:
+            self._update(parent_id)
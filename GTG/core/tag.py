@@ -91,44 +91,11 @@ class Tag(TreeNode):
         for key, value in attributes.items():
             self.set_attribute(key, value)
 
-        self.viewcount = None
-
         if tid:
             self.tid = tid
         else:
             self.tid = uuid.uuid4()
 
-    def __get_viewcount(self):
-        if not self.viewcount and self.get_name() != "gtg-tags-sep":
-            basetree = self.req.get_basetree()
-            self.viewcount = basetree.get_viewcount(self.get_name(), False)
-
-            sp_id = self.get_attribute("special")
-            if sp_id == "all":
-                pass
-            if sp_id == "notag":
-                self.viewcount.apply_filter('notag', refresh=False)
-            # No special means a normal tag
-            else:
-                self.viewcount.apply_filter(self.get_name(), refresh=False)
-            self.viewcount.apply_filter('active')
-            self.viewcount.register_cllbck(self.modified)
-        return self.viewcount
-
-    def apply_filter(self, filtername):
-        if self.viewcount:
-            self.viewcount.apply_filter(filtername)
-
-    def unapply_filter(self, filtername):
-        if self.viewcount:
-            self.viewcount.unapply_filter(filtername)
-
-    # When a task change a tag, we may want to manually update
-    # To ensure that the task is well counted/uncounted for that tag
-    def update_task(self, task_id):
-        vc = self.__get_viewcount()
-        vc.modify(task_id)
-
     # overiding some functions to not allow dnd of special tags
     def add_parent(self, parent_id):
         p = self.req.get_tag(parent_id)
@@ -231,22 +198,23 @@ class Tag(TreeNode):
 
     # TASK relation ####
     def get_active_tasks_count(self):
+        if self.is_search_tag():
+            return self.req.get_saved_searches().get_count(self.get_name())
         count = self.__get_count()
         return count
 
     def get_total_tasks_count(self):
+        if self.is_search_tag():
+            return self.req.get_saved_searches().get_count(self.get_name())
         return self.__get_count()
 
     def __get_count(self, tasktree=None):
         """Returns the number of all related tasks"""
         # this method purposefully doesn't rely on get_related_tasks()
-        # which does a similar job, in order to benefit from liblarch
-        # optimizations
-        vc = self.__get_viewcount()
-        if vc:
-            return vc.get_n_nodes()
-        else:
+        # which does a similar job, the counters are updated incrementally
+        if self.get_name() == SEP_TAG:
             return 0
+        return self.req.get_tag_counters().get_count(self.get_name())
 
     def get_related_tasks(self, tasktree=None):
         """Returns all related tasks node ids"""
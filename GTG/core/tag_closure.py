@@ -0,0 +1,108 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) 2008-2013 - Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""
+Cached relations of the tag hierarchy.
+
+A task "has" a tag when it has the tag itself or one of its subtags. Instead
+of walking the tag tree for every task and every filter, the effective tags
+of a task (its tags and all their ancestors) are computed once for each set
+of tags and cached, and so is the set of nonactionable tags.
+
+Caches are dropped when a tag is added or deleted, or when the parents or the
+nonactionable attribute of a tag change. Objects keeping results which
+depend on tags (TagCounters, FilterBitmaps) compare the generation of the
+closure and compute their results again when it moved.
+"""
+
+from collections import deque
+
+
+class TagClosure():
+    """ Closure of the tag hierarchy """
+
+    def __init__(self, tagtree):
+        self._tree = tagtree
+        # tuple of tag names -> frozenset of those tags and their ancestors
+        self._effective = {}
+        self._nonactionable = None
+        # tag name -> (parents, nonactionable) when the tag was last modified
+        self._signatures = {}
+        # increased whenever caches are dropped
+        self.generation = 0
+
+        view = tagtree.get_main_view()
+        view.register_cllbck('node-added', self._on_tag_added_or_deleted)
+        view.register_cllbck('node-modified', self._on_tag_modified)
+        view.register_cllbck('node-deleted', self._on_tag_added_or_deleted)
+
+    def get_effective_tags(self, tags):
+        """ Return a frozenset of tags and all their ancestors
+
+        @param tags: tuple of tag names, like Task.tags
+        """
+        effective = self._effective.get(tags)
+        if effective is None:
+            effective = self._effective[tags] = self._get_ancestors(tags)
+        return effective
+
+    def get_nonactionable_tags(self):
+        """ Return a frozenset of names of nonactionable tags """
+        if self._nonactionable is None:
+            view = self._tree.get_main_view()
+            self._nonactionable = frozenset(
+                name for name in view.get_all_nodes()
+                if view.get_node(name).get_attribute(
+                    'nonactionable') == 'True')
+        return self._nonactionable
+
+    def invalidate(self):
+        """ Drop caches and increase the generation """
+        self._effective.clear()
+        self._nonactionable = None
+        self.generation += 1
+
+    def _get_ancestors(self, tags):
+        result = set()
+        pending = deque(tags)
+        while pending:
+            name = pending.popleft()
+            if name in result:
+                continue
+            result.add(name)
+            if self._tree.has_node(name):
+                pending.extend(self._tree.get_node(name).get_parents())
+        return frozenset(result)
+
+    def _get_signature(self, tag):
+        return (tuple(tag.get_parents()), tag.get_attribute('nonactionable'))
+
+    def _on_tag_added_or_deleted(self, name, path=None):
+        self._signatures.pop(name, None)
+        self.invalidate()
+
+    def _on_tag_modified(self, name, path=None):
+        # Tags are modified for every change of their task count, caches are
+        # only dropped when the hierarchy or nonactionable tags changed
+        if not self._tree.has_node(name):
+            return
+
+        signature = self._get_signature(self._tree.get_node(name))
+        if self._signatures.get(name) != signature:
+            self.invalidate()
+            self._signatures[name] = signature
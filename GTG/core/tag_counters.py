@@ -0,0 +1,136 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) 2008-2013 - Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""
+Number of active tasks of every tag.
+
+The sidebar displays the number of active tasks of each tag. Instead of a
+liblarch viewcount for every tag, which are all notified whenever a task
+changes, the counters remember the tags every active task is counted for
+(its tags and their ancestors, see TagClosure) and only the differences are
+applied when a task is added, modified or deleted.
+
+The special tags count all the active tasks (ALLTASKS_TAG) and the active
+tasks without tags (NOTAG_TAG). Counters are computed again after a change
+of the tag hierarchy, and the tags whose count differs are signaled.
+"""
+
+from collections import Counter
+
+from GTG.core.tag import ALLTASKS_TAG, NOTAG_TAG
+
+
+class TagCounters():
+    """ Active tasks counted by tag """
+
+    def __init__(self, tasktree, tag_closure, on_changed=None):
+        """
+        @param on_changed: function called with the name of a tag whose
+            count changed
+        """
+        self._tree = tasktree
+        self._closure = tag_closure
+        self._on_changed = on_changed
+        # tag name -> number of active tasks
+        self._counts = Counter()
+        # task id -> names of the tags the task is counted for
+        self._counted = {}
+        # generation of the tag closure the counters were computed with
+        self._generation = None
+
+        view = tasktree.get_main_view()
+        view.register_cllbck('node-added', self._on_task_changed)
+        view.register_cllbck('node-modified', self._on_task_changed)
+        view.register_cllbck('node-deleted', self._on_task_deleted)
+
+    def get_count(self, name):
+        """ Return the number of active tasks with the tag or a subtag """
+        if self._generation != self._closure.generation:
+            self._rebuild()
+        return self._counts[name]
+
+    def update(self, tid):
+        """ Count the task again, e.g. right after it lost a tag """
+        self._on_task_changed(tid)
+
+    def _get_names(self, task):
+        if task.get_status() != task.STA_ACTIVE:
+            return frozenset()
+
+        tags = task.get_tags_name()
+        if not tags:
+            return frozenset((ALLTASKS_TAG, NOTAG_TAG))
+        effective = self._closure.get_effective_tags(tuple(tags))
+        return effective | {ALLTASKS_TAG}
+
+    def _rebuild(self):
+        old_counts = self._counts
+        first = self._generation is None
+        self._counts = Counter()
+        self._counted.clear()
+        self._generation = self._closure.generation
+
+        view = self._tree.get_main_view()
+        for tid in view.get_all_nodes():
+            names = self._get_names(view.get_node(tid))
+            if names:
+                self._counted[tid] = names
+                self._counts.update(names)
+
+        if self._on_changed is None or first:
+            return
+        for name in set(old_counts) | set(self._counts):
+            if old_counts[name] != self._counts[name]:
+                self._on_changed(name)
+
+    def _apply(self, tid, names):
+        old = self._counted.get(tid, frozenset())
+        if names == old:
+            return
+
+        if names:
+            self._counted[tid] = names
+        else:
+            self._counted.pop(tid, None)
+
+        for name in old - names:
+            self._counts[name] -= 1
+        for name in names - old:
+            self._counts[name] += 1
+
+        if self._on_changed is not None:
+            for name in old ^ names:
+                self._on_changed(name)
+
+    def _on_task_changed(self, tid, path=None):
+        if self._generation is None:
+            # Nothing was counted yet, everything is counted when needed
+            return
+        if self._generation != self._closure.generation:
+            # Counting everything again includes the task
+            self._rebuild()
+        elif self._tree.has_node(tid):
+            self._apply(tid, self._get_names(self._tree.get_node(tid)))
+
+    def _on_task_deleted(self, tid, path=None):
+        if self._generation is None:
+            return
+        if self._generation != self._closure.generation:
+            self._rebuild()
+        else:
+            self._apply(tid, frozenset())
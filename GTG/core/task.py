@@ -19,9 +19,11 @@
 """
 task.py contains the Task class which represents (guess what) a task
 """
-from datetime import datetime, date
+from collections import deque
+from datetime import datetime
 import html
 import re
+import sys
 import uuid
 import logging
 import xml.sax.saxutils as saxutils
@@ -29,12 +31,53 @@ import xml.sax.saxutils as saxutils
 from gi.repository import GObject
 
 from gettext import gettext as _
+from GTG.core.clock import clock
 from GTG.core.dates import Date
+from GTG.core.recurrence import compile_term
 from liblarch import TreeNode
 
 log = logging.getLogger(__name__)
 
 
+def make_excerpt(content, tags, lines=0, char=0, strip_tags=False,
+                 strip_subtasks=True):
+    """ Return the excerpt of content, see Task.get_excerpt() """
+    # defensive programmation to avoid returning None
+    if content:
+        txt = content
+
+        # Prevent issues with & in content
+        txt = saxutils.escape(txt)
+        txt = txt.strip()
+
+        if strip_tags:
+            for tag in tags:
+                txt = (txt.replace(f'@{tag}, ', '')
+                          .replace(f'@{tag},', '')
+                          .replace(f'@{tag}', ''))
+
+        if strip_subtasks:
+            txt = re.sub(r'\{\!.+\!\}', '', txt)
+
+        # Strip blank lines and get desired amount of lines
+        txt = [line for line in txt.splitlines() if line]
+        if lines > 0:
+            txt = txt[:lines]
+        txt = '\n'.join(txt)
+
+        # We keep the desired number of char
+        if char > 0:
+            txt = txt[:char]
+        return txt
+    else:
+        return ""
+
+
+def make_search_text(content):
+    """ Return the lowercase text of content used by the full text search """
+    return make_excerpt(content, ()).lower()
+
+
 class Task(TreeNode):
     """ This class represent a task in GTG.
     You should never create a Task directly. Use the datastore.new_task()
@@ -50,10 +93,16 @@ class Task(TreeNode):
         # the id of this task in the project should be set
         # tid is a string ! (we have to choose a type and stick to it)
         assert(isinstance(task_id, str) or isinstance(task_id, str))
-        self.tid = str(task_id)
+        self.tid = sys.intern(str(task_id))
         self.set_uuid(task_id)
         self.remote_ids = {}
         self.content = ""
+        # Increased whenever the task is synced or its content changes
+        self.version = 0
+        # Increased when the content or the tags change, see get_excerpt()
+        self.content_version = 0
+        self._excerpts = {}
+        self._search_text = None
         if Task.DEFAULT_TASK_NAME is None:
             Task.DEFAULT_TASK_NAME = _("My new task")
         self.title = Task.DEFAULT_TASK_NAME
@@ -68,10 +117,9 @@ class Task(TreeNode):
         self.due_date = Date.no_date()
         self.start_date = Date.no_date()
         self.can_be_deleted = newtask
-        # tags
-        self.tags = []
+        # tags, as a tuple of interned names
+        self.tags = ()
         self.req = requester
-        self.__main_treeview = requester.get_main_view()
         # If we don't have a newtask, we will have to load it.
         self.loaded = newtask
         # Should not be necessary with the new backends
@@ -89,7 +137,7 @@ class Task(TreeNode):
         return self.added_date
 
     def set_added_date(self, date):
-        self.added_date = Date(date)
+        self.added_date = Date.shared(date)
 
     def is_loaded(self):
         return self.loaded
@@ -106,7 +154,7 @@ class Task(TreeNode):
         return self.can_be_deleted
 
     def get_id(self):
-        return str(self.tid)
+        return self.tid
 
     def set_uuid(self, value):
         self.uuid = str(value)
@@ -134,6 +182,7 @@ class Task(TreeNode):
         copy.set_title(self.title)
         copy.content = self.content
         copy.tags = self.tags
+        copy._content_changed()
         log.debug("Duppicating task %s as task %s",
                   self.get_id(), copy.get_id())
         return copy
@@ -228,7 +277,7 @@ class Task(TreeNode):
         if status:
             if not init:
                 GObject.idle_add(self.req.emit, "status-changed", self.tid, status)
-            self.status = status
+            self.status = sys.intern(status)
 
         # Set closing date
         if status and status in [self.STA_DONE, self.STA_DISMISSED]:
@@ -389,23 +438,11 @@ class Task(TreeNode):
         Returns:
             Date: the next due date of a task
         """
-        today = date.today()
-        if today <= self.due_date:
-            try:
-                nextdate = self.due_date.parse_from_date(self.recurring_term, newtask=False)
-                while nextdate <= self.due_date:
-                    nextdate = nextdate.parse_from_date(self.recurring_term, newtask=False)
-                return nextdate
-            except Exception:
-                raise ValueError(f'Invalid recurring term {self.recurring_term}')
-        elif today > self.due_date:
-            try:
-                next_date = self.due_date.parse_from_date(self.recurring_term, newtask=False)
-                while next_date < date.today():
-                    next_date = next_date.parse_from_date(self.recurring_term, newtask=False)
-                return next_date
-            except Exception:
-                raise ValueError(f'Invalid recurring term {self.recurring_term}')
+        try:
+            rule = compile_term(self.recurring_term)
+            return rule.next_occurrence(self.due_date, clock.today())
+        except Exception:
+            raise ValueError(f'Invalid recurring term {self.recurring_term}')
 
     def is_parent_recurring(self):
         if self.has_parent():
@@ -455,61 +492,94 @@ class Task(TreeNode):
     # on this task's due date though, you can obtain it by using
     # get_due_date_constraint method.
     def set_due_date(self, new_duedate):
-        """Defines the task's due date."""
+        """Defines the task's due date.
 
-        def __get_defined_parent_list(task):
-            """Recursively fetch a list of parents that have a defined due date
-               which is not fuzzy"""
-            parent_list = []
-            for par_id in task.parents:
-                par = self.req.get_task(par_id)
-                if par.get_due_date().is_fuzzy():
-                    parent_list += __get_defined_parent_list(par)
-                else:
-                    parent_list.append(par)
-            return parent_list
-
-        def __get_defined_child_list(task):
-            """Recursively fetch a list of children that have a defined
-               due date which is not fuzzy"""
-            child_list = []
-            for child_id in task.children:
-                child = self.req.get_task(child_id)
-                if child.get_due_date().is_fuzzy():
-                    child_list += __get_defined_child_list(child)
+        Constraints are propagated in a single pass over the ancestors and
+        descendants: every affected task is updated and synced only once.
+        """
+
+        def get_defined_relatives(task, relation):
+            """Fetch parents or children (relation) that have a defined due
+               date which is not fuzzy, looking through fuzzy ones"""
+            relatives = []
+            pending = deque(getattr(task, relation))
+            seen = set()
+            while pending:
+                tid = pending.popleft()
+                if tid in seen:
+                    continue
+                seen.add(tid)
+                relative = self.req.get_task(tid)
+                if relative.get_due_date().is_fuzzy():
+                    pending.extend(getattr(relative, relation))
                 else:
-                    child_list.append(child)
-            return child_list
-
-        old_due_date = self.due_date
-        new_duedate_obj = Date(new_duedate)  # caching the conversion
-        self.due_date = new_duedate_obj
-        # If the new date is fuzzy or undefined, we don't update related tasks
-        if not new_duedate_obj.is_fuzzy():
+                    relatives.append(relative)
+            return relatives
+
+        new_duedate_obj = Date.shared(new_duedate)  # caching the conversion
+        # Tasks whose due date is set to the new due date
+        worklist = deque([self])
+        queued = {self.tid}
+        # Tasks whose due date changed, their children must be synced too
+        # since the constraints might have changed
+        changed = []
+        # Tasks whose start date changed
+        started = []
+
+        while worklist:
+            task = worklist.popleft()
+            old_due_date = task.due_date
+            task.due_date = new_duedate_obj
+            if old_due_date != new_duedate_obj:
+                changed.append(task)
+
+            # If the new date is fuzzy or undefined, we don't update related
+            # tasks
+            if new_duedate_obj.is_fuzzy():
+                continue
+
             # if some ancestors' due dates happen before the task's new
             # due date, we update them (except for fuzzy dates)
-            for par in __get_defined_parent_list(self):
-                if par.get_due_date() < new_duedate_obj:
-                    par.set_due_date(new_duedate)
-            # we must apply the constraints to the defined & non-fuzzy children
-            # as well
-            for sub in __get_defined_child_list(self):
-                sub_duedate = sub.get_due_date()
+            for par in get_defined_relatives(task, 'parents'):
+                if par.tid not in queued and \
+                        par.get_due_date() < new_duedate_obj:
+                    queued.add(par.tid)
+                    worklist.append(par)
+
+            # we must apply the constraints to the defined & non-fuzzy
+            # children as well
+            for sub in get_defined_relatives(task, 'children'):
                 # if the child's due date happens later than the task's: we
                 # update it to the task's new due date
-                if sub_duedate > new_duedate_obj:
-                    sub.set_due_date(new_duedate)
+                if sub.tid not in queued and \
+                        sub.get_due_date() > new_duedate_obj:
+                    queued.add(sub.tid)
+                    worklist.append(sub)
                 # if the child's start date happens later than
                 # the task's new due date, we update it
                 # (except for fuzzy start dates)
                 sub_startdate = sub.get_start_date()
                 if not sub_startdate.is_fuzzy() and \
                         sub_startdate > new_duedate_obj:
-                    sub.set_start_date(new_duedate)
-        # If the date changed, we notify the change for the children since the
-        # constraints might have changed
-        if old_due_date != new_duedate_obj:
-            self.recursive_sync()
+                    sub.start_date = new_duedate_obj
+                    started.append(sub)
+
+        # Sync every modified task once
+        to_sync = deque(changed)
+        synced = set()
+        while to_sync:
+            task = to_sync.popleft()
+            if task.tid in synced:
+                continue
+            synced.add(task.tid)
+            task.sync()
+            to_sync.extend(self.req.get_task(sub_id)
+                           for sub_id in task.children)
+
+        for task in started:
+            if task.tid not in synced:
+                synced.add(task.tid)
+                task.sync()
 
     def get_due_date(self):
         """ Returns the due date, which always respects all constraints """
@@ -519,11 +589,7 @@ class Task(TreeNode):
         """
         Returns the most urgent due date among the task and its active subtasks
         """
-        urgent_date = self.get_due_date()
-        for subtask in self.get_subtasks():
-            if subtask.get_status() == self.STA_ACTIVE:
-                urgent_date = min(urgent_date, subtask.get_urgent_date())
-        return urgent_date
+        return self.req.get_subtree_aggregates().get_urgent_date(self)
 
     def get_due_date_constraint(self):
         """ Returns the most urgent due date constraint, following
@@ -560,7 +626,7 @@ class Task(TreeNode):
     # Start date is the date at which the user has decided to work or consider
     # working on this task.
     def set_start_date(self, fulldate):
-        self.start_date = Date(fulldate)
+        self.start_date = Date.shared(fulldate)
         self.sync()
 
     def get_start_date(self):
@@ -572,7 +638,7 @@ class Task(TreeNode):
     # dismissed). Closed date is not constrained and doesn't constrain other
     # dates.
     def set_closed_date(self, fulldate):
-        self.closed_date = Date(fulldate)
+        self.closed_date = Date.shared(fulldate)
         self.sync()
 
     def get_closed_date(self):
@@ -608,35 +674,37 @@ class Task(TreeNode):
         equivalent to get_text with with all XML stripped down.
         Warning: all markup informations are stripped down. Empty lines are
         also removed
-        """
-        # defensive programmation to avoid returning None
-        if self.content:
-            txt = self.content
-
-            # Prevent issues with & in content
-            txt = saxutils.escape(txt)
-            txt = txt.strip()
-
-            if strip_tags:
-                for tag in self.get_tags_name():
-                    txt = (txt.replace(f'@{tag}, ', '')
-                              .replace(f'@{tag},', '')
-                              .replace(f'@{tag}', ''))
-
-            if strip_subtasks:
-                txt = re.sub(r'\{\!.+\!\}', '', txt)
-
-            # Strip blank lines and get desired amount of lines
-            txt = [line for line in txt.splitlines() if line]
-            txt = txt[:lines]
-            txt = '\n'.join(txt)
 
-            # We keep the desired number of char
-            if char > 0:
-                txt = txt[:char]
-            return txt
-        else:
-            return ""
+        Excerpts are cached until the content or the tags change.
+        """
+        key = (lines, char, strip_tags, strip_subtasks)
+        excerpt = self._excerpts.get(key)
+        if excerpt is None:
+            excerpt = self._excerpts[key] = self._make_excerpt(*key)
+        return excerpt
+
+    def _make_excerpt(self, lines, char, strip_tags, strip_subtasks):
+        return make_excerpt(self.content, self.get_tags_name(), lines, char,
+                            strip_tags, strip_subtasks)
+
+    def get_search_text(self):
+        """ Return the lowercase excerpt used by the full text search """
+        if self._search_text is None:
+            self._search_text = make_search_text(self.content)
+        return self._search_text
+
+    def get_content_version(self):
+        return self.content_version
+
+    def get_version(self):
+        return self.version
+
+    def _content_changed(self):
+        """ Forget excerpts computed from the previous content or tags """
+        self.content_version += 1
+        self.version += 1
+        self._excerpts.clear()
+        self._search_text = None
 
     def __strip_content(self, element, strip_subtasks=False):
         txt = ""
@@ -655,6 +723,7 @@ class Task(TreeNode):
     def set_text(self, texte):
         self.can_be_deleted = False
         self.content = html.unescape(str(texte))
+        self._content_changed()
 
     # SUBTASKS ###############################################################
     def new_subtask(self):
@@ -754,6 +823,7 @@ class Task(TreeNode):
         Updates the modified timestamp
         """
         self.last_modified = datetime.now()
+        self.version += 1
 
 # TAG FUNCTIONS ##############################################################
     def get_tags_name(self):
@@ -774,6 +844,7 @@ class Task(TreeNode):
         eold = saxutils.escape(saxutils.unescape(old))
         enew = saxutils.escape(saxutils.unescape(new))
         self.content = self.content.replace(eold, enew)
+        self._content_changed()
         oldt = self.req.get_tag(old)
         self.remove_tag(old)
         oldt.modified()
@@ -794,7 +865,8 @@ class Task(TreeNode):
         Adds a tag. Does not add '@tag' to the contents. See add_tag
         """
         if tagname not in self.tags:
-            self.tags.append(tagname)
+            self.tags += (sys.intern(tagname),)
+            self._content_changed()
             if self.is_loaded():
                 for child in self.get_subtasks():
                     if child.can_be_deleted:
@@ -825,6 +897,7 @@ class Task(TreeNode):
                 sep = '\n\n'
 
             self.content = f'{tagname}{sep}{c}'
+            self._content_changed()
             # we modify the task internal state, thus we have to call for a
             # sync
 
@@ -834,17 +907,18 @@ class Task(TreeNode):
     def remove_tag(self, tagname):
         modified = False
         if tagname in self.tags:
-            self.tags.remove(tagname)
+            self.tags = tuple(t for t in self.tags if t != tagname)
             modified = True
             for child in self.get_subtasks():
                 if child.can_be_deleted:
                     child.remove_tag(tagname)
         self.content = self._strip_tag(self.content, tagname)
+        self._content_changed()
         if modified:
-            tag = self.req.get_tag(tagname)
-            # The ViewCount of the tag still doesn't know that
+            # Counters of the tag still don't know that
             # the task was removed. We need to update manually
-            tag.update_task(self.get_id())
+            self.req.get_tag_counters().update(self.get_id())
+            tag = self.req.get_tag(tagname)
             if tag:
                 tag.modified()
 
@@ -868,31 +942,19 @@ class Task(TreeNode):
     # tag_list is a list of tags names
     # return true if at least one of the list is in the task
     def has_tags(self, tag_list=None, notag_only=False):
-        # recursive function to explore the tags and its children
-        def children_tag(tagname):
-            toreturn = False
-            if tagname in self.tags:
-                toreturn = True
-            else:
-                tag = self.req.get_tag(tagname)
-                if tag:
-                    for tagc_name in tag.get_children():
-                        if not toreturn:
-                            toreturn = children_tag(tagc_name)
-            return toreturn
-
         # We want to see if the task has no tags
         toreturn = False
         if notag_only:
-            toreturn = self.tags == []
+            toreturn = not self.tags
         # Here, the user ask for the "empty" tag
         # And virtually every task has it.
         elif tag_list == [] or tag_list is None:
             toreturn = True
         elif tag_list:
-            for tagname in tag_list:
-                if not toreturn:
-                    toreturn = children_tag(tagname)
+            # A tag is also found through its subtags
+            effective = self.req.get_tag_closure().get_effective_tags(
+                self.tags)
+            toreturn = any(tagname in effective for tagname in tag_list)
         else:
             # Well, if we don't filter on tags or notag, it's true, of course
             toreturn = True
@@ -24,6 +24,8 @@ import logging
 
 from gi.repository import GObject, GLib, Gio
 
+from GTG.core.clock import clock
+
 log = logging.getLogger(__name__)
 
 
@@ -82,6 +84,8 @@ class Timer(GObject.GObject):
     def emit_refresh(self):
         """Emit Signal for workview to refresh"""
 
+        # The day could have changed, e.g. while suspended
+        clock.invalidate()
         self.emit("refresh")
         self.time_changed()
         return False
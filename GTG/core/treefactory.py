@@ -16,12 +16,10 @@
 # this program.  If not, see <http://www.gnu.org/licenses/>.
 # -----------------------------------------------------------------------------
 
-from datetime import datetime
-
-from GTG.core.search import search_filter
 from GTG.core import tag
 from GTG.core.task import Task
 from gettext import gettext as _
+from GTG.core.clock import clock
 from GTG.core.dates import Date
 from liblarch import Tree
 
@@ -39,6 +37,13 @@ class TreeFactory():
         For tags, filter are dynamically created at Tag insertion.
         """
         tasktree = Tree()
+        for name, (func, param) in self.get_task_filters().items():
+            tasktree.add_filter(name, func, param)
+        self.tasktree = tasktree
+        return tasktree
+
+    def get_task_filters(self):
+        """Return default task filters as {name: (function, parameters)}"""
         f_dic = {
             'workview': [self.workview],
             'active': [self.active],
@@ -53,15 +58,15 @@ class TreeFactory():
             'no_disabled_tag': [self.no_disabled_tag],
         }
 
+        filters = {}
         for f in f_dic:
             filt = f_dic[f]
             if len(filt) > 1:
                 param = filt[1]
             else:
                 param = None
-            tasktree.add_filter(f, filt[0], param)
-        self.tasktree = tasktree
-        return tasktree
+            filters[f] = (filt[0], param)
+        return filters
 
     def get_tags_tree(self, req):
         """This create a liblarch tree suitable for tags,
@@ -80,6 +85,7 @@ class TreeFactory():
         p = {}
         self.tasktree.add_filter(tag.ALLTASKS_TAG,
                                  self.alltag, parameters=p)
+        req.get_filter_bitmaps().add_filter(tag.ALLTASKS_TAG, self.alltag, p)
         # Build the "without tag tag"
         notag_tag = tag.Tag(tag.NOTAG_TAG, req=req)
         notag_tag.set_attribute("special", "notag")
@@ -91,6 +97,7 @@ class TreeFactory():
         p = {}
         self.tasktree.add_filter(tag.NOTAG_TAG,
                                  self.notag, parameters=p)
+        req.get_filter_bitmaps().add_filter(tag.NOTAG_TAG, self.notag, p)
 
         # Build the search tag
         search_tag = tag.Tag(tag.SEARCH_TAG, req=req)
@@ -101,7 +108,9 @@ class TreeFactory():
         tagtree.add_node(search_tag)
         p = {}
         self.tasktree.add_filter(tag.SEARCH_TAG,
-                                 search_filter, parameters=p)
+                                 req.get_live_search().filter, parameters=p)
+        req.get_filter_bitmaps().add_filter(tag.SEARCH_TAG,
+                                            req.get_live_search().filter, p)
 
         # Build the separator
         sep_tag = tag.Tag(tag.SEP_TAG, req=req)
@@ -154,16 +163,7 @@ class TreeFactory():
 
     def is_workable(self, task, parameters=None):
         """ Filter of tasks that can be worked """
-        tree = task.get_tree()
-        for child_id in task.get_children():
-            if not tree.has_node(child_id):
-                continue
-
-            child = tree.get_node(child_id)
-            if child.get_status() == Task.STA_ACTIVE:
-                return False
-
-        return True
+        return task.req.get_subtree_aggregates().is_workable(task)
 
     def is_started(self, task, parameters=None):
         """ Filter for tasks that are already started """
@@ -174,16 +174,17 @@ class TreeFactory():
             return True
         elif days_left == 0:
             # Don't count today's tasks started until morning
-            return datetime.now().hour > 4
+            return clock.has_passed(5)
         else:
             return days_left < 0
 
     def workview(self, task, parameters=None):
+        # Cheapest tests first, the active children are counted in advance
         wv = self.active(task) and \
-            self.is_started(task) and \
             self.is_workable(task) and \
+            task.get_due_date() != Date.someday() and \
             self.no_disabled_tag(task) and \
-            task.get_due_date() != Date.someday()
+            self.is_started(task)
         return wv
 
     def workdue(self, task):
@@ -219,8 +220,5 @@ class TreeFactory():
 
     def no_disabled_tag(self, task, parameters=None):
         """Filter of task that don't have any disabled/nonactionable tag"""
-        toreturn = True
-        for t in task.get_tags():
-            if t.get_attribute("nonactionable") == "True":
-                toreturn = False
-        return toreturn
+        nonactionable = task.req.get_tag_closure().get_nonactionable_tags()
+        return nonactionable.isdisjoint(task.get_tags_name())
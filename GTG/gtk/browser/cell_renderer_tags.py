@@ -16,6 +16,8 @@
 # this program.  If not, see <http://www.gnu.org/licenses/>.
 # -----------------------------------------------------------------------------
 
+from collections import OrderedDict
+
 from gi.repository import GObject, GLib, Gtk, Gdk
 from gi.repository import Pango
 import gi
@@ -34,6 +36,9 @@ class CellRendererTags(Gtk.CellRenderer):
         'system-search-symbolic',
     )
 
+    # Rows with the same tags share a surface, see __get_surface()
+    SURFACE_CACHE_SIZE = 256
+
     __gproperties__ = {
         'tag_list': (GObject.TYPE_PYOBJECT,
                      "Tag list", "A list of tags", GObject.ParamFlags.READWRITE),
@@ -107,6 +112,15 @@ class CellRendererTags(Gtk.CellRenderer):
         self.PADDING = 1
         self.config = config
         self._ignore_icon_error_for = set()
+        # (pills, scale factor, dark mode) -> (surface, x, y), least
+        # recently used first
+        self._surfaces = OrderedDict()
+        self._widgets = set()
+        Gtk.IconTheme.get_default().connect('changed',
+                                            self.__on_theme_changed)
+        # Context to measure the layouts of emoji icons
+        self._measure_context = cairo.Context(
+            cairo.ImageSurface(cairo.FORMAT_ARGB32, 1, 1))
 
     def do_set_property(self, pspec, value):
         if pspec.name == "tag-list":
@@ -123,27 +137,13 @@ class CellRendererTags(Gtk.CellRenderer):
     def do_render(self, cr, widget, background_area, cell_area, flags):
 
         vw_tags = self.__count_viewable_tags()
-        count = 0
 
-        # Select source
-        if self.tag_list is not None:
-            tags = self.tag_list
-        elif self.tag is not None:
-            tags = [self.tag]
-        else:
+        pills = self.__get_pills()
+        if not pills:
             return
 
-        if self.config.get('dark_mode'):
-            symbolic_color = Gdk.RGBA(0.9, 0.9, 0.9, 1)
-        else:
-            symbolic_color = Gdk.RGBA(0, 0, 0, 1)
-
-        # Drawing context
-        gdkcontext = cr
         scale_factor = widget.get_scale_factor()
-        # Don't blur border on lodpi
-        if scale_factor == 1:
-            gdkcontext.set_antialias(cairo.ANTIALIAS_NONE)
+        self.__watch_widget(widget)
 
         # Coordinates of the origin point
         x_align = self.get_property("xalign")
@@ -154,12 +154,105 @@ class CellRendererTags(Gtk.CellRenderer):
         orig_y = cell_area.y + int(
             (cell_area.height - 16) * y_align)
 
-        # We draw the icons & squares
-        for my_tag in tags:
+        surface, x, y = self.__get_surface(
+            widget, pills, scale_factor, bool(self.config.get('dark_mode')))
+        cr.set_source_surface(surface, orig_x + x, orig_y + y)
+        cr.paint()
+
+    def __get_pills(self):
+        """ Return (icon, color) of the tags to draw """
+        if self.tag_list is not None:
+            tags = self.tag_list
+        elif self.tag is not None:
+            tags = [self.tag]
+        else:
+            return ()
 
+        pills = []
+        for my_tag in tags:
             my_tag_icon = my_tag.get_attribute("icon")
             my_tag_color = my_tag.get_attribute("color")
+            if my_tag_icon or my_tag_color:
+                pills.append((my_tag_icon, my_tag_color))
+
+        if self.tag is not None and not pills:
+            # A tag without icon or color gets a grey pill in the sidebar
+            pills.append((None, None))
+        return tuple(pills)
 
+    def __watch_widget(self, widget):
+        """ Empty the surface cache when the theme of widget changes """
+        if widget in self._widgets:
+            return
+        self._widgets.add(widget)
+        widget.connect('style-updated', self.__on_theme_changed)
+        widget.connect('screen-changed', self.__on_theme_changed)
+        widget.connect('destroy', self._widgets.discard)
+
+    def __on_theme_changed(self, *args):
+        self._surfaces.clear()
+
+    def __get_extents(self, pills):
+        """ Return (x, y, width, height) of the area drawn by the pills,
+        relative to the origin of the first one """
+        # Pills and their outer line
+        left, top = -1, -1
+        right = 16 * len(pills) + self.PADDING * 2 * (len(pills) - 1) + 1
+        bottom = 17
+
+        # Emoji icons can be larger than a pill
+        for count, (my_tag_icon, my_tag_color) in enumerate(pills):
+            if not my_tag_icon or my_tag_icon in self.SYMBOLIC_ICONS:
+                continue
+            layout = PangoCairo.create_layout(self._measure_context)
+            layout.set_markup(my_tag_icon, -1)
+            ink, logical = layout.get_pixel_extents()
+            x = self.PADDING * 2 * count + 16 * count - 2 + ink.x
+            y = -1 + ink.y
+            left, top = min(left, x - 1), min(top, y - 1)
+            right = max(right, x + ink.width + 1)
+            bottom = max(bottom, y + ink.height + 1)
+
+        return left, top, right - left, bottom - top
+
+    def __get_surface(self, widget, pills, scale_factor, dark_mode):
+        """ Return the surface with the pills drawn and its position
+        relative to the origin, from the cache if possible
+
+        The key holds everything the drawing depends on, so a tag with a
+        new color or icon simply misses the cache. """
+        key = (pills, scale_factor, dark_mode)
+        cached = self._surfaces.get(key)
+        if cached is not None:
+            self._surfaces.move_to_end(key)
+            return cached
+
+        x, y, width, height = self.__get_extents(pills)
+        surface = widget.get_window().create_similar_image_surface(
+            cairo.FORMAT_ARGB32, width * scale_factor, height * scale_factor,
+            scale_factor)
+        context = cairo.Context(surface)
+        self.__draw_pills(context, widget, pills, -x, -y, scale_factor,
+                          dark_mode)
+
+        cached = self._surfaces[key] = (surface, x, y)
+        if len(self._surfaces) > self.SURFACE_CACHE_SIZE:
+            self._surfaces.popitem(last=False)
+        return cached
+
+    def __draw_pills(self, gdkcontext, widget, pills, orig_x, orig_y,
+                     scale_factor, dark_mode):
+        """ Draw the icons & squares of the tags """
+        if dark_mode:
+            symbolic_color = Gdk.RGBA(0.9, 0.9, 0.9, 1)
+        else:
+            symbolic_color = Gdk.RGBA(0, 0, 0, 1)
+
+        # Don't blur border on lodpi
+        if scale_factor == 1:
+            gdkcontext.set_antialias(cairo.ANTIALIAS_NONE)
+
+        for count, (my_tag_icon, my_tag_color) in enumerate(pills):
             rect_x = orig_x + self.PADDING * 2 * count + 16 * count
             rect_y = orig_y
 
@@ -176,43 +269,21 @@ class CellRendererTags(Gtk.CellRenderer):
                         widget.get_style_context(), gdkcontext, surface,
                         rect_x, rect_y)
 
-                    count += 1
-
                 else:
-                    layout = PangoCairo.create_layout(cr)
+                    layout = PangoCairo.create_layout(gdkcontext)
                     layout.set_markup(my_tag_icon, -1)
-                    cr.move_to(rect_x - 2, rect_y - 1)
-                    PangoCairo.show_layout(cr, layout)
-                    count += 1
-
-            elif my_tag_color:
+                    gdkcontext.move_to(rect_x - 2, rect_y - 1)
+                    PangoCairo.show_layout(gdkcontext, layout)
 
+            else:
                 # Draw rounded rectangle
-                my_color = Gdk.RGBA()
-                my_color.parse(my_tag_color)
+                my_color = Gdk.RGBA(0.95, 0.95, 0.95, 1)
+                if my_tag_color:
+                    my_color.parse(my_tag_color)
                 Gdk.cairo_set_source_rgba(gdkcontext, my_color)
 
                 self.__roundedrec(gdkcontext, rect_x, rect_y, 16, 16, 8)
                 gdkcontext.fill()
-                count += 1
-
-                # Outer line
-                Gdk.cairo_set_source_rgba(gdkcontext, Gdk.RGBA(0, 0, 0, 0.20))
-                gdkcontext.set_line_width(1.0)
-                self.__roundedrec(gdkcontext, rect_x, rect_y, 16, 16, 8)
-                gdkcontext.stroke()
-
-        if self.tag and my_tag:
-
-            my_tag_icon = my_tag.get_attribute("icon")
-            my_tag_color = my_tag.get_attribute("color")
-
-            if not my_tag_icon and not my_tag_color:
-                # Draw rounded rectangle
-                Gdk.cairo_set_source_rgba(gdkcontext,
-                                          Gdk.RGBA(0.95, 0.95, 0.95, 1))
-                self.__roundedrec(gdkcontext, rect_x, rect_y, 16, 16, 8)
-                gdkcontext.fill()
 
                 # Outer line
                 Gdk.cairo_set_source_rgba(gdkcontext, Gdk.RGBA(0, 0, 0, 0.20))
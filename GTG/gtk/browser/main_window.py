@@ -27,7 +27,7 @@ from gi.repository import GObject, Gtk, Gdk, Gio, GLib
 from GTG.core import info
 from GTG.backends.backend_signals import BackendSignals
 from GTG.core.dirs import ICONS_DIR
-from GTG.core.search import parse_search_query, InvalidQuery
+from GTG.core.search import InvalidQuery
 from GTG.core.tag import SEARCH_TAG
 from GTG.core.task import Task
 from gettext import gettext as _
@@ -72,12 +72,16 @@ class MainWindow(Gtk.ApplicationWindow):
         self.config = self.req.get_config('browser')
         self.tag_active = False
 
-        # Timeout handler for search
+        # Idle handler for search
         self.search_timeout = None
+        # Search evaluated in the background (GTG.core.live_search.SearchJob)
+        self.search_job = None
 
         # Treeviews handlers
         self.vtree_panes = {}
         self.tv_factory = TreeviewFactory(self.req, self.config)
+        # Background color function of the panes, see set_bg_color_func()
+        self.bg_color_func = self.tv_factory.get_task_bg_color
 
         # Active Tasks
         self.activetree = self.req.get_tasks_tree(name='active', refresh=False)
@@ -90,11 +94,9 @@ class MainWindow(Gtk.ApplicationWindow):
         self.vtree_panes['workview'] = \
             self.tv_factory.active_tasks_treeview(self.workview_tree)
 
-        # Closed Tasks
-        self.closedtree = \
-            self.req.get_tasks_tree(name='closed', refresh=False)
-        self.vtree_panes['closed'] = \
-            self.tv_factory.closed_tasks_treeview(self.closedtree)
+        # Closed Tasks are only loaded when their pane is shown, see
+        # _init_closed_pane()
+        self.closedtree = None
 
         # YOU CAN DEFINE YOUR INTERNAL MECHANICS VARIABLES BELOW
         # Setup GTG icon theme
@@ -267,7 +269,6 @@ class MainWindow(Gtk.ApplicationWindow):
         # Tasks treeviews
         self.open_pane.add(self.vtree_panes['active'])
         self.actionable_pane.add(self.vtree_panes['workview'])
-        self.closed_pane.add(self.vtree_panes['closed'])
 
         tag_completion = TagCompletion(self.req.get_tag_tree())
         self.modifytags_dialog = ModifyTagsDialog(tag_completion, self.req)
@@ -415,16 +416,6 @@ class MainWindow(Gtk.ApplicationWindow):
         self.vtree_panes['workview'].connect('node-collapsed', self.on_task_collapsed)
         self.vtree_panes['workview'].set_col_visible('startdate', False)
 
-        # Closed tasks Treeview
-        self.vtree_panes['closed'].connect('row-activated', self.on_edit_done_task)
-        # I did not want to break the variable and there was no other
-        # option except this name:(Nimit)
-        clsd_tsk_btn_prs = self.on_closed_task_treeview_button_press_event
-        self.vtree_panes['closed'].connect('button-press-event', clsd_tsk_btn_prs)
-        clsd_tsk_key_prs = self.on_closed_task_treeview_key_press_event
-        self.vtree_panes['closed'].connect('key-press-event', clsd_tsk_key_prs)
-        self.vtree_panes['closed'].connect('cursor-changed', self.on_cursor_changed)
-
         b_signals = BackendSignals()
         b_signals.connect(b_signals.BACKEND_FAILED, self.on_backend_failed)
         b_signals.connect(b_signals.BACKEND_STATE_TOGGLED, self.remove_backend_infobar)
@@ -444,41 +435,79 @@ class MainWindow(Gtk.ApplicationWindow):
             self.search_button.set_active(False)
             self.searchbar.set_search_mode(False)
             self.search_entry.set_text('')
-            self.get_selected_tree().unapply_filter(SEARCH_TAG)
+            self._cancel_search_job()
+            self.reapply_filter()
         else:
             self.search_button.set_active(True)
             self.searchbar.set_search_mode(True)
             self.search_entry.grab_focus()
 
-    def _try_filter_by_query(self, query, refresh: bool = True):
+    def _get_search_parameters(self):
+        """Return parameters of the search filter or None without search."""
+
+        if self.search_job is not None:
+            # Partial results of the running search
+            return self.search_job.parameters
+
+        query = self.search_entry.get_text()
+        if not query:
+            return None
+
         log.debug("Searching for %r", query)
-        vtree = self.get_selected_tree()
         try:
-            vtree.apply_filter(SEARCH_TAG, parse_search_query(query),
-                               refresh=refresh)
+            return self.req.get_live_search().search(query)
         except InvalidQuery as error:
             log.debug("Invalid query %r: %r", query, error)
-            vtree.unapply_filter(SEARCH_TAG)
+            return None
+
+    def _cancel_search_job(self):
+        if self.search_job:
+            self.search_job.cancel()
+            self.search_job = None
+
+    def _on_search_progress(self, job):
+        """Show (partial) results of the background search."""
+
+        if job.done:
+            self.search_job = None
+        self.reapply_filter()
 
 
     def do_search(self):
-        """Perform the actual search and cancel the timeout."""
+        """Start evaluating the query in the background.
+
+        Tasks are tested in time slices on idle, so that typing is never
+        blocked, even with a huge amount of tasks.
+        """
 
-        self._try_filter_by_query(self.search_entry.get_text())
-        GLib.source_remove(self.search_timeout)
         self.search_timeout = None
+        self._cancel_search_job()
 
+        query = self.search_entry.get_text()
+        log.debug("Searching for %r", query)
+        try:
+            job = self.req.get_live_search().start_search(
+                query, self._on_search_progress)
+        except InvalidQuery as error:
+            log.debug("Invalid query %r: %r", query, error)
+            self.reapply_filter()
+            return False
 
-    def on_search(self, data):
-        """Callback everytime a character is inserted in the search field."""
+        self.search_job = job
+        GLib.idle_add(job.step)
+        return False
 
-        TIMEOUT = 500
 
-        if self.search_timeout:
-            GLib.source_remove(self.search_timeout)
-            self.search_timeout = None
+    def on_search(self, data):
+        """Callback everytime a character is inserted in the search field.
+
+        There is no need to wait for the user to stop typing: a longer query
+        only refines the results of the previous one. Characters typed
+        before GTK gets idle are searched at once.
+        """
 
-        self.search_timeout = GLib.timeout_add(TIMEOUT, self.do_search)
+        if not self.search_timeout:
+            self.search_timeout = GLib.idle_add(self.do_search)
 
 
     def on_save_search(self, action, param):
@@ -538,6 +567,47 @@ class MainWindow(Gtk.ApplicationWindow):
             except IndexError:
                 print(f"Invalid liblarch path {path}")
 
+    def _init_closed_pane(self):
+        """ Build the treeview of closed tasks the first time it is shown
+
+        There are usually far more closed tasks than open ones, they are
+        not filtered nor rendered until the user looks at them. """
+        if self.closedtree is not None:
+            return
+
+        self.closedtree = \
+            self.req.get_tasks_tree(name='closed', refresh=False)
+        self.vtree_panes['closed'] = \
+            self.tv_factory.closed_tasks_treeview(self.closedtree)
+        self.vtree_panes['closed'].set_bg_color(self.bg_color_func, 'bg_color')
+        self.closed_pane.add(self.vtree_panes['closed'])
+
+        # Closed tasks Treeview
+        self.vtree_panes['closed'].connect('row-activated', self.on_edit_done_task)
+        # I did not want to break the variable and there was no other
+        # option except this name:(Nimit)
+        clsd_tsk_btn_prs = self.on_closed_task_treeview_button_press_event
+        self.vtree_panes['closed'].connect('button-press-event', clsd_tsk_btn_prs)
+        clsd_tsk_key_prs = self.on_closed_task_treeview_key_press_event
+        self.vtree_panes['closed'].connect('key-press-event', clsd_tsk_key_prs)
+        self.vtree_panes['closed'].connect('cursor-changed', self.on_cursor_changed)
+        self.vtree_panes['closed'].show()
+
+    def set_bg_color_func(self, func=None):
+        """ Set the function giving the background color of tasks in all
+        the panes, including the ones created later
+
+        @param func: function(node, default_color), the color of tags
+            when None
+        """
+        if func is None:
+            func = self.tv_factory.get_task_bg_color
+        self.bg_color_func = func
+
+        for pane in self.vtree_panes.values():
+            pane.set_bg_color(func, 'bg_color')
+            pane.basetree.get_basetree().refresh_all()
+
     def restore_state_from_conf(self):
         # Extract state from configuration dictionary
         # if "browser" not in self.config:
@@ -584,6 +654,8 @@ class MainWindow(Gtk.ApplicationWindow):
 
         view_name = PANE_STACK_NAMES_MAP_INVERTED.get(self.config.get('view'),
                                                       PANE_STACK_NAMES_MAP_INVERTED['active'])
+        if PANE_STACK_NAMES_MAP[view_name] == 'closed':
+            self._init_closed_pane()
         self.stack_switcher.get_stack().set_visible_child_name(view_name)
 
         def open_task(req, t):
@@ -598,13 +670,27 @@ class MainWindow(Gtk.ApplicationWindow):
             GLib.idle_add(open_task, self.req, t)
 
     def refresh_all_views(self, timer):
-        collapsed = self.config.get("collapsed_tasks")
-
-        for pane in 'active', 'workview', 'closed':
-            self.req.get_tasks_tree(pane, False).reset_filters(refresh=False)
-        self.reapply_filter()
-
-        self.restore_collapsed_tasks(collapsed)
+        # A new day began, searches like !today have to be updated
+        bitmaps = self.req.get_filter_bitmaps()
+        date_relative = self.req.refresh_saved_searches()
+        for name in date_relative:
+            bitmaps.invalidate(name)
+        self.req.get_live_search().clear()
+        bitmaps.invalidate(SEARCH_TAG)
+
+        # Other filters only change for tasks whose start or due date was
+        # crossed, they are signaled as modified
+        self.req.get_date_boundaries().refresh()
+
+        selected = self.get_selected_tags()
+        if self._get_search_parameters() is not None or \
+                any(name in selected for name in date_relative):
+            collapsed = self.config.get("collapsed_tasks")
+            self.reapply_filter()
+            self.restore_collapsed_tasks(collapsed)
+
+        # Relative dates and colors of the visible rows
+        self.vtree_panes[self.get_selected_pane()].queue_draw()
 
     def find_value_in_treestore(self, store, treeiter, value):
         """Search for value in tree store recursively."""
@@ -1338,25 +1424,23 @@ class MainWindow(Gtk.ApplicationWindow):
         filters = self.get_selected_tags()
         filters.append(current_pane)
         vtree = self.req.get_tasks_tree(name=current_pane, refresh=False)
+        bitmaps = self.req.get_filter_bitmaps()
+
         # Re-applying search if some search is specified
-        search = self.search_entry.get_text()
-        if search:
+        search_parameters = self._get_search_parameters()
+        bitmaps.set_parameters(SEARCH_TAG, search_parameters)
+        if search_parameters is not None:
             filters.append(SEARCH_TAG)
-        # only resetting filters if the applied filters are different from
-        # current ones, leaving a chance for liblarch to make the good call on
-        # whether to refilter or not
-        if sorted(filters) != sorted(vtree.list_applied_filters()):
-            vtree.reset_filters(refresh=False)
-        # Browsing and applying filters. For performance optimization, only
-        # allowing liblarch to trigger a refresh on last item. This way the
-        # refresh is never triggered more than once and we let the possibility
-        # to liblarch not to trigger refresh is filters did not change.
-        for filter_name in filters:
-            is_last = filter_name == filters[-1]
-            if filter_name == SEARCH_TAG:
-                self._try_filter_by_query(search, refresh=is_last)
-            else:
-                vtree.apply_filter(filter_name, refresh=is_last)
+
+        # Filters are combined with bitmaps, so the view only has to check
+        # a single filter for every task
+        view_filter = bitmaps.get_view_filter(current_pane)
+        parameters = {
+            'filters': tuple(filters),
+            'flat': bitmaps.is_flat(filters),
+        }
+        vtree.reset_filters(refresh=False)
+        vtree.apply_filter(view_filter, parameters)
 
     def on_select_tag(self, widget=None, row=None, col=None):
         """ Callback for tag(s) selection from left sidebar.
@@ -1377,6 +1461,8 @@ class MainWindow(Gtk.ApplicationWindow):
         No reset of filters, allows trigger refresh on last tag filtering.
         """
         current_pane = self.get_selected_pane()
+        if current_pane == 'closed':
+            self._init_closed_pane()
         self.config.set('view', current_pane)
         self.reapply_filter(current_pane)
 
@@ -0,0 +1,81 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) 2008-2013 - Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""
+Cache of the values displayed in the rows of the task browser.
+
+GTK calls the column functions of TreeviewFactory every time a row is
+drawn, e.g. for every row when scrolling. The finished markup and colors are
+kept for every task and column with the key they were computed with (the
+version of the task and the values the column depends on). The cache is
+emptied when the context of all rows (today, the configuration) changes,
+and the values of a task are dropped when it is deleted.
+"""
+
+import logging
+
+log = logging.getLogger(__name__)
+
+
+class RenderCache():
+    """ Rendered values by task and column """
+
+    def __init__(self):
+        # task id -> {column: (key, value)}
+        self._values = {}
+        self._context = None
+        self.hits = 0
+        self.misses = 0
+
+    def set_context(self, context):
+        """ Forget all values if context changed since the last call """
+        if context != self._context:
+            if self._values:
+                log.debug("Render cache cleared, hit rate %.1f%%",
+                          self.get_hit_rate() * 100)
+            self._values.clear()
+            self._context = context
+
+    def get(self, tid, column, key, func, *args):
+        """ Return the value for the task and column
+
+        If the value was not computed with the same key, it is computed
+        again with func(*args). """
+        columns = self._values.get(tid)
+        if columns is None:
+            columns = self._values[tid] = {}
+        cached = columns.get(column)
+        if cached is not None and cached[0] == key:
+            self.hits += 1
+            return cached[1]
+
+        self.misses += 1
+        value = func(*args)
+        columns[column] = (key, value)
+        return value
+
+    def forget(self, tid):
+        """ Drop the values of a deleted task """
+        self._values.pop(tid, None)
+
+    def get_hit_rate(self):
+        """ Return the ratio of values found in the cache """
+        total = self.hits + self.misses
+        if total == 0:
+            return 0.0
+        return self.hits / total
@@ -16,29 +16,56 @@
 # this program.  If not, see <http://www.gnu.org/licenses/>.
 # -----------------------------------------------------------------------------
 
+from collections import namedtuple
 import locale
-from datetime import datetime
 import xml.sax.saxutils as saxutils
 
 from gi.repository import GObject, Gtk, Pango
 
-from GTG.core.search import parse_search_query, search_filter
-from GTG.core.tag import SEARCH_TAG
 from GTG.core.task import Task
 from gettext import gettext as _
 from GTG.gtk import colors
 from GTG.gtk.browser.cell_renderer_tags import CellRendererTags
+from GTG.core.clock import clock
 from GTG.core.dates import Date
+from GTG.gtk.browser.render_cache import RenderCache
 from liblarch_gtk import TreeView
 
 
+# Values compared when sorting tasks
+SortKey = namedtuple('SortKey',
+                     'title tags collated_title closed_day due_day')
+
+
 class TreeviewFactory():
 
     def __init__(self, requester, config):
         self.req = requester
         self.mainview = self.req.get_tasks_tree()
+        self.aggregates = self.req.get_subtree_aggregates()
+        self.saved_searches = self.req.get_saved_searches()
+        self.tag_closure = self.req.get_tag_closure()
         self.config = config
 
+        # task id -> ((content version, saved searches), sorted tags)
+        self._tags_cache = {}
+        # generation of the tag closure when the cache was filled, tags
+        # added or deleted since then may change the Tag objects
+        self._tags_generation = None
+
+        # Markup and colors of task rows, see _render()
+        self.render_cache = RenderCache()
+        self._config_generation = None
+        self._bg_color_enabled = False
+        self._preview_enabled = False
+
+        # task id -> ((version, day), SortKey)
+        self._sort_keys = {}
+        # tag name -> locale.strxfrm(name)
+        self._collated_names = {}
+        self.req.get_main_view().register_cllbck('node-deleted',
+                                                 self._on_task_deleted)
+
         # Initial unactive color
         # This is a crude hack. As we don't have a reference to the
         # treeview to retrieve the style, we save that color when we
@@ -51,47 +78,83 @@ class TreeviewFactory():
         # Cache tags treeview for on_rename_tag callback
         self.tags_view = None
 
+    def _on_task_deleted(self, tid, path=None):
+        """ Forget what was cached for a deleted task """
+        self.render_cache.forget(tid)
+        self._tags_cache.pop(tid, None)
+        self._sort_keys.pop(tid, None)
+
     #############################
     # Functions for tasks columns
     ################################
     def _has_hidden_subtask(self, task):
         # not recursive
         display_count = self.mainview.node_n_children(task.get_id())
-        real_count = 0
-        if task.has_child():
-            for tid in task.get_children():
-                sub_task = self.req.get_task(tid)
-                if sub_task and sub_task.get_status() == Task.STA_ACTIVE:
-                    real_count = real_count + 1
+        real_count = self.aggregates.get_active_children_count(task)
         return display_count < real_count
 
+    def _check_render_context(self):
+        """ Empty the render cache when the day or the config changed """
+        generation = self.config.generation
+        if generation != self._config_generation:
+            self._config_generation = generation
+            self._bg_color_enabled = self.config.get('bg_color_enable')
+            self._preview_enabled = self.config.get('contents_preview_enable')
+        self.render_cache.set_context(
+            (clock.today_ordinal(), generation, self.unactive_color))
+
+    def _render(self, column, node, func, *args):
+        """ Return func(node, *args) from the render cache
+
+        The value is computed again when the task was modified or args
+        changed. """
+        self._check_render_context()
+        return self.render_cache.get(
+            node.get_id(), column, (node.get_version(),) + args,
+            func, node, *args)
+
     def get_task_bg_color(self, node, default_color):
-        if self.config.get('bg_color_enable'):
-            return colors.background_color(node.get_tags(), default_color)
-        else:
+        self._check_render_context()
+        if not self._bg_color_enabled:
             return None
 
-    def get_task_tags_column_contents(self, node):
-        """Returns an ordered list of tags of a task"""
+        # Colors of tags are not part of the version of the task
         tags = node.get_tags()
+        key = (default_color, [tag.get_attribute('color') for tag in tags])
+        return self.render_cache.get(
+            node.get_id(), 'bg_color', key,
+            colors.background_color, tags, default_color)
 
-        search_parent = self.req.get_tag(SEARCH_TAG)
-        for search_tag in search_parent.get_children():
-            tag = self.req.get_tag(search_tag)
-            match = search_filter(
-                node,
-                parse_search_query(tag.get_attribute('query')),
-            )
-            if match and search_tag not in tags:
-                tags.append(tag)
-
-        tags.sort(key=lambda x: x.get_name())
-        return tags
+    def get_task_tags_column_contents(self, node):
+        """Returns an ordered list of tags of a task"""
+        if self._tags_generation != self.tag_closure.generation:
+            self._tags_cache.clear()
+            self._tags_generation = self.tag_closure.generation
+
+        tid = node.get_id()
+        searches = self.saved_searches.get_searches_for_task(tid)
+        key = (node.get_content_version(), searches)
+        cached = self._tags_cache.get(tid)
+        if cached is None or cached[0] != key:
+            tags = node.get_tags()
+            for name in searches:
+                tag = self.req.get_tag(name)
+                if tag is not None:
+                    tags.append(tag)
+            tags.sort(key=lambda x: x.get_name())
+            cached = self._tags_cache[tid] = (key, tags)
+        return list(cached[1])
 
     def get_task_title_column_string(self, node):
         return saxutils.escape(node.get_title())
 
     def get_task_label_column_string(self, node):
+        # Rows of parents change with their subtasks
+        count = self.aggregates.get_active_descendants_count(node)
+        return self._render('label', node, self._get_task_label,
+                            count, self._has_hidden_subtask(node))
+
+    def _get_task_label(self, node, count, has_hidden_subtask):
         str_format = "%s"
 
         # We add the indicator when task is repeating
@@ -104,18 +167,17 @@ class TreeviewFactory():
             days_left = node.get_days_left()
             if days_left is not None and days_left <= 0:
                 str_format = f"<b>{str_format}</b>"
-            if self._has_hidden_subtask(node):
+            if has_hidden_subtask:
                 str_format = f"<span color='{self.unactive_color}'>{str_format}</span>"
 
         title = str_format % saxutils.escape(node.get_title())
         if node.get_status() == Task.STA_ACTIVE:
-            count = self.mainview.node_n_children(node.get_id(), recursive=True)
             if count != 0:
                 title += f" ({count})"
         elif node.get_status() == Task.STA_DISMISSED:
             title = f"<span color='{self.unactive_color}'>{title}</span>"
 
-        if self.config.get("contents_preview_enable"):
+        if self._preview_enabled:
             excerpt = saxutils.escape(node.get_excerpt(lines=1,
                                                        strip_tags=True,
                                                        strip_subtasks=True))
@@ -124,6 +186,9 @@ class TreeviewFactory():
         return title
 
     def get_task_startdate_column_string(self, node):
+        return self._render('startdate', node, self._get_task_startdate)
+
+    def _get_task_startdate(self, node):
         start_date = node.get_start_date()
         if start_date:
             return _(start_date.to_readable_string())
@@ -132,6 +197,11 @@ class TreeviewFactory():
             return ""
 
     def get_task_duedate_column_string(self, node):
+        # Due dates of parents are synced to their subtasks, see
+        # Task.set_due_date()
+        return self._render('duedate', node, self._get_task_duedate)
+
+    def _get_task_duedate(self, node):
         # For tasks with no due dates, we use the most constraining due date.
         if node.get_due_date() == Date.no_date():
             # This particular call must NOT use the gettext "_" function,
@@ -144,6 +214,9 @@ class TreeviewFactory():
             return _(node.get_due_date().to_readable_string())
 
     def get_task_closeddate_column_string(self, node):
+        return self._render('closeddate', node, self._get_task_closeddate)
+
+    def _get_task_closeddate(self, node):
         closed_date = node.get_closed_date()
         if closed_date:
             return _(closed_date.to_readable_string())
@@ -157,35 +230,53 @@ class TreeviewFactory():
         return self.__date_comp_continue(task1, task2, order, t1, t2)
 
     def sort_by_duedate(self, task1, task2, order):
-        t1 = task1.get_urgent_date()
-        t2 = task2.get_urgent_date()
-        if t1 == Date.no_date():
-            t1 = task1.get_due_date_constraint()
-        if t2 == Date.no_date():
-            t2 = task2.get_due_date_constraint()
+        t1 = self._get_sort_key(task1).due_day
+        t2 = self._get_sort_key(task2).due_day
         return self.__date_comp_continue(task1, task2, order, t1, t2)
 
     def sort_by_closeddate(self, task1, task2, order):
-        t1 = task1.get_closed_date()
-        t2 = task2.get_closed_date()
-
-        # Convert both times to datetimes (accurate comparison)
-        if isinstance(t1, Date):
-            d = t1.date()
-            t1 = datetime(year=d.year, month=d.month, day=d.day)
-        if isinstance(t2, Date):
-            d = t2.date()
-            t2 = datetime(year=d.year, month=d.month, day=d.day)
+        # Compare days only (closed dates may be datetimes)
+        t1 = self._get_sort_key(task1).closed_day
+        t2 = self._get_sort_key(task2).closed_day
         return self.__date_comp_continue(task1, task2, order, t1, t2)
 
     def sort_by_title(self, task1, task2, order):
-        # Strip "@" and convert everything to lowercase to allow fair comparisons;
-        # otherwise, Capitalized Tasks get sorted after their lowercase equivalents,
-        # and tasks starting with a tag would get sorted before everything else.
-        t1 = task1.get_title().replace("@", "").lower()
-        t2 = task2.get_title().replace("@", "").lower()
+        t1 = self._get_sort_key(task1).title
+        t2 = self._get_sort_key(task2).title
         return (t1 > t2) - (t1 < t2)
 
+    def _get_sort_key(self, task):
+        """ Return the SortKey of the task
+
+        Keys are computed once per version of the task and day instead of
+        for every comparison. The urgent date depends on the subtasks which
+        don't change the version of the task, it is part of the version. """
+        tid = task.get_id()
+        urgent_date = self.aggregates.get_urgent_date(task)
+        version = (task.get_version(), clock.today_ordinal(), urgent_date)
+        cached = self._sort_keys.get(tid)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        title = task.get_title()
+        closed_date = Date(task.get_closed_date())
+        if urgent_date == Date.no_date():
+            urgent_date = task.get_due_date_constraint()
+        key = SortKey(
+            # Strip "@" and convert everything to lowercase to allow fair
+            # comparisons; otherwise, Capitalized Tasks get sorted after
+            # their lowercase equivalents, and tasks starting with a tag
+            # would get sorted before everything else.
+            title.replace("@", "").lower(),
+            tuple(sorted(task.get_tags_name())),
+            locale.strxfrm(title),
+            closed_date.date().toordinal(),
+            # Fuzzy dates are mapped to days from today
+            urgent_date.date().toordinal(),
+        )
+        self._sort_keys[tid] = (version, key)
+        return key
+
     def __date_comp_continue(self, task1, task2, order, t1, t2):
         sort = (t2 > t1) - (t2 < t1)
 
@@ -194,16 +285,13 @@ class TreeviewFactory():
             return sort
 
         # Dates are equal
-        # Group tasks with the same tag together for visual cleanness
-        t1_tags = task1.get_tags_name()
-        t1_tags.sort()
-        t2_tags = task2.get_tags_name()
-        t2_tags.sort()
-        sort = (t1_tags > t2_tags) - (t1_tags < t2_tags)
-
-        if sort == 0:  # Even tags are equal
-            # Break ties by sorting by title
-            sort = locale.strcoll(task1.get_title(), task2.get_title())
+        # Group tasks with the same tag together for visual cleanness,
+        # then break ties by sorting by title
+        key1 = self._get_sort_key(task1)
+        key2 = self._get_sort_key(task2)
+        t1 = (key1.tags, key1.collated_title)
+        t2 = (key2.tags, key2.collated_title)
+        sort = (t1 > t2) - (t1 < t2)
 
         if order != Gtk.SortType.ASCENDING:
             return -sort
@@ -235,20 +323,21 @@ class TreeviewFactory():
         return tag.get_attribute('special') == 'sep'
 
     def tag_sorting(self, t1, t2, order):
-        t1_sp = t1.get_attribute("special")
-        t2_sp = t2.get_attribute("special")
-        t1_name = locale.strxfrm(t1.get_name())
-        t2_name = locale.strxfrm(t2.get_name())
-        if not t1_sp and not t2_sp:
-            return (t1_name > t2_name) - (t1_name < t2_name)
-        elif not t1_sp and t2_sp:
-            return 1
-        elif t1_sp and not t2_sp:
-            return -1
-        else:
-            t1_order = t1.get_attribute("order")
-            t2_order = t2.get_attribute("order")
-            return (t1_order > t2_order) - (t1_order < t2_order)
+        t1_key = self._get_tag_sort_key(t1)
+        t2_key = self._get_tag_sort_key(t2)
+        return (t1_key > t2_key) - (t1_key < t2_key)
+
+    def _get_tag_sort_key(self, tag):
+        """ Special tags come first in their order, then other tags by
+        their collated names """
+        if tag.get_attribute("special"):
+            return (0, tag.get_attribute("order"))
+
+        name = tag.get_name()
+        collated = self._collated_names.get(name)
+        if collated is None:
+            collated = self._collated_names[name] = locale.strxfrm(name)
+        return (1, collated)
 
     def on_tag_task_dnd(self, source, target):
         task = self.req.get_task(source)
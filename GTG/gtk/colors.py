@@ -17,48 +17,67 @@
 # -----------------------------------------------------------------------------
 
 from gi.repository import Gdk
-from functools import reduce
+from functools import lru_cache, reduce
 import random
 
-# Take list of Tags and give the background color that should be applied
-# The returned color might be None (in which case, the default is used)
+# Tag colors are blended for every row of the task browser on each paint:
+# parsed colors and blended results are cached by their color strings
+COLOR_CACHE_SIZE = 1024
 
-used_color = []
+used_color = set()
 
 
-def background_color(tags, bgcolor=None):
-    if not bgcolor:
-        bgcolor = Gdk.color_parse("#FFFFFF")
-    # Compute color
-    my_color = None
-    color_count = 0.0
+@lru_cache(maxsize=COLOR_CACHE_SIZE)
+def _parse_color(color_str):
+    """ Return the (red, green, blue) components of a color string """
+    color = Gdk.color_parse(color_str)
+    return (color.red, color.green, color.blue)
+
+
+@lru_cache(maxsize=COLOR_CACHE_SIZE)
+def _blend_colors(color_strs, bgcolor):
+    """ Blend colors with the (red, green, blue) background color """
     red = 0
     green = 0
     blue = 0
-    for my_tag in tags:
-        my_color_str = my_tag.get_attribute("color")
-        if my_color_str is not None and my_color_str not in used_color:
-            used_color.append(my_color_str)
-        if my_color_str:
-            my_color = Gdk.color_parse(my_color_str)
-            color_count = color_count + 1
-            red = red + my_color.red
-            green = green + my_color.green
-            blue = blue + my_color.blue
-    if color_count != 0:
-        red = int(red / color_count)
-        green = int(green / color_count)
-        blue = int(blue / color_count)
-        brightness = (red + green + blue) / 3.0
-        target_brightness = (bgcolor.red + bgcolor.green + bgcolor.blue) / 3.0
-
-        alpha = (1 - abs(brightness - target_brightness) / 65535.0) / 2.0
-        red = int(red * alpha + bgcolor.red * (1 - alpha))
-        green = int(green * alpha + bgcolor.green * (1 - alpha))
-        blue = int(blue * alpha + bgcolor.blue * (1 - alpha))
+    for color_str in color_strs:
+        color_red, color_green, color_blue = _parse_color(color_str)
+        red = red + color_red
+        green = green + color_green
+        blue = blue + color_blue
 
-        my_color = Gdk.Color(red, green, blue).to_string()
-    return my_color
+    color_count = len(color_strs)
+    red = int(red / color_count)
+    green = int(green / color_count)
+    blue = int(blue / color_count)
+    bg_red, bg_green, bg_blue = bgcolor
+    brightness = (red + green + blue) / 3.0
+    target_brightness = (bg_red + bg_green + bg_blue) / 3.0
+
+    alpha = (1 - abs(brightness - target_brightness) / 65535.0) / 2.0
+    red = int(red * alpha + bg_red * (1 - alpha))
+    green = int(green * alpha + bg_green * (1 - alpha))
+    blue = int(blue * alpha + bg_blue * (1 - alpha))
+
+    return Gdk.Color(red, green, blue).to_string()
+
+
+# Take list of Tags and give the background color that should be applied
+# The returned color might be None (in which case, the default is used)
+def background_color(tags, bgcolor=None):
+    color_strs = [tag.get_attribute("color") for tag in tags]
+    used_color.update(c for c in color_strs if c is not None)
+
+    # The blend doesn't depend on the order of tags
+    color_strs = tuple(sorted(c for c in color_strs if c))
+    if not color_strs:
+        return None
+
+    if bgcolor:
+        bgcolor = (bgcolor.red, bgcolor.green, bgcolor.blue)
+    else:
+        bgcolor = _parse_color("#FFFFFF")
+    return _blend_colors(color_strs, bgcolor)
 
 
 def get_colored_tag_markup(req, tag_name, html=False):
@@ -106,18 +125,16 @@ def generate_tag_color():
         my_color = Gdk.Color(red, green, blue).to_string()
         if my_color not in used_color:
             flag = 1
-    used_color.append(my_color)
+    used_color.add(my_color)
     return my_color
 
 
 def color_add(present_color):
 
-    if present_color not in used_color:
-        used_color.append(present_color)
+    used_color.add(present_color)
 
 
 def color_remove(present_color):
 
-    if present_color in used_color:
-        used_color.remove(present_color)
+    used_color.discard(present_color)
 # -----------------------------------------------------------------------------
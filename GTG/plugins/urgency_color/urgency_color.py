@@ -19,6 +19,7 @@ from gi.repository import Gtk
 from gi.repository import Gdk
 import os
 
+from GTG.core.clock import clock
 from GTG.core.dates import Date
 
 
@@ -35,11 +36,22 @@ class UrgencyColorPlugin():
     def __init__(self):
         self._plugin_api = None
         self.req = None
+        self._deleted_cllbck = None
+        # Colors are cached for a day and a set of preferences
+        self._context = None
+        # task id -> (task version, urgency color)
+        self._node_colors = {}
+        # (color1, color2, position) -> gradient color
+        self._gradients = {}
+        # color string -> (red, green, blue)
+        self._parsed_colors = {}
 
     def activate(self, plugin_api):
         """ Plugin is activated """
         self._plugin_api = plugin_api
         self.req = self._plugin_api.get_requester()
+        self._deleted_cllbck = self.req.get_main_view().register_cllbck(
+            'node-deleted', self._on_task_deleted)
         self.prefs_load()
         self.prefs_init()
         # Set color function
@@ -60,18 +72,50 @@ class UrgencyColorPlugin():
         else:
             return None
 
+    def _parse_color(self, color):
+        rgb = self._parsed_colors.get(color)
+        if rgb is None:
+            parsed = Gdk.color_parse(color)
+            rgb = self._parsed_colors[color] = (
+                parsed.red, parsed.green, parsed.blue)
+        return rgb
+
     def _get_gradient_color(self, color1, color2, position):
         """This function returns a string in the hexadecimal form of Gdk.Color
         which corresponds to the position (a float value from 0 to 1) in the
         gradient formed by color1 & color2, both of type Gdk.Color"""
-        color1 = Gdk.color_parse(color1)
-        color2 = Gdk.color_parse(color2)
-        R1, G1, B1 = color1.red, color1.green, color1.blue
-        R2, G2, B2 = color2.red, color2.green, color2.blue
+        key = (color1, color2, position)
+        gradient = self._gradients.get(key)
+        if gradient is not None:
+            return gradient
+
+        R1, G1, B1 = self._parse_color(color1)
+        R2, G2, B2 = self._parse_color(color2)
         R = R1 + (R2 - R1) * position
         G = G1 + (G2 - G1) * position
         B = B1 + (B2 - B1) * position
-        return Gdk.Color.to_string(Gdk.Color(int(R), int(G), int(B)))
+        gradient = Gdk.Color.to_string(Gdk.Color(int(R), int(G), int(B)))
+        self._gradients[key] = gradient
+        return gradient
+
+    def _check_context(self):
+        """ Forget cached colors when the day or the preferences changed """
+        # Preferences are edited in place by the preferences dialog
+        context = (clock.today_ordinal(),
+                   tuple(self._pref_data.get(key) for key in self.DEFAULT_PREFS))
+        if context != self._context:
+            self._context = context
+            self._node_colors.clear()
+            self._gradients.clear()
+
+    def _get_cached_node_bgcolor(self, node):
+        tid = node.get_id()
+        version = node.get_version()
+        cached = self._node_colors.get(tid)
+        if cached is None or cached[0] != version:
+            cached = self._node_colors[tid] = (
+                version, self.get_node_bgcolor(node))
+        return cached[1]
 
     def get_node_bgcolor(self, node):
         """ This method checks the urgency of a node (task) and returns its
@@ -148,42 +192,24 @@ class UrgencyColorPlugin():
             return None
 
     def bgcolor(self, node, standard_color):
-        color = self.get_node_bgcolor(node)
-
-        def __get_active_child_list(node):
-            """ This function recursively fetches a list
-            of all the children of a task which are active
-            (i.e - the subtasks which are not marked as 'Done' or 'Dismissed'
-            """
-            child_list = []
-            for child_id in node.children:
-                child = node.req.get_task(child_id)
-                child_list += __get_active_child_list(child)
-                if child.get_status() in [child.STA_ACTIVE]:
-                    child_list.append(child_id)
-            return child_list
-
-        child_list = __get_active_child_list(node)
-
-        daysleft = None
-        for child_id in child_list:
-            child = self.req.get_task(child_id)
-            if child.get_due_date() == Date.no_date():
-                continue
-
-            daysleft_of_child = child.get_due_date().days_left()
-            if daysleft is None:
-                daysleft = daysleft_of_child
-                color = self.get_node_bgcolor(child)
-            elif daysleft_of_child < daysleft:
-                daysleft = daysleft_of_child
-                color = self.get_node_bgcolor(child)
-
-        return color
+        self._check_context()
+
+        # The color of the most urgent active subtask, if any has a due date
+        aggregates = self.req.get_subtree_aggregates()
+        urgent_id = aggregates.get_urgent_descendant(node)
+        if urgent_id is not None:
+            node = self.req.get_task(urgent_id)
+        return self._get_cached_node_bgcolor(node)
+
+    def _on_task_deleted(self, tid, path=None):
+        self._node_colors.pop(tid, None)
 
     def deactivate(self, plugin_api):
         """ Plugin is deactivated """
         self._plugin_api.set_bgcolor_func()
+        self.req.get_main_view().deregister_cllbck('node-deleted',
+                                                   self._deleted_cllbck)
+        self._node_colors.clear()
 
 # Preferences dialog
     def is_configurable(self):
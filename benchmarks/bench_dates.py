@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) 2008-2014 - Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""
+Benchmark of the parsing of date strings.
+
+The strings look like the dates of a task file: days shared by a lot of
+tasks, modification times which are all different and fuzzy dates. Sizes are
+numbers of strings, not tasks.
+
+Date.parse() is measured with what users type in the quick add entry, the
+search bar and the task editor, one tenth of the size.
+
+    python3 -m benchmarks.bench_dates --output dates.json
+"""
+
+from datetime import date, datetime, timedelta
+import random
+
+from GTG.core import dates
+from GTG.core.dates import Date
+
+from benchmarks.common import measure, run_main
+
+
+def make_strings(size, seed=42):
+    """ Return size date strings in the formats written by GTG """
+    rand = random.Random(seed)
+    first_day = date(2015, 1, 1)
+    first_time = datetime(2015, 1, 1)
+    strings = []
+    for _ in range(size):
+        kind = rand.random()
+        if kind < 0.6:
+            day = first_day + timedelta(rand.randrange(3000))
+            strings.append(day.isoformat())
+        elif kind < 0.8:
+            moment = first_time + timedelta(seconds=rand.randrange(10 ** 8),
+                                            microseconds=rand.randrange(10 ** 6))
+            strings.append(moment.isoformat())
+        elif kind < 0.9:
+            moment = first_time + timedelta(seconds=rand.randrange(10 ** 8),
+                                            microseconds=rand.randrange(10 ** 6))
+            strings.append(moment.isoformat(sep=' '))
+        else:
+            strings.append(rand.choice(('soon', 'someday')))
+    return strings
+
+
+# Input typed by users, see Date.parse()
+USER_INPUTS = ['today', 'tomorrow', 'next week', 'next month', 'next year',
+               'friday', 'Monday', '2021-05-01', '20210501', '2021/05/01',
+               '0501', '15', 'soon', 'someday', 'later', 'now', 'invalid']
+
+
+def parse_user_inputs(inputs):
+    for string in inputs:
+        try:
+            Date.parse(string)
+        except ValueError:
+            pass
+
+
+def parse_all(strings, cached=True):
+    if cached:
+        dates._parse_dt_str.cache_clear()
+        for string in strings:
+            Date(string)
+    else:
+        parse = dates._parse_dt_str.__wrapped__
+        for string in strings:
+            parse(string)
+
+
+def run(results, sizes):
+    for size in sizes:
+        strings = make_strings(size)
+        results.add('parse', measure(lambda: parse_all(strings), repeat=3),
+                    size=size)
+        results.add('parse without cache',
+                    measure(lambda: parse_all(strings, cached=False),
+                            repeat=3),
+                    size=size)
+        info = dates._parse_dt_str.cache_info()
+        results.add('cache misses',
+                    100 * info.misses / max(1, info.hits + info.misses),
+                    unit='%', size=size)
+
+        inputs = (USER_INPUTS * (size // 10 // len(USER_INPUTS) + 1))
+        inputs = inputs[:size // 10]
+        results.add('Date.parse', measure(lambda: parse_user_inputs(inputs),
+                                          repeat=3),
+                    size=size // 10)
+
+
+if __name__ == '__main__':
+    run_main('dates', run, [1000000])
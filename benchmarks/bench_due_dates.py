@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) 2008-2014 - Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""
+Benchmark of the propagation of due date constraints.
+
+A due date is changed at the root of deep (a long chain of subtasks) and wide
+(a lot of direct subtasks) hierarchies, so that every other task has to be
+updated, and at the bottom of a deep hierarchy, so that every ancestor has to
+be updated.
+
+    python3 -m benchmarks.bench_due_dates --output due_dates.json
+"""
+
+import time
+
+from liblarch import Tree
+
+from GTG.core.dates import Date
+from GTG.core.task import Task
+
+from benchmarks.common import run_main
+
+LATE = Date.parse('2030-12-31')
+EARLY = Date.parse('2030-01-01')
+LATER = Date.parse('2031-06-30')
+
+
+class FakeRequester():
+    """ Just enough of the requester for tasks in a tree """
+
+    def __init__(self, tree):
+        self.tree = tree
+
+    def get_task(self, tid):
+        return self.tree.get_node(tid)
+
+    def get_tag(self, tagname):
+        return None
+
+
+def build(size, shape):
+    """ Return the tasks of a hierarchy, all due LATE """
+    tree = Tree()
+    requester = FakeRequester(tree)
+    tasks = []
+    for number in range(size):
+        task = Task(str(number), requester)
+        task.due_date = LATE
+        tree.add_node(task)
+        if tasks:
+            parent = tasks[-1] if shape == 'deep' else tasks[0]
+            parent.add_child(task.get_id())
+        tasks.append(task)
+
+    for task in tasks:
+        task.set_loaded()
+    return tasks
+
+
+def measure_change(size, shape, pick, new_date, repeat=3):
+    best = None
+    for _ in range(repeat):
+        tasks = build(size, shape)
+        start = time.perf_counter()
+        pick(tasks).set_due_date(new_date)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def run(results, sizes):
+    for size in sizes:
+        results.add('deep root earlier',
+                    measure_change(size, 'deep', lambda t: t[0], EARLY),
+                    size=size)
+        results.add('deep leaf later',
+                    measure_change(size, 'deep', lambda t: t[-1], LATER),
+                    size=size)
+        results.add('wide root earlier',
+                    measure_change(size, 'wide', lambda t: t[0], EARLY),
+                    size=size)
+
+
+if __name__ == '__main__':
+    run_main('due dates', run, [10, 100, 500])
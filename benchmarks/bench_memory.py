@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) 2008-2014 - Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""
+Benchmark of the memory used by tasks.
+
+Tasks are created with the real Task class from a synthetic corpus, the same
+way backends load them, and the memory they allocate is traced. Strings are
+copied first, as if they were read from the XML file.
+
+The same tasks are also loaded with the attributes stored as Task used to
+store them: status and tag names not interned, tags in a list, a Date object
+per task for each date and a reference to the main view. The difference is
+what the current representation saves.
+
+    python3 -m benchmarks.bench_memory --output memory.json
+"""
+
+import tracemalloc
+
+from GTG.core.dates import Date
+from GTG.core.task import Task
+
+from benchmarks.common import run_main
+from benchmarks.corpus import make_corpus
+
+
+DATES = ('added_date', 'closed_date', 'due_date', 'start_date',
+         'recurring_updated_date')
+
+
+class FakeRequester():
+    """ Tasks are not loaded into a tree, they only need a requester """
+
+    def get_task(self, tid):
+        return None
+
+    def get_tag(self, tagname):
+        return None
+
+
+def copy(string):
+    """ Return a new string object, like the XML parser does """
+    return ''.join(list(string))
+
+
+def load(corpus, requester):
+    tasks = []
+    for source in corpus:
+        task = Task(copy(source.get_id()), requester)
+        task.set_title(copy(source.get_title()))
+        task.set_text(copy(source.get_text()))
+        for tag in source.get_tags_name():
+            task.tag_added(copy(tag))
+        task.set_status(copy(source.get_status()), init=True)
+        task.set_due_date(source.get_due_date())
+        task.set_start_date(source.get_start_date())
+        tasks.append(task)
+    return tasks
+
+
+def load_as_before(corpus, requester):
+    """ Load the tasks, then store their attributes as Task used to """
+    tasks = load(corpus, requester)
+    for task in tasks:
+        task.status = copy(task.status)
+        task.tags = [copy(tag) for tag in task.tags]
+        for name in DATES:
+            setattr(task, name, Date(getattr(task, name)))
+        task._Task__main_treeview = None
+    return tasks
+
+
+def traced_load(loader, corpus, requester):
+    """ Return the tasks and the bytes per task they hold """
+    tracemalloc.start()
+    tasks = loader(corpus, requester)
+    allocated = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return tasks, allocated / len(tasks)
+
+
+def run(results, sizes):
+    requester = FakeRequester()
+    for size in sizes:
+        # Notes are not interesting here, only the overhead of tasks
+        corpus = make_corpus(size, note_words=0)
+
+        tasks, per_task = traced_load(load, corpus, requester)
+        del tasks
+        tasks, per_task_before = traced_load(load_as_before, corpus,
+                                             requester)
+        del tasks
+
+        results.add('bytes per task', per_task, unit='B', size=size)
+        results.add('bytes per task as before', per_task_before, unit='B',
+                    size=size)
+        results.add('bytes saved per task', per_task_before - per_task,
+                    unit='B', size=size, higher_is_better=True)
+
+
+if __name__ == '__main__':
+    run_main('memory', run, [1000, 10000, 100000])
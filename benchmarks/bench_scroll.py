@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) 2008-2014 - Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""
+Benchmark of scrolling the task browser.
+
+Tasks from a synthetic corpus are loaded into a datastore and a viewport of
+VIEWPORT rows is scrolled through the whole list, STEP rows per frame. Every
+frame computes the columns GTK draws for the visible rows: label, start and
+due dates, tags and background color. The list is scrolled down with empty
+caches and then up again. Results are reported in frames per second.
+
+    python3 -m benchmarks.bench_scroll --output scroll.json
+"""
+
+import time
+
+from GTG.core.datastore import DataStore
+from GTG.gtk.browser.treeview_factory import TreeviewFactory
+
+from benchmarks.common import run_main
+from benchmarks.corpus import make_corpus, TAGS
+
+VIEWPORT = 40
+STEP = 3
+
+COLORS = ['#729fcf', '#8ae234', '#fce94f', '#fcaf3e', '#e9b96e',
+          '#ad7fa8', '#ef2929', '#888a85']
+
+
+def load(corpus):
+    """ Return the requester and the tasks of a new datastore """
+    requester = DataStore().get_requester()
+    tasks = []
+    for source in corpus:
+        task = requester.new_task()
+        task.set_title(source.get_title())
+        task.set_text(source.get_text())
+        for tag in source.get_tags_name():
+            task.tag_added('@' + tag)
+        task.set_status(source.get_status(), init=True)
+        task.set_due_date(source.get_due_date())
+        task.set_start_date(source.get_start_date())
+        task.set_loaded()
+        tasks.append(task)
+
+    for number, name in enumerate(TAGS):
+        tag = requester.get_tag('@' + name)
+        if tag is not None:
+            tag.set_attribute('color', COLORS[number % len(COLORS)])
+    return requester, tasks
+
+
+def draw(factory, rows):
+    """ Compute the visible columns of rows, like GTK does """
+    for task in rows:
+        factory.get_task_label_column_string(task)
+        factory.get_task_startdate_column_string(task)
+        factory.get_task_duedate_column_string(task)
+        factory.get_task_tags_column_contents(task)
+        factory.get_task_bg_color(task, None)
+
+
+def scroll(factory, tasks, tops):
+    """ Return the number of frames per second """
+    start = time.perf_counter()
+    for top in tops:
+        draw(factory, tasks[top:top + VIEWPORT])
+    return len(tops) / (time.perf_counter() - start)
+
+
+def run(results, sizes):
+    for size in sizes:
+        requester, tasks = load(make_corpus(size, note_words=20))
+        factory = TreeviewFactory(requester, requester.get_config('browser'))
+        tops = range(0, max(size - VIEWPORT, 0) + 1, STEP)
+
+        results.add('scroll down', scroll(factory, tasks, tops), unit='fps',
+                    size=size, higher_is_better=True)
+        results.add('scroll up', scroll(factory, tasks, tops[::-1]),
+                    unit='fps', size=size, higher_is_better=True)
+        results.add('render cache hit rate',
+                    factory.render_cache.get_hit_rate() * 100, unit='%',
+                    size=size, higher_is_better=True)
+
+
+if __name__ == '__main__':
+    run_main('scroll', run, [1000, 10000])
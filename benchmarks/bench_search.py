@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) 2008-2014 - Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""
+Benchmark of the search: parsing queries, testing a single task and
+filtering the whole tree, with and without the cache of the search bar.
+
+Run from the root of the repository:
+
+    python3 -m benchmarks.bench_search --output search.json
+    python3 -m benchmarks.bench_search --baseline search.json
+"""
+
+from GTG.core.live_search import LiveSearch
+from GTG.core.search import parse_search_query, search_filter
+
+from benchmarks.common import measure, run_main
+from benchmarks.corpus import make_corpus, CorpusTree
+
+QUERIES = [
+    'buy',
+    'buy milk',
+    '"release meeting"',
+    '@work',
+    '@work @urgent',
+    '@work !or @home',
+    '!not @home',
+    '!today !or !tomorrow',
+    '@errands !before "next month"',
+    'report !not @someday',
+]
+
+# Successive queries while typing in the search bar
+TYPING = ['r', 're', 'rep', 'repo', 'repor', 'report', 'report @work']
+
+
+def bench_parse(results):
+    for query in QUERIES:
+        results.add(f'parse {query}',
+                    measure(lambda: parse_search_query(query), number=1000))
+
+
+def bench_filter(results, tasks):
+    size = len(tasks)
+    parsed = [parse_search_query(query) for query in QUERIES]
+
+    total = 0
+    for query, parameters in zip(QUERIES, parsed):
+        def refilter():
+            for task in tasks:
+                search_filter(task, parameters)
+
+        elapsed = measure(refilter, repeat=3)
+        total += elapsed
+        results.add(f'refilter {query}', elapsed, size=size)
+
+    results.add('filter per task', total / (size * len(QUERIES)), size=size)
+
+
+def bench_typing(results, tasks):
+    tree = CorpusTree(tasks)
+
+    def type_query():
+        live_search = LiveSearch(tree)
+        for query in TYPING:
+            live_search.search(query)
+
+    results.add('search as you type', measure(type_query, repeat=3),
+                size=len(tasks))
+
+
+def run(results, sizes):
+    bench_parse(results)
+    for size in sizes:
+        tasks = make_corpus(size, note_words=100)
+        bench_filter(results, tasks)
+        bench_typing(results, tasks)
+
+
+if __name__ == '__main__':
+    run_main('search', run, [1000, 10000, 100000])
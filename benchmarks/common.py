@@ -0,0 +1,155 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) 2008-2014 - Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""
+Helpers shared by the benchmarks.
+
+Every benchmark script collects its measurements in BenchmarkResults and can
+write them as JSON (--output). When a previous JSON file is passed with
+--baseline, the script exits with an error if a measurement got slower than
+the baseline by more than --tolerance, so the results of two versions of GTG
+can be compared automatically.
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+
+
+def measure(func, repeat=5, number=1):
+    """ Return the best time in seconds of a single call of func """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = (time.perf_counter() - start) / number
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+class BenchmarkResults():
+    """ Measurements of a benchmark run """
+
+    def __init__(self, name):
+        self.name = name
+        self.results = []
+
+    def add(self, metric, value, unit='s', size=None,
+            higher_is_better=False):
+        """ Record a measurement, lower values are better by default """
+        self.results.append({
+            'metric': metric,
+            'size': size,
+            'value': value,
+            'unit': unit,
+            'higher_is_better': higher_is_better,
+        })
+        label = metric if size is None else f'{metric} [{size}]'
+        print(f'{label:<50} {format_value(value, unit)}')
+
+    def to_dict(self):
+        return {
+            'benchmark': self.name,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'results': self.results,
+        }
+
+    def save(self, path):
+        with open(path, 'w') as output:
+            json.dump(self.to_dict(), output, indent=2)
+
+    def compare(self, baseline, tolerance):
+        """ Return the measurements slower than in the baseline
+
+        @param baseline: results loaded from a JSON file
+        @param tolerance: allowed relative slowdown, e.g. 0.2 for 20 %
+        """
+        previous = {(result['metric'], result['size']): result['value']
+                    for result in baseline['results']}
+
+        regressions = []
+        for result in self.results:
+            old = previous.get((result['metric'], result['size']))
+            if not old:
+                continue
+            if result['higher_is_better']:
+                slower = result['value'] < old * (1 - tolerance)
+            else:
+                slower = result['value'] > old * (1 + tolerance)
+            if slower:
+                regressions.append((result, old))
+        return regressions
+
+
+def format_value(value, unit):
+    if unit == 's':
+        for factor, name in (1, 's'), (1e3, 'ms'), (1e6, 'us'):
+            if value * factor >= 1:
+                return f'{value * factor:.3f} {name}'
+        return f'{value * 1e9:.1f} ns'
+    return f'{value:.1f} {unit}'
+
+
+def parse_sizes(text):
+    return [int(size) for size in text.split(',') if size]
+
+
+def main(name, run, default_sizes, argv=None):
+    """ Parse the command line, run the benchmark and handle results
+
+    @param run: function called with (BenchmarkResults, sizes)
+    """
+    parser = argparse.ArgumentParser(description=f'GTG {name} benchmark')
+    parser.add_argument('--sizes', type=parse_sizes,
+                        default=default_sizes,
+                        help='comma separated numbers of tasks')
+    parser.add_argument('--output', help='write results to this JSON file')
+    parser.add_argument('--baseline',
+                        help='fail if slower than results in this JSON file')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='allowed slowdown against the baseline')
+    args = parser.parse_args(argv)
+
+    results = BenchmarkResults(name)
+    run(results, args.sizes)
+
+    if args.output:
+        results.save(args.output)
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+
+        regressions = results.compare(baseline, args.tolerance)
+        for result, old in regressions:
+            print('REGRESSION {metric} [{size}]: '.format(**result) +
+                  f"{format_value(old, result['unit'])} -> "
+                  f"{format_value(result['value'], result['unit'])}")
+        if regressions:
+            return 1
+    return 0
+
+
+def run_main(name, run, default_sizes):
+    sys.exit(main(name, run, default_sizes))
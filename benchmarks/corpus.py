@@ -0,0 +1,156 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) 2008-2014 - Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""
+Synthetic task corpora for the benchmarks.
+
+Tasks don't need a datastore or GTK: they only implement what the search
+and the filters use, with the excerpt helpers of GTG.core.task for the
+content.
+The same seed gives the same corpus, so results of several runs are
+comparable.
+"""
+
+import datetime
+import random
+
+from GTG.core.dates import Date
+from GTG.core.task import make_excerpt, make_search_text
+
+WORDS = """
+    buy milk bread call mom write report review patch release meeting
+    prepare slides invoice pay rent book flight hotel clean kitchen garden
+    fix bug email answer read paper chapter plan trip birthday gift train
+    gym run doctor dentist appointment backup server update documentation
+    translate strings deploy website test feature refactor module design
+    """.split()
+
+TAGS = ['work', 'home', 'errands', 'gtg', 'phone', 'computer', 'family',
+        'finance', 'health', 'travel', 'reading', 'writing', 'someday',
+        'waiting', 'urgent', 'garden', 'car', 'school', 'friends', 'music']
+
+STATUSES = ['Active', 'Done', 'Dismiss']
+
+
+class CorpusTask():
+    """ Minimal task used by the benchmarks """
+
+    STA_ACTIVE = 'Active'
+
+    def __init__(self, tid, title, text, tags, due_date, start_date, status):
+        self.tid = tid
+        self.title = title
+        self.text = text
+        self.tags = tags
+        self.due_date = due_date
+        self.start_date = start_date
+        self.status = status
+        self._search_text = None
+
+    def get_id(self):
+        return self.tid
+
+    def get_title(self):
+        return self.title
+
+    def get_excerpt(self, lines=0, char=0, strip_tags=False,
+                    strip_subtasks=True):
+        return make_excerpt(self.text, self.tags, lines, char, strip_tags,
+                            strip_subtasks)
+
+    def get_search_text(self):
+        if self._search_text is None:
+            self._search_text = make_search_text(self.text)
+        return self._search_text
+
+    def get_text(self):
+        return self.text
+
+    def get_tags_name(self):
+        return self.tags
+
+    def get_tags(self):
+        return self.tags
+
+    def get_due_date(self):
+        return self.due_date
+
+    def get_start_date(self):
+        return self.start_date
+
+    def get_status(self):
+        return self.status
+
+
+def random_date(rng, today):
+    """ Mostly no date, some fuzzy dates, otherwise close to today """
+    kind = rng.random()
+    if kind < 0.4:
+        return Date.no_date()
+    elif kind < 0.45:
+        return Date.soon()
+    elif kind < 0.5:
+        return Date.someday()
+    return Date(today + datetime.timedelta(days=int(rng.gauss(0, 30))))
+
+
+def make_corpus(size, seed=42, note_words=300):
+    """ Return a list of size tasks
+
+    Tags follow a Zipf-like distribution (a few tags are on many tasks) and
+    notes are note_words long on average.
+    """
+    rng = random.Random(seed)
+    today = datetime.date.today()
+    tag_weights = [1 / rank for rank in range(1, len(TAGS) + 1)]
+
+    tasks = []
+    for number in range(size):
+        title = ' '.join(rng.choices(WORDS, k=rng.randint(2, 8)))
+        text = ' '.join(rng.choices(WORDS, k=rng.randint(0, 2 * note_words)))
+        tags = list(set(rng.choices(TAGS, tag_weights, k=rng.randint(0, 3))))
+        status = rng.choices(STATUSES, [7, 2, 1])[0]
+        tasks.append(CorpusTask(str(number), title, text, tags,
+                                random_date(rng, today),
+                                random_date(rng, today), status))
+    return tasks
+
+
+class CorpusTree():
+    """ Mimic liblarch tree and its main view for a corpus """
+
+    def __init__(self, tasks):
+        self.nodes = {task.get_id(): task for task in tasks}
+
+    def get_main_view(self):
+        return self
+
+    def register_cllbck(self, event, func):
+        pass
+
+    def add_filter(self, name, func, parameters=None):
+        pass
+
+    def get_all_nodes(self):
+        return list(self.nodes)
+
+    def has_node(self, tid):
+        return tid in self.nodes
+
+    def get_node(self, tid):
+        return self.nodes[tid]
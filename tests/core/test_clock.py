@@ -0,0 +1,74 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) 2008-2014 - Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+from datetime import date, datetime
+
+from mock import patch
+from unittest import TestCase
+
+from GTG.core.clock import Clock, clock
+from GTG.core.dates import Date
+
+
+class TestClock(TestCase):
+
+    def test_today(self):
+        self.assertEqual(date.today(), Clock().today())
+        self.assertEqual(date.today().toordinal(), Clock().today_ordinal())
+
+    def test_day_is_cached_until_midnight(self):
+        test_clock = Clock()
+        midnight = datetime(2021, 3, 2).timestamp()
+        with patch('GTG.core.clock.date') as fake_date:
+            fake_date.today.return_value = date(2021, 3, 1)
+            with patch('time.time', return_value=midnight - 1):
+                self.assertEqual(date(2021, 3, 1), test_clock.today())
+                fake_date.today.return_value = date(2021, 3, 2)
+                self.assertEqual(date(2021, 3, 1), test_clock.today())
+            with patch('time.time', return_value=midnight):
+                self.assertEqual(date(2021, 3, 2), test_clock.today())
+
+    def test_invalidate(self):
+        test_clock = Clock()
+        test_clock.today()
+        with patch('GTG.core.clock.date') as fake_date:
+            fake_date.today.return_value = date(2000, 1, 1)
+            self.assertNotEqual(date(2000, 1, 1), test_clock.today())
+            test_clock.invalidate()
+            self.assertEqual(date(2000, 1, 1), test_clock.today())
+
+    def test_frozen_clock(self):
+        test_clock = Clock()
+        test_clock.freeze(datetime(2021, 3, 1, 4, 30))
+        self.assertEqual(date(2021, 3, 1), test_clock.today())
+        self.assertEqual(date(2021, 3, 2), test_clock.tomorrow())
+        self.assertTrue(test_clock.has_passed(4))
+        self.assertFalse(test_clock.has_passed(5))
+
+        test_clock.unfreeze()
+        self.assertEqual(date.today(), test_clock.today())
+
+    def test_dates_use_the_clock(self):
+        clock.freeze(datetime(2021, 3, 1, 12))
+        try:
+            self.assertEqual(Date.today(), date(2021, 3, 1))
+            self.assertEqual(Date('2021-03-11').days_left(), 10)
+            self.assertEqual(Date.soon().date(), date(2021, 3, 16))
+            self.assertTrue(Date('2021-03-16') == Date.soon())
+        finally:
+            clock.unfreeze()
@@ -16,6 +16,7 @@
 # this program.  If not, see <http://www.gnu.org/licenses/>.
 # -----------------------------------------------------------------------------
 
+from collections import Counter
 from unittest import TestCase
 import configparser
 
@@ -183,3 +184,21 @@ class TestSectionConfig(TestCase):
         self.assertEqual('1,2', config['list'])
         # Automatically saved value
         save_mock.assert_any_call()
+
+    def test_generation_changes_with_values(self):
+        config = self.make_section_config({})
+        section = SectionConfig('Name', config, {}, Mock())
+        generation = section.generation
+        section.set('option', 42)
+        self.assertNotEqual(generation, section.generation)
+
+    def test_generation_is_shared_by_section(self):
+        generations = Counter()
+        config = self.make_section_config({})
+        section = SectionConfig('Name', config, {}, Mock(), generations)
+        other = SectionConfig('Name', config, {}, Mock(), generations)
+        task = SectionConfig('Task', config, {}, Mock(), generations)
+
+        section.set('option', 42)
+        self.assertEqual(1, other.generation)
+        self.assertEqual(0, task.generation)
@@ -0,0 +1,99 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) 2008-2014 - Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+from datetime import date, datetime
+from unittest import TestCase
+
+from GTG.core.clock import clock
+from GTG.core.date_boundaries import DateBoundaries
+from GTG.core.dates import Date
+from tests.fakes import FakeTask, FakeTree
+
+
+def ordinal(text):
+    return date.fromisoformat(text).toordinal()
+
+
+class FakeDatedTask(FakeTask):
+
+    def __init__(self, tid, tree, due_date="", start_date=""):
+        super().__init__(tid, due_date=due_date)
+        self.start_date = Date.parse(start_date)
+        self.tree = tree
+
+    def get_start_date(self):
+        return self.start_date
+
+    def modified(self):
+        self.tree.modify_node(self)
+
+
+class TestDateBoundaries(TestCase):
+
+    def setUp(self):
+        clock.freeze(datetime(2021, 3, 1, 12))
+        self.tree = FakeTree()
+        self.boundaries = DateBoundaries(self.tree)
+        self.modified = []
+        self.tree.register_cllbck('node-modified', self.modified.append)
+
+    def tearDown(self):
+        clock.unfreeze()
+
+    def add(self, tid, **kwargs):
+        task = FakeDatedTask(tid, self.tree, **kwargs)
+        self.tree.add_node(task)
+        return task
+
+    def test_next_day(self):
+        self.add('start', start_date='2021-03-05')
+        self.add('due', due_date='2021-03-10')
+        self.add('late', due_date='2021-02-01')
+        self.add('fuzzy', due_date='soon', start_date='someday')
+
+        self.assertEqual(ordinal('2021-03-05'),
+                         self.boundaries.get_next_day('start'))
+        self.assertEqual(ordinal('2021-03-09'),
+                         self.boundaries.get_next_day('due'))
+        self.assertIsNone(self.boundaries.get_next_day('late'))
+        self.assertIsNone(self.boundaries.get_next_day('fuzzy'))
+
+    def test_only_crossed_tasks_are_refreshed(self):
+        self.add('a', due_date='2021-03-03')
+        self.add('b', due_date='2021-04-01')
+        self.add('c', start_date='2021-03-02')
+
+        clock.freeze(datetime(2021, 3, 2, 0, 1))
+        self.assertEqual({'a', 'c'}, set(self.boundaries.refresh()))
+        self.assertEqual({'a', 'c'}, set(self.modified))
+        self.assertEqual(ordinal('2021-03-03'),
+                         self.boundaries.get_next_day('a'))
+
+        # Several days later, e.g. after a suspend
+        clock.freeze(datetime(2021, 3, 10))
+        self.assertEqual({'a', 'c'}, set(self.boundaries.refresh()))
+        self.assertIsNone(self.boundaries.get_next_day('a'))
+
+    def test_modified_task_is_scheduled_again(self):
+        task = self.add('a', due_date='2021-03-03')
+        task.due_date = Date.parse('2021-05-03')
+        self.tree.modify_node(task)
+        self.assertEqual([], self.boundaries.pop_due(ordinal('2021-03-04')))
+
+        self.tree.del_node('a')
+        self.assertEqual([], self.boundaries.pop_due(ordinal('2021-06-01')))
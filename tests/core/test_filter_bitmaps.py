@@ -0,0 +1,150 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) 2008-2014 - Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+from unittest import TestCase
+
+from GTG.core.filter_bitmaps import FilterBitmaps, TaskOrdinals, iter_bits
+from GTG.core.tag_closure import TagClosure
+from tests.fakes import FakeTag, FakeTask, FakeTree
+
+
+def tag_filter(task, parameters):
+    return parameters['tag'] in task.get_tags_name()
+
+
+def active(task, parameters=None):
+    return task.get_status() == task.STA_ACTIVE
+
+
+class TestTaskOrdinals(TestCase):
+
+    def test_ordinals_are_dense(self):
+        ordinals = TaskOrdinals()
+        self.assertEqual([0, 1, 2], [ordinals.add(t) for t in 'abc'])
+        self.assertEqual(1, ordinals.add('b'))
+        self.assertEqual(0b111, ordinals.used)
+
+    def test_ordinals_are_reused(self):
+        ordinals = TaskOrdinals()
+        for tid in 'abc':
+            ordinals.add(tid)
+        self.assertEqual(1, ordinals.remove('b'))
+        self.assertEqual(0b101, ordinals.used)
+        self.assertIsNone(ordinals.get('b'))
+
+        self.assertEqual(1, ordinals.add('d'))
+        self.assertEqual('d', ordinals.get_tid(1))
+
+    def test_iter_bits(self):
+        self.assertEqual([], list(iter_bits(0)))
+        self.assertEqual([0, 3, 70], list(iter_bits(1 | 1 << 3 | 1 << 70)))
+
+
+class TestFilterBitmaps(TestCase):
+
+    def setUp(self):
+        self.tree = FakeTree()
+        self.bitmaps = FilterBitmaps(self.tree)
+        self.bitmaps.add_filter('home', tag_filter, {'tag': 'home'})
+        self.bitmaps.add_filter('work', tag_filter, {'tag': 'work'})
+        self.bitmaps.add_filter('active', active)
+        self.bitmaps.add_filter('closed', lambda t, p=None: not active(t),
+                                {'flat': True})
+
+        self.tree.add_node(FakeTask('1', tags=['home']))
+        self.tree.add_node(FakeTask('2', tags=['home', 'work']))
+        self.tree.add_node(FakeTask('3', tags=['work'], status='Done'))
+
+    def matching(self, *names):
+        bitmap = self.bitmaps.combine(names)
+        return set(self.bitmaps.get_tasks(bitmap))
+
+    def test_combine(self):
+        self.assertEqual({'1', '2'}, self.matching('home'))
+        self.assertEqual({'2'}, self.matching('home', 'work'))
+        self.assertEqual({'2'}, self.matching('work', 'active'))
+        self.assertEqual({'1', '2', '3'}, self.matching())
+
+    def test_unknown_filter_is_ignored(self):
+        self.assertEqual({'1', '2'}, self.matching('home', 'unknown'))
+
+    def test_bitmaps_follow_modifications(self):
+        self.assertEqual({'1', '2'}, self.matching('home', 'active'))
+
+        self.tree.get_node('1').status = 'Done'
+        self.tree.modify_node(self.tree.get_node('1'))
+        self.tree.add_node(FakeTask('4', tags=['home']))
+        self.tree.del_node('2')
+
+        self.assertEqual({'4'}, self.matching('home', 'active'))
+        self.assertEqual({'1', '3'}, self.matching('closed'))
+
+    def test_only_modified_task_is_tested(self):
+        calls = []
+
+        def counting_filter(task, parameters=None):
+            calls.append(task.get_id())
+            return True
+
+        self.bitmaps.add_filter('all', counting_filter)
+        self.matching('all')
+        del calls[:]
+
+        self.tree.modify_node(self.tree.get_node('2'))
+        self.matching('all')
+        self.assertEqual(['2'], calls)
+
+    def test_set_parameters(self):
+        self.assertEqual({'1', '2'}, self.matching('home'))
+        self.bitmaps.set_parameters('home', {'tag': 'work'})
+        self.assertEqual({'2', '3'}, self.matching('home'))
+
+    def test_is_flat(self):
+        self.assertTrue(self.bitmaps.is_flat(['home', 'closed']))
+        self.assertFalse(self.bitmaps.is_flat(['home', 'active']))
+
+    def test_view_filter(self):
+        name = self.bitmaps.get_view_filter('active')
+        self.assertEqual(name, self.bitmaps.get_view_filter('active'))
+        func, _ = self.tree.filters[name]
+
+        parameters = {'filters': ('home', 'active')}
+        self.assertTrue(func(self.tree.get_node('1'), parameters))
+        self.assertFalse(func(self.tree.get_node('3'), parameters))
+        # Tasks which are not indexed are evaluated directly
+        self.assertTrue(func(FakeTask('5', tags=['home']), parameters))
+
+    def test_bitmaps_follow_tag_hierarchy(self):
+        tags = FakeTree()
+        closure = TagClosure(tags)
+        tags.add_node(FakeTag('home'))
+        tags.add_node(FakeTag('garden'))
+        self.bitmaps.set_tag_closure(closure)
+
+        def has_tag(task, parameters):
+            effective = closure.get_effective_tags(tuple(task.tags))
+            return parameters['tag'] in effective
+
+        self.bitmaps.add_filter('home', has_tag, {'tag': 'home'})
+        self.tree.add_node(FakeTask('4', tags=['garden']))
+        self.assertEqual({'1', '2'}, self.matching('home'))
+
+        garden = tags.get_node('garden')
+        garden.parents = ['home']
+        tags.modify_node(garden)
+        self.assertEqual({'1', '2', '4'}, self.matching('home'))
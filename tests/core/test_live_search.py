@@ -0,0 +1,161 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) 2008-2014 - Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+from unittest import TestCase
+
+from GTG.core.live_search import LiveSearch, SearchJob
+from GTG.core.search import InvalidQuery
+from tests.fakes import FakeTask, FakeTree
+
+
+class TestLiveSearch(TestCase):
+
+    def setUp(self):
+        self.tree = FakeTree()
+        self.tasks = [FakeTask('1', 'buy milk'),
+                      FakeTask('2', 'buy bread'),
+                      FakeTask('3', 'write report')]
+        for task in self.tasks:
+            self.tree.add_node(task)
+        self.search = LiveSearch(self.tree)
+
+    def reset_counters(self):
+        for task in self.tasks:
+            task.tested = 0
+
+    def test_search(self):
+        parameters = self.search.search('buy')
+        self.assertEqual({'1', '2'}, self.search.get_matches('buy'))
+        self.assertTrue(self.search.filter(self.tasks[0], parameters))
+        self.assertFalse(self.search.filter(self.tasks[2], parameters))
+
+    def test_search_matches_body_text(self):
+        self.tree.add_node(FakeTask('4', 'errands', text='Buy stamps'))
+        self.search.search('buy')
+        self.assertEqual({'1', '2', '4'}, self.search.get_matches('buy'))
+        self.search.search('buy stamps')
+        self.assertEqual({'4'}, self.search.get_matches('buy stamps'))
+
+    def test_refinement_tests_only_previous_matches(self):
+        self.search.search('bu')
+        self.reset_counters()
+
+        self.search.search('buy m')
+        self.assertEqual({'1'}, self.search.get_matches('buy m'))
+        self.assertEqual(0, self.tasks[2].tested)
+
+    def test_cached_query_is_not_evaluated(self):
+        self.search.search('buy')
+        self.search.search('buy milk')
+        self.reset_counters()
+
+        self.search.search('buy')
+        self.assertEqual([0, 0, 0], [task.tested for task in self.tasks])
+
+    def test_cached_results_follow_modifications(self):
+        self.search.search('buy')
+        self.tasks[2].title = 'buy paper'
+        self.tree.modify_node(self.tasks[2])
+        self.tree.add_node(FakeTask('4', 'buy eggs'))
+        self.tree.del_node('1')
+
+        self.assertEqual({'2', '3', '4'}, self.search.get_matches('buy'))
+
+    def test_cache_size(self):
+        for word in ['a', 'b', 'c', 'd', 'e', 'f']:
+            self.search.search(word)
+
+        self.assertIsNone(self.search.get_matches('a'))
+        self.assertIsNotNone(self.search.get_matches('f'))
+
+    def test_filter_without_cached_result(self):
+        parameters = self.search.search('milk')
+        self.search.clear()
+        self.assertTrue(self.search.filter(self.tasks[0], parameters))
+        self.assertFalse(self.search.filter(self.tasks[1], parameters))
+        self.assertFalse(self.search.filter(self.tasks[1], {}))
+
+    def test_invalid_query(self):
+        with self.assertRaises(InvalidQuery):
+            self.search.search('!not')
+
+
+class TestSearchJob(TestCase):
+
+    def setUp(self):
+        self.tree = FakeTree()
+        for i in range(5):
+            self.tree.add_node(FakeTask(str(i), 'task %d' % i))
+        self.search = LiveSearch(self.tree)
+        self.progress = []
+        # Test a single task per step
+        self.slice = SearchJob.TIME_SLICE
+        SearchJob.TIME_SLICE = 0
+
+    def tearDown(self):
+        SearchJob.TIME_SLICE = self.slice
+
+    def test_job_runs_in_steps(self):
+        job = self.search.start_search('task', self.progress.append)
+        steps = 0
+        while job.step():
+            steps += 1
+            self.assertFalse(job.done)
+
+        # One step per task, the last one notices there is nothing left
+        self.assertEqual(5, steps)
+        self.assertTrue(job.done)
+        self.assertEqual({'0', '1', '2', '3', '4'}, job.matches)
+        self.assertEqual([job], self.progress)
+
+    def test_partial_results_are_filtered(self):
+        job = self.search.start_search('task')
+        job.step()
+        job.step()
+
+        self.assertEqual(2, len(self.search.get_matches('task')))
+        matching = [tid for tid in self.tree.get_all_nodes()
+                    if self.search.filter(self.tree.get_node(tid),
+                                          job.parameters)]
+        self.assertEqual(2, len(matching))
+
+    def test_cancelled_job(self):
+        job = self.search.start_search('task', self.progress.append)
+        job.step()
+        job.cancel()
+
+        self.assertTrue(job.is_cancelled())
+        self.assertIsNone(job.step())
+        self.assertIsNone(self.search.get_matches('task'))
+        self.assertEqual([], self.progress)
+
+    def test_partial_result_is_not_refined(self):
+        job = self.search.start_search('task')
+        job.step()
+
+        self.search.search('task 4')
+        self.assertEqual({'4'}, self.search.get_matches('task 4'))
+
+    def test_cached_query_is_done_immediately(self):
+        self.search.search('task 1')
+        job = self.search.start_search('task 1', self.progress.append)
+
+        self.assertTrue(job.done)
+        self.assertFalse(job.step())
+        self.assertEqual({'1'}, job.matches)
+        self.assertEqual([job], self.progress)
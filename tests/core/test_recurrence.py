@@ -0,0 +1,89 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) 2008-2014 - Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+from datetime import date, timedelta
+import random
+from unittest import TestCase
+
+from GTG.core.dates import Date
+from GTG.core.recurrence import compile_term, PeriodRule, StepRule
+
+
+def iterative_next_occurrence(term, due_date, today):
+    """ Reference implementation, one parse per occurrence """
+    nextdate = due_date.parse_from_date(term, newtask=False)
+    if today <= due_date:
+        while nextdate <= due_date:
+            nextdate = nextdate.parse_from_date(term, newtask=False)
+    else:
+        while nextdate < today:
+            nextdate = nextdate.parse_from_date(term, newtask=False)
+    return nextdate
+
+
+class TestRecurrence(TestCase):
+
+    TERMS = ['day', 'other-day', 'week', 'month', 'year', 'Monday',
+             'wednesday', 'sunday', '1', '15', '31', '0301', '1231']
+
+    def test_same_occurrences_as_parsing(self):
+        rand = random.Random(42)
+        first_day = date(1999, 1, 1).toordinal()
+        for _ in range(40):
+            due_date = Date(date.fromordinal(
+                first_day + rand.randrange(12000)))
+            today = due_date.date() + timedelta(rand.randrange(-40, 120))
+            for term in self.TERMS:
+                expected = iterative_next_occurrence(term, due_date, today)
+                result = compile_term(term).next_occurrence(due_date, today)
+                self.assertEqual(expected, result,
+                                 f"{term} due {due_date} today {today}")
+
+    def test_months_and_years_over_long_periods(self):
+        rand = random.Random(42)
+        first_day = date(1999, 1, 1).toordinal()
+        for _ in range(40):
+            due_date = Date(date.fromordinal(
+                first_day + rand.randrange(12000)))
+            today = due_date.date() + timedelta(rand.randrange(3000))
+            for term in ['month', 'year']:
+                expected = iterative_next_occurrence(term, due_date, today)
+                result = compile_term(term).next_occurrence(due_date, today)
+                self.assertEqual(expected, result,
+                                 f"{term} due {due_date} today {today}")
+
+    def test_common_terms_are_computed(self):
+        self.assertIsInstance(compile_term('week'), PeriodRule)
+        self.assertIsInstance(compile_term('Friday'), PeriodRule)
+        self.assertIsInstance(compile_term('15'), StepRule)
+
+    def test_jump_over_missed_occurrences(self):
+        rule = compile_term('other-day')
+        due_date = Date(date(2000, 1, 1))
+        self.assertEqual(Date(date(2020, 1, 2)),
+                         rule.next_occurrence(due_date, date(2020, 1, 1)))
+
+    def test_done_before_due_date(self):
+        rule = compile_term('week')
+        due_date = Date(date(2020, 1, 10))
+        self.assertEqual(Date(date(2020, 1, 17)),
+                         rule.next_occurrence(due_date, date(2020, 1, 1)))
+
+    def test_invalid_term(self):
+        with self.assertRaises(ValueError):
+            compile_term('every blue moon')
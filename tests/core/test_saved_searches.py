@@ -0,0 +1,136 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) 2008-2014 - Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+from unittest import TestCase
+
+from GTG.core.dates import Date
+from GTG.core.saved_searches import SavedSearches
+from GTG.core.search import InvalidQuery
+from tests.fakes import FakeTask, FakeTree
+
+
+class TestSavedSearches(TestCase):
+
+    def setUp(self):
+        self.tree = FakeTree()
+        self.changed = []
+        self.searches = SavedSearches(self.tree, self.changed.append)
+
+    def test_existing_tasks_are_evaluated(self):
+        self.tree.add_node(FakeTask('1', 'buy milk'))
+        self.tree.add_node(FakeTask('2', 'write report'))
+        self.searches.add('s', 'buy')
+
+        self.assertEqual({'1'}, self.searches.get_matches('s'))
+        self.assertEqual(1, self.searches.get_count('s'))
+
+    def test_body_text_is_matched(self):
+        task = FakeTask('1', 'call', text='Ask the Plumber for a quote')
+        self.tree.add_node(task)
+        self.tree.add_node(FakeTask('2', 'plumbing'))
+        self.searches.add('s', 'plumber')
+        self.assertEqual({'1'}, self.searches.get_matches('s'))
+
+        task.text = 'Ask the electrician'
+        self.tree.modify_node(task)
+        self.assertEqual(set(), self.searches.get_matches('s'))
+
+    def test_new_task_is_added_to_results(self):
+        self.searches.add('s', '@home')
+        self.tree.add_node(FakeTask('1', tags=['home']))
+
+        self.assertTrue(self.searches.is_match('s', '1'))
+        self.assertEqual(['s'], self.changed)
+
+    def test_only_modified_task_is_tested(self):
+        tasks = [FakeTask(str(i), 'task') for i in range(10)]
+        for task in tasks:
+            self.tree.add_node(task)
+        self.searches.add('s', 'task')
+        for task in tasks:
+            task.tested = 0
+
+        tasks[3].title = 'something else'
+        self.tree.modify_node(tasks[3])
+
+        self.assertEqual(9, self.searches.get_count('s'))
+        self.assertEqual([0, 0, 0, 1, 0, 0, 0, 0, 0, 0],
+                         [task.tested for task in tasks])
+
+    def test_closed_tasks_are_not_counted_as_active(self):
+        self.searches.add('s', 'task')
+        task = FakeTask('1', 'task')
+        self.tree.add_node(task)
+        task.status = 'Done'
+        self.tree.modify_node(task)
+
+        self.assertEqual(0, self.searches.get_count('s'))
+        self.assertEqual(1, self.searches.get_count('s', active_only=False))
+
+    def test_deleted_task_is_removed(self):
+        self.searches.add('s', 'task')
+        self.tree.add_node(FakeTask('1', 'task'))
+        self.tree.del_node('1')
+
+        self.assertEqual(set(), self.searches.get_matches('s'))
+
+    def test_filter(self):
+        self.searches.add('s', 'task')
+        task = FakeTask('1', 'task')
+        self.tree.add_node(task)
+
+        self.assertTrue(self.searches.filter(task, {'name': 's'}))
+        self.assertFalse(self.searches.filter(task, {'name': 'unknown'}))
+
+    def test_removed_search(self):
+        self.searches.add('s', 'task')
+        self.tree.add_node(FakeTask('1', 'task'))
+        self.searches.remove('s')
+
+        self.assertFalse(self.searches.has_search('s'))
+        self.assertEqual(0, self.searches.get_count('s'))
+
+    def test_searches_for_task(self):
+        self.searches.add('b', 'milk')
+        self.searches.add('a', 'buy')
+        task = FakeTask('1', 'buy milk')
+        self.tree.add_node(task)
+        self.assertEqual(('a', 'b'), self.searches.get_searches_for_task('1'))
+
+        task.title = 'buy bread'
+        self.tree.modify_node(task)
+        self.assertEqual(('a',), self.searches.get_searches_for_task('1'))
+
+        self.searches.remove('a')
+        self.assertEqual((), self.searches.get_searches_for_task('1'))
+
+    def test_date_relative_search_is_refreshed(self):
+        task = FakeTask('1', due_date='today')
+        self.tree.add_node(task)
+        self.searches.add('s', '!today')
+        self.assertTrue(self.searches.is_match('s', '1'))
+
+        # Simulate a new day without modifying the task
+        task.due_date = Date.parse('tomorrow')
+        self.assertTrue(self.searches.is_match('s', '1'))
+        self.searches.refresh_date_relative()
+        self.assertFalse(self.searches.is_match('s', '1'))
+
+    def test_invalid_query(self):
+        with self.assertRaises(InvalidQuery):
+            self.searches.add('s', '!or')
@@ -38,6 +38,9 @@ class FakeTask():
     def get_excerpt(self, strip_tags=False):
         return self.body
 
+    def get_search_text(self):
+        return self.body.lower()
+
     def get_tags_name(self):
         return self.tags
 
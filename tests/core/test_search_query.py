@@ -18,6 +18,7 @@
 
 from unittest import TestCase
 from GTG.core.search import parse_search_query, InvalidQuery
+from GTG.core.search import is_refinement, is_date_relative
 from GTG.core.dates import Date
 
 parse = parse_search_query
@@ -219,3 +220,50 @@ class TestSearchQuery(TestCase):
                          {'q': [('today', False)]})
         self.assertEqual(parse('word !today'),
                          {'q': [('word', True, 'word'), ('today', True)]})
+
+
+class TestSearchRefinement(TestCase):
+
+    def assertRefines(self, old, new):
+        self.assertTrue(is_refinement(parse(old), parse(new)))
+
+    def assertNotRefines(self, old, new):
+        self.assertFalse(is_refinement(parse(old), parse(new)))
+
+    def test_longer_word(self):
+        self.assertRefines('mil', 'milk')
+        self.assertRefines('milk', 'milk')
+        self.assertNotRefines('milk', 'mil')
+        self.assertNotRefines('milk', 'silk')
+
+    def test_additional_term(self):
+        self.assertRefines('milk', 'milk @errands')
+        self.assertRefines('@errands', 'buy @errands')
+        self.assertRefines('buy', 'buy !today')
+        self.assertNotRefines('milk @errands', 'milk')
+
+    def test_negative_word(self):
+        self.assertRefines('!not milk', '!not mil')
+        self.assertNotRefines('!not mil', '!not milk')
+
+    def test_tags_are_not_prefixes(self):
+        self.assertNotRefines('@gt', '@gtg')
+
+    def test_or(self):
+        self.assertRefines('@a !or @b', '@a')
+        self.assertRefines('@a !or @b !or @c', '@a !or @b')
+        self.assertNotRefines('@a', '@a !or @b')
+        self.assertNotRefines('@a !or @b', '@c')
+
+
+class TestDateRelativeQuery(TestCase):
+
+    def test_date_relative(self):
+        self.assertTrue(is_date_relative(parse('!today')))
+        self.assertTrue(is_date_relative(parse('@gtg !before "next month"')))
+        self.assertTrue(is_date_relative(parse('@a !or !not !soon')))
+
+    def test_not_date_relative(self):
+        self.assertFalse(is_date_relative(parse('@gtg')))
+        self.assertFalse(is_date_relative(parse('buy !or @errands')))
+        self.assertFalse(is_date_relative(parse('!notag')))
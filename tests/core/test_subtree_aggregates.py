@@ -0,0 +1,165 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) 2008-2014 - Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+from unittest import TestCase
+
+from GTG.core.dates import Date
+from GTG.core.subtree_aggregates import SubtreeAggregates
+from tests.fakes import FakeTask, FakeTree
+
+
+class FakeNode(FakeTask):
+
+    def __init__(self, tid, due_date="", status="Active"):
+        super().__init__(tid, due_date=due_date, status=status)
+        self.parents = []
+        self.children = []
+
+    def get_parents(self):
+        return self.parents
+
+    def get_children(self):
+        return self.children
+
+
+class TestSubtreeAggregates(TestCase):
+
+    def setUp(self):
+        self.tree = FakeTree()
+        self.aggregates = SubtreeAggregates(self.tree)
+        # root -> a -> a1
+        #      -> b
+        self.root = self.add('root', due_date='2030-12-31')
+        self.a = self.add('a', 'root', due_date='2030-06-01')
+        self.a1 = self.add('a1', 'a', due_date='2030-03-01')
+        self.b = self.add('b', 'root')
+
+    def add(self, tid, parent_id=None, **kwargs):
+        node = FakeNode(tid, **kwargs)
+        self.tree.add_node(node)
+        if parent_id is not None:
+            parent = self.tree.get_node(parent_id)
+            node.parents.append(parent_id)
+            parent.children.append(tid)
+            self.tree.modify_node(parent)
+        return node
+
+    def test_aggregates(self):
+        self.assertEqual(Date.parse('2030-03-01'),
+                         self.aggregates.get_urgent_date(self.root))
+        self.assertEqual(2, self.aggregates.get_active_children_count(
+            self.root))
+        self.assertEqual(3, self.aggregates.get_active_descendants_count(
+            self.root))
+        self.assertEqual(0, self.aggregates.get_active_descendants_count(
+            self.b))
+
+    def test_modified_subtask_updates_ancestors(self):
+        self.aggregates.get_urgent_date(self.root)
+
+        self.a1.status = 'Done'
+        self.tree.modify_node(self.a1)
+
+        self.assertEqual(Date.parse('2030-06-01'),
+                         self.aggregates.get_urgent_date(self.root))
+        self.assertEqual(2, self.aggregates.get_active_descendants_count(
+            self.root))
+        self.assertEqual(0, self.aggregates.get_active_children_count(self.a))
+
+    def test_due_date_change(self):
+        self.b.due_date = Date.parse('2030-01-01')
+        self.tree.modify_node(self.b)
+
+        self.assertEqual(Date.parse('2030-01-01'),
+                         self.aggregates.get_urgent_date(self.root))
+        self.assertEqual(Date.parse('2030-03-01'),
+                         self.aggregates.get_urgent_date(self.a))
+
+    def test_deleted_subtask(self):
+        self.aggregates.get_urgent_date(self.root)
+
+        self.a.children.remove('a1')
+        self.tree.del_node('a1')
+
+        self.assertEqual(Date.parse('2030-06-01'),
+                         self.aggregates.get_urgent_date(self.root))
+        self.assertEqual(2, self.aggregates.get_active_descendants_count(
+            self.root))
+
+    def test_workable(self):
+        self.assertFalse(self.aggregates.is_workable(self.a))
+        self.assertTrue(self.aggregates.is_workable(self.b))
+
+        self.a1.status = 'Done'
+        self.tree.modify_node(self.a1)
+        self.assertTrue(self.aggregates.is_workable(self.a))
+
+        self.a1.status = 'Active'
+        self.tree.modify_node(self.a1)
+        self.a.children.remove('a1')
+        self.a1.parents.remove('a')
+        self.b.children.append('a1')
+        self.a1.parents.append('b')
+        self.tree.modify_node(self.a1)
+        self.assertTrue(self.aggregates.is_workable(self.a))
+        self.assertFalse(self.aggregates.is_workable(self.b))
+
+    def test_urgent_descendant(self):
+        self.assertEqual('a1', self.aggregates.get_urgent_descendant(
+            self.root))
+        self.assertIsNone(self.aggregates.get_urgent_descendant(self.a1))
+        self.assertIsNone(self.aggregates.get_urgent_descendant(self.b))
+
+        # Active subtasks of a closed task still count
+        self.a.status = 'Done'
+        self.tree.modify_node(self.a)
+        self.assertEqual('a1', self.aggregates.get_urgent_descendant(
+            self.root))
+
+        self.a1.status = 'Done'
+        self.tree.modify_node(self.a1)
+        self.assertIsNone(self.aggregates.get_urgent_descendant(self.root))
+
+        self.b.due_date = Date.parse('soon')
+        self.tree.modify_node(self.b)
+        self.assertEqual('b', self.aggregates.get_urgent_descendant(
+            self.root))
+
+    def test_task_outside_of_tree(self):
+        node = FakeNode('new', due_date='2030-01-01')
+        node.children.append('a')
+
+        self.assertEqual(Date.parse('2030-01-01'),
+                         self.aggregates.get_urgent_date(node))
+        self.assertEqual(2, self.aggregates.get_active_descendants_count(
+            node))
+
+    def test_deep_hierarchy(self):
+        # Aggregates are computed when needed, without recursion
+        nodes = [FakeNode(f'deep{i}', due_date=f'2030-01-{i % 28 + 1:02}')
+                 for i in range(3000)]
+        for parent, child in zip(nodes, nodes[1:]):
+            parent.children.append(child.get_id())
+            child.parents.append(parent.get_id())
+        for node in nodes:
+            self.tree.nodes[node.get_id()] = node
+
+        self.assertEqual(2999, self.aggregates.get_active_descendants_count(
+            nodes[0]))
+        self.assertEqual(Date.parse('2030-01-01'),
+                         self.aggregates.get_urgent_date(nodes[0]))
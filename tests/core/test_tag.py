@@ -18,7 +18,9 @@
 
 from unittest import TestCase
 
+from GTG.core.saved_searches import SavedSearches
 from GTG.core.tag import Tag
+from tests.fakes import FakeTask, FakeTree
 
 
 class TestTag(TestCase):
@@ -66,3 +68,33 @@ class TestTag(TestCase):
 
         self.assertEqual('foo', self.tag.get_name())
         self.assertEqual('foo', self.tag.get_attribute('name'))
+
+
+class FakeRequester():
+
+    def __init__(self):
+        self.tasks = FakeTree()
+        self.saved_searches = SavedSearches(self.tasks)
+
+    def get_saved_searches(self):
+        return self.saved_searches
+
+
+class TestSearchTag(TestCase):
+
+    def setUp(self):
+        self.req = FakeRequester()
+        self.req.saved_searches.add('milk', 'milk')
+        self.tag = Tag('milk', self.req)
+        self.tag.is_search_tag = lambda: True
+
+    def test_only_active_tasks_are_counted(self):
+        self.req.tasks.add_node(FakeTask('1', 'buy milk', status='Done'))
+        self.assertEqual(0, self.tag.get_active_tasks_count())
+        self.assertEqual(0, self.tag.get_total_tasks_count())
+        self.assertFalse(self.tag.is_used())
+
+        self.req.tasks.add_node(FakeTask('2', 'drink milk'))
+        self.assertEqual(1, self.tag.get_active_tasks_count())
+        self.assertEqual(1, self.tag.get_total_tasks_count())
+        self.assertTrue(self.tag.is_used())
@@ -0,0 +1,87 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) 2008-2014 - Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+from unittest import TestCase
+
+from GTG.core.tag_closure import TagClosure
+from tests.fakes import FakeTag, FakeTree
+
+
+class TestTagClosure(TestCase):
+
+    def setUp(self):
+        self.tree = FakeTree()
+        self.closure = TagClosure(self.tree)
+        # @work -> @meeting -> @call
+        self.tree.add_node(FakeTag('@work'))
+        self.tree.add_node(FakeTag('@meeting', ['@work']))
+        self.tree.add_node(FakeTag('@call', ['@meeting']))
+        self.tree.add_node(FakeTag('@waiting', nonactionable=True))
+
+    def test_effective_tags(self):
+        self.assertEqual({'@call', '@meeting', '@work'},
+                         self.closure.get_effective_tags(('@call',)))
+        self.assertEqual({'@unknown'},
+                         self.closure.get_effective_tags(('@unknown',)))
+        self.assertEqual(set(), self.closure.get_effective_tags(()))
+
+    def test_reparented_tag(self):
+        self.closure.get_effective_tags(('@call',))
+
+        call = self.tree.get_node('@call')
+        call.parents = ['@waiting']
+        self.tree.modify_node(call)
+
+        self.assertEqual({'@call', '@waiting'},
+                         self.closure.get_effective_tags(('@call',)))
+
+    def test_nonactionable_tags(self):
+        self.assertEqual({'@waiting'}, self.closure.get_nonactionable_tags())
+
+        work = self.tree.get_node('@work')
+        work.attributes['nonactionable'] = 'True'
+        self.tree.modify_node(work)
+        self.assertEqual({'@waiting', '@work'},
+                         self.closure.get_nonactionable_tags())
+
+        self.tree.del_node('@waiting')
+        self.assertEqual({'@work'}, self.closure.get_nonactionable_tags())
+
+    def test_unrelated_modification_keeps_cache(self):
+        work = self.tree.get_node('@work')
+        self.tree.modify_node(work)
+        effective = self.closure.get_effective_tags(('@call',))
+
+        self.tree.modify_node(work)
+        self.assertIs(effective, self.closure.get_effective_tags(('@call',)))
+
+    def test_generation(self):
+        generation = self.closure.generation
+        work = self.tree.get_node('@work')
+        self.tree.modify_node(work)
+        self.tree.modify_node(work)
+        self.assertEqual(generation + 1, self.closure.generation)
+
+        # Attributes which are not cached keep the generation
+        work.attributes['color'] = '#ff0000'
+        self.tree.modify_node(work)
+        self.assertEqual(generation + 1, self.closure.generation)
+
+        work.attributes['nonactionable'] = 'True'
+        self.tree.modify_node(work)
+        self.assertEqual(generation + 2, self.closure.generation)
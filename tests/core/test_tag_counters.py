@@ -0,0 +1,103 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) 2008-2014 - Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+from unittest import TestCase
+
+from GTG.core.tag import ALLTASKS_TAG, NOTAG_TAG
+from GTG.core.tag_closure import TagClosure
+from GTG.core.tag_counters import TagCounters
+from tests.fakes import FakeTag, FakeTask, FakeTree
+
+
+class TestTagCounters(TestCase):
+
+    def setUp(self):
+        self.tags = FakeTree()
+        self.closure = TagClosure(self.tags)
+        self.tags.add_node(FakeTag('@work'))
+        self.tags.add_node(FakeTag('@meeting', ['@work']))
+        self.tasks = FakeTree()
+        self.changed = []
+        self.counters = TagCounters(self.tasks, self.closure,
+                                    self.changed.append)
+
+    def test_existing_tasks_are_counted(self):
+        self.tasks.add_node(FakeTask('1', tags=['@meeting']))
+        self.tasks.add_node(FakeTask('2', tags=['@work']))
+        self.tasks.add_node(FakeTask('3'))
+        self.tasks.add_node(FakeTask('4', tags=['@work'], status='Done'))
+
+        self.assertEqual(1, self.counters.get_count('@meeting'))
+        self.assertEqual(2, self.counters.get_count('@work'))
+        self.assertEqual(1, self.counters.get_count(NOTAG_TAG))
+        self.assertEqual(3, self.counters.get_count(ALLTASKS_TAG))
+        self.assertEqual(0, self.counters.get_count('@home'))
+
+    def test_only_changed_tags_are_signaled(self):
+        self.counters.get_count('@work')
+        task = FakeTask('1', tags=['@meeting'])
+        self.tasks.add_node(task)
+        self.assertEqual({'@meeting', '@work', ALLTASKS_TAG},
+                         set(self.changed))
+
+        self.changed.clear()
+        task.tags = ['@work']
+        self.tasks.modify_node(task)
+        self.assertEqual(['@meeting'], self.changed)
+        self.assertEqual(0, self.counters.get_count('@meeting'))
+        self.assertEqual(1, self.counters.get_count('@work'))
+
+        self.changed.clear()
+        task.status = 'Done'
+        self.tasks.modify_node(task)
+        self.assertEqual({'@work', ALLTASKS_TAG}, set(self.changed))
+
+        self.changed.clear()
+        self.tasks.del_node('1')
+        self.assertEqual([], self.changed)
+        self.assertEqual(0, self.counters.get_count(ALLTASKS_TAG))
+
+    def test_hierarchy_change(self):
+        self.tasks.add_node(FakeTask('1', tags=['@call']))
+        self.assertEqual(0, self.counters.get_count('@work'))
+
+        self.tags.add_node(FakeTag('@call', ['@meeting']))
+        self.assertEqual(1, self.counters.get_count('@work'))
+        self.tasks.del_node('1')
+        self.assertEqual(0, self.counters.get_count('@work'))
+
+    def test_hierarchy_change_is_signaled(self):
+        self.tasks.add_node(FakeTask('1', tags=['@call']))
+        self.tasks.add_node(FakeTask('2', tags=['@meeting']))
+        self.counters.get_count('@work')
+        self.changed.clear()
+
+        self.tags.add_node(FakeTag('@call', ['@meeting']))
+        self.counters.get_count('@call')
+        self.assertEqual({'@meeting', '@work'}, set(self.changed))
+
+    def test_task_change_counts_hierarchy_change(self):
+        self.tasks.add_node(FakeTask('1', tags=['@call']))
+        self.counters.get_count('@work')
+        self.changed.clear()
+
+        self.tags.add_node(FakeTag('@call', ['@meeting']))
+        self.tasks.add_node(FakeTask('2', tags=['@meeting']))
+        self.assertEqual({'@meeting', '@work', ALLTASKS_TAG},
+                         set(self.changed))
+        self.assertEqual(2, self.counters.get_count('@work'))
@@ -0,0 +1,205 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) 2008-2014 - Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+import random
+from unittest import TestCase
+
+from liblarch import Tree
+from mock import patch
+
+from GTG.core.dates import Date
+from GTG.core.task import Task
+
+
+class FakeRequester():
+    """ Just enough of the requester for tasks in a tree """
+
+    def __init__(self, tree):
+        self.tree = tree
+
+    def get_task(self, tid):
+        return self.tree.get_node(tid)
+
+    def get_tag(self, tagname):
+        return None
+
+
+def make_task(tree, tid):
+    task = Task(tid, FakeRequester(tree))
+    tree.add_node(task)
+    return task
+
+
+def reference_set_due_date(task, new_duedate, synced):
+    """ Former recursive propagation of due dates, the ids of synced
+    tasks are added to synced """
+    req = task.req
+
+    def get_defined_relatives(task, relation):
+        relatives = []
+        for tid in getattr(task, relation):
+            relative = req.get_task(tid)
+            if relative.get_due_date().is_fuzzy():
+                relatives += get_defined_relatives(relative, relation)
+            else:
+                relatives.append(relative)
+        return relatives
+
+    def recursive_sync(task):
+        synced.add(task.tid)
+        for sub_id in task.children:
+            recursive_sync(req.get_task(sub_id))
+
+    old_due_date = task.due_date
+    new_duedate_obj = Date(new_duedate)
+    task.due_date = new_duedate_obj
+    if not new_duedate_obj.is_fuzzy():
+        for par in get_defined_relatives(task, 'parents'):
+            if par.get_due_date() < new_duedate_obj:
+                reference_set_due_date(par, new_duedate, synced)
+        for sub in get_defined_relatives(task, 'children'):
+            if sub.get_due_date() > new_duedate_obj:
+                reference_set_due_date(sub, new_duedate, synced)
+            sub_startdate = sub.get_start_date()
+            if not sub_startdate.is_fuzzy() and \
+                    sub_startdate > new_duedate_obj:
+                sub.start_date = Date(new_duedate)
+                synced.add(sub.tid)
+    if old_due_date != new_duedate_obj:
+        recursive_sync(task)
+
+
+class TestTaskExcerpt(TestCase):
+
+    def setUp(self):
+        self.task = make_task(Tree(), '1')
+        self.task.set_text('Buy milk\n\n@shopping, bread')
+
+    def test_excerpt(self):
+        self.assertEqual('Buy milk', self.task.get_excerpt(lines=1))
+        self.assertEqual('Buy', self.task.get_excerpt(lines=1, char=3))
+        self.assertEqual('Buy milk\n@shopping, bread',
+                         self.task.get_excerpt(lines=2))
+
+    def test_excerpt_without_limit(self):
+        self.assertEqual('Buy milk\n@shopping, bread',
+                         self.task.get_excerpt())
+        self.assertEqual('buy milk\n@shopping, bread',
+                         self.task.get_search_text())
+
+    def test_excerpt_is_cached(self):
+        with patch.object(Task, '_make_excerpt',
+                          return_value='cached') as make_excerpt:
+            self.assertEqual('cached', self.task.get_excerpt(lines=1))
+            self.assertEqual('cached', self.task.get_excerpt(lines=1))
+            self.assertEqual(1, make_excerpt.call_count)
+
+            self.task.get_excerpt(lines=2)
+            self.assertEqual(2, make_excerpt.call_count)
+
+    def test_excerpt_changes_after_set_text(self):
+        version = self.task.get_content_version()
+        self.task.get_excerpt(lines=1)
+        self.task.get_search_text()
+
+        self.task.set_text('Call Mom')
+        self.assertEqual('Call Mom', self.task.get_excerpt(lines=1))
+        self.assertEqual(self.task.get_excerpt().lower(),
+                         self.task.get_search_text())
+        self.assertEqual(version + 1, self.task.get_content_version())
+
+    def test_excerpt_changes_with_tags(self):
+        self.assertEqual('Buy milk\n@shopping, bread',
+                         self.task.get_excerpt(lines=2, strip_tags=True))
+
+        self.task.tag_added('shopping')
+        self.assertEqual('Buy milk\nbread',
+                         self.task.get_excerpt(lines=2, strip_tags=True))
+
+
+class TestDueDatePropagation(TestCase):
+
+    DATES = ['2030-01-01', '2030-02-01', '2030-03-01', '2030-04-01',
+             'soon', 'someday', '']
+
+    def make_dag(self, rand, size):
+        """ Return two identical random DAGs of tasks """
+        edges = [(parent, child) for child in range(1, size)
+                 for parent in range(child) if rand.random() < 0.4]
+        due_dates = [rand.choice(self.DATES) for _ in range(size)]
+        start_dates = [rand.choice(self.DATES) for _ in range(size)]
+
+        dags = []
+        for _ in range(2):
+            tree = Tree()
+            tasks = [make_task(tree, str(number)) for number in range(size)]
+            for task, due, start in zip(tasks, due_dates, start_dates):
+                task.due_date = Date(due)
+                task.start_date = Date(start)
+            for parent, child in edges:
+                tasks[parent].add_child(tasks[child].get_id())
+            dags.append(tasks)
+        return dags
+
+    def dates(self, tasks):
+        return [(task.get_due_date(), task.get_start_date())
+                for task in tasks]
+
+    def test_same_dates_and_syncs_as_recursion(self):
+        rand = random.Random(42)
+        for _ in range(300):
+            size = rand.randint(2, 8)
+            expected_tasks, tasks = self.make_dag(rand, size)
+            picked = rand.randrange(size)
+            new_date = rand.choice(self.DATES)
+
+            expected_synced = set()
+            reference_set_due_date(expected_tasks[picked], new_date,
+                                   expected_synced)
+
+            synced = []
+            with patch.object(Task, 'sync', autospec=True,
+                              side_effect=lambda task: synced.append(
+                                  task.get_id())):
+                tasks[picked].set_due_date(new_date)
+
+            self.assertEqual(self.dates(expected_tasks), self.dates(tasks))
+            self.assertEqual(expected_synced, set(synced))
+            # Every task is synced once
+            self.assertEqual(len(synced), len(set(synced)))
+
+    def test_shared_child(self):
+        # a -> b -> d, a -> c -> d
+        tree = Tree()
+        a, b, c, d = [make_task(tree, tid) for tid in 'abcd']
+        for parent, child in ((a, b), (a, c), (b, d), (c, d)):
+            parent.add_child(child.get_id())
+        for task in (a, b, c, d):
+            task.due_date = Date('2030-06-01')
+        c.due_date = Date('soon')
+
+        synced = []
+        with patch.object(Task, 'sync', autospec=True,
+                          side_effect=lambda task: synced.append(
+                              task.get_id())):
+            a.set_due_date('2030-01-01')
+
+        self.assertEqual(Date('2030-01-01'), b.get_due_date())
+        self.assertEqual(Date('2030-01-01'), d.get_due_date())
+        self.assertEqual(Date('soon'), c.get_due_date())
+        self.assertEqual(['a', 'b', 'c', 'd'], sorted(synced))
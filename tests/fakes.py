@@ -0,0 +1,125 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) 2008-2014 - Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+"""
+Fake tasks, tags and trees shared by the tests of the indexes which follow
+the tasks and tags trees.
+"""
+
+from GTG.core.dates import Date
+
+
+class FakeTask():
+
+    STA_ACTIVE = "Active"
+
+    def __init__(self, tid, title="", tags=[], due_date="", status="Active",
+                 text=""):
+        self.tid = tid
+        self.title = title
+        self.text = text
+        self.tags = tags
+        self.due_date = Date.parse(due_date)
+        self.status = status
+        self.tested = 0
+
+    def get_id(self):
+        return self.tid
+
+    def get_title(self):
+        self.tested += 1
+        return self.title
+
+    def get_excerpt(self, strip_tags=False):
+        return self.text
+
+    def get_search_text(self):
+        return self.get_excerpt().lower()
+
+    def get_tags_name(self):
+        return self.tags
+
+    def get_tags(self):
+        return self.tags
+
+    def get_due_date(self):
+        return self.due_date
+
+    def get_status(self):
+        return self.status
+
+
+class FakeTree():
+    """ Mimic liblarch tree and its main view """
+
+    def __init__(self):
+        self.nodes = {}
+        self.callbacks = {}
+        self.filters = {}
+
+    def get_main_view(self):
+        return self
+
+    def add_filter(self, name, func, parameters=None):
+        self.filters[name] = (func, parameters)
+
+    def register_cllbck(self, event, func):
+        self.callbacks.setdefault(event, []).append(func)
+
+    def _callback(self, event, tid):
+        for func in self.callbacks.get(event, []):
+            func(tid)
+
+    def get_all_nodes(self):
+        return list(self.nodes)
+
+    def has_node(self, tid):
+        return tid in self.nodes
+
+    def get_node(self, tid):
+        return self.nodes[tid]
+
+    def add_node(self, task):
+        self.nodes[task.get_id()] = task
+        self._callback('node-added', task.get_id())
+
+    def modify_node(self, task):
+        self._callback('node-modified', task.get_id())
+
+    def del_node(self, tid):
+        del self.nodes[tid]
+        self._callback('node-deleted', tid)
+
+
+class FakeTag():
+
+    def __init__(self, name, parents=(), nonactionable=False):
+        self.name = name
+        self.parents = list(parents)
+        self.attributes = {}
+        if nonactionable:
+            self.attributes['nonactionable'] = 'True'
+
+    def get_id(self):
+        return self.name
+
+    def get_parents(self):
+        return self.parents
+
+    def get_attribute(self, name):
+        return self.attributes.get(name)
@@ -0,0 +1,71 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) 2008-2014 - Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+from unittest import TestCase
+
+from GTG.gtk.browser.render_cache import RenderCache
+
+
+class TestRenderCache(TestCase):
+
+    def setUp(self):
+        self.cache = RenderCache()
+        self.calls = []
+
+    def render(self, tid, column, version):
+        def func(value):
+            self.calls.append((tid, column))
+            return value
+        return self.cache.get(tid, column, (version,),
+                              func, f'{tid} {column} {version}')
+
+    def test_hits_and_misses(self):
+        self.assertEqual('1 label 0', self.render('1', 'label', 0))
+        self.assertEqual('1 label 0', self.render('1', 'label', 0))
+        self.render('1', 'due', 0)
+        self.render('2', 'label', 0)
+
+        self.assertEqual(1, self.cache.hits)
+        self.assertEqual(3, self.cache.misses)
+        self.assertEqual(0.25, self.cache.get_hit_rate())
+
+    def test_new_version_is_rendered_again(self):
+        self.render('1', 'label', 0)
+        self.assertEqual('1 label 1', self.render('1', 'label', 1))
+        self.assertEqual([('1', 'label')] * 2, self.calls)
+
+    def test_new_context_empties_cache(self):
+        self.cache.set_context('today')
+        self.render('1', 'label', 0)
+        self.cache.set_context('today')
+        self.render('1', 'label', 0)
+        self.cache.set_context('tomorrow')
+        self.render('1', 'label', 0)
+        self.assertEqual([('1', 'label')] * 2, self.calls)
+
+    def test_forget_deleted_task(self):
+        self.render('1', 'label', 0)
+        self.render('1', 'due', 0)
+        self.render('2', 'label', 0)
+        self.cache.forget('1')
+        self.cache.forget('unknown')
+        del self.calls[:]
+
+        self.render('1', 'label', 0)
+        self.render('2', 'label', 0)
+        self.assertEqual([('1', 'label')], self.calls)
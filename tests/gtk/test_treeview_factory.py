@@ -0,0 +1,189 @@
+# -----------------------------------------------------------------------------
+# Getting Things GNOME! - a personal organizer for the GNOME desktop
+# Copyright (c) 2008-2014 - Lionel Dricot & Bertrand Rousseau
+#
+# This program is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program.  If not, see <http://www.gnu.org/licenses/>.
+# -----------------------------------------------------------------------------
+
+from unittest import TestCase
+
+from GTG.core.dates import Date
+from GTG.core.saved_searches import SavedSearches
+from GTG.core.tag_closure import TagClosure
+from GTG.gtk.browser.treeview_factory import TreeviewFactory
+from tests.fakes import FakeTag, FakeTask, FakeTree
+
+
+class FakeTagWithName(FakeTag):
+
+    def get_name(self):
+        return self.name
+
+
+class FakeNode(FakeTask):
+
+    def __init__(self, tid, tags, req):
+        super().__init__(tid, tags=tags)
+        self.req = req
+        self.content_version = 0
+        self.version = 0
+        self.due_date_constraint = Date.no_date()
+        self.tags_read = 0
+
+    def get_content_version(self):
+        return self.content_version
+
+    def get_version(self):
+        return self.version
+
+    def get_closed_date(self):
+        return Date.no_date()
+
+    def get_due_date_constraint(self):
+        return self.due_date_constraint
+
+    def get_search_text(self):
+        return ' '.join(self.tags).lower()
+
+    def get_tags(self):
+        self.tags_read += 1
+        return [self.req.get_tag(name) for name in self.tags]
+
+
+class FakeAggregates():
+
+    def __init__(self):
+        self.urgent_dates = {}
+
+    def get_urgent_date(self, task):
+        return self.urgent_dates.get(task.get_id(), Date.no_date())
+
+
+class FakeRequester():
+
+    def __init__(self):
+        self.aggregates = FakeAggregates()
+        self.tasks = FakeTree()
+        self.tags = FakeTree()
+        self.saved_searches = SavedSearches(self.tasks)
+        self.tag_closure = TagClosure(self.tags)
+
+    def get_tasks_tree(self):
+        return self.tasks
+
+    def get_main_view(self):
+        return self.tasks
+
+    def get_subtree_aggregates(self):
+        return self.aggregates
+
+    def get_saved_searches(self):
+        return self.saved_searches
+
+    def get_tag_closure(self):
+        return self.tag_closure
+
+    def get_tag(self, name):
+        if self.tags.has_node(name):
+            return self.tags.get_node(name)
+        return None
+
+
+class TestTagsColumn(TestCase):
+
+    def setUp(self):
+        self.req = FakeRequester()
+        for name in ('@work', '@home', '!urgent'):
+            self.req.tags.add_node(FakeTagWithName(name))
+        self.factory = TreeviewFactory(self.req, config=None)
+        self.task = FakeNode('1', ['@work', '@home'], self.req)
+        self.req.tasks.add_node(self.task)
+
+    def column(self):
+        return [tag.get_name()
+                for tag in self.factory.get_task_tags_column_contents(
+                    self.task)]
+
+    def test_tags_are_sorted_and_cached(self):
+        self.assertEqual(['@home', '@work'], self.column())
+        self.assertEqual(['@home', '@work'], self.column())
+        self.assertEqual(1, self.task.tags_read)
+
+    def test_saved_searches_are_added(self):
+        self.column()
+        self.req.saved_searches.add('!urgent', 'work')
+        self.assertEqual(['!urgent', '@home', '@work'], self.column())
+
+    def test_renamed_tag(self):
+        self.column()
+        # Renaming a tag replaces it in the tag tree and in the tasks
+        self.req.tags.del_node('@home')
+        self.req.tags.add_node(FakeTagWithName('@house'))
+        self.task.tags = ['@work', '@house']
+        self.task.content_version += 1
+        self.assertEqual(['@house', '@work'], self.column())
+
+    def test_tag_replaced_in_tag_tree(self):
+        old_tag = self.factory.get_task_tags_column_contents(self.task)[1]
+        self.req.tags.del_node('@work')
+        self.req.tags.add_node(FakeTagWithName('@work'))
+
+        new_tag = self.factory.get_task_tags_column_contents(self.task)[1]
+        self.assertIsNot(old_tag, new_tag)
+        self.assertIs(self.req.get_tag('@work'), new_tag)
+
+    def test_recolored_tag(self):
+        self.column()
+        # The renderer reads the color of the cached tags
+        self.req.get_tag('@work').attributes['color'] = '#ff0000'
+        tags = self.factory.get_task_tags_column_contents(self.task)
+        self.assertEqual('#ff0000', tags[1].get_attribute('color'))
+
+    def test_deleted_task_is_forgotten(self):
+        self.column()
+        self.req.tasks.del_node('1')
+        self.assertNotIn('1', self.factory._tags_cache)
+
+
+class TestDueDateSorting(TestCase):
+
+    def setUp(self):
+        self.req = FakeRequester()
+        self.factory = TreeviewFactory(self.req, config=None)
+        self.task1 = FakeNode('1', [], self.req)
+        self.task2 = FakeNode('2', [], self.req)
+        self.req.aggregates.urgent_dates['1'] = Date.parse('2030-01-02')
+        self.req.aggregates.urgent_dates['2'] = Date.parse('2030-01-03')
+
+    def sort(self):
+        return self.factory.sort_by_duedate(self.task1, self.task2, None)
+
+    def test_urgent_dates_are_compared(self):
+        self.assertEqual(1, self.sort())
+        self.assertEqual(-1, self.factory.sort_by_duedate(
+            self.task2, self.task1, None))
+
+    def test_urgent_date_of_subtasks_is_followed(self):
+        self.sort()
+        # A subtask got a more urgent due date, the version of its parent
+        # is the same
+        self.req.aggregates.urgent_dates['2'] = Date.parse('2030-01-01')
+        self.assertEqual(-1, self.sort())
+
+    def test_due_date_constraint_without_urgent_date(self):
+        del self.req.aggregates.urgent_dates['1']
+        self.assertEqual(-1, self.sort())
+        self.task1.due_date_constraint = Date.parse('2030-01-01')
+        self.task1.version += 1
+        self.assertEqual(1, self.sort())
@@ -16,7 +16,8 @@
 # this program.  If not, see <http://www.gnu.org/licenses/>.
 # -----------------------------------------------------------------------------
 
-from datetime import date, timedelta
+from datetime import date, datetime, timedelta, timezone
+import time
 from unittest import TestCase
 
 from gettext import gettext as _
@@ -38,11 +39,48 @@ def next_month(aday, day=None):
 
 class TestDates(TestCase):
 
+    def test_shared_fuzzy_dates(self):
+        self.assertIs(Date.shared(''), Date.no_date())
+        self.assertIs(Date.shared(None), Date.no_date())
+        self.assertIs(Date.shared('soon'), Date.soon())
+        self.assertIs(Date.shared(Date('someday')), Date.someday())
+        self.assertEqual(Date.shared('2012-03-01'), date(2012, 3, 1))
+
     def test_parses_common_formats(self):
         self.assertEqual(str(Date.parse("1985-03-29")), "1985-03-29")
         self.assertEqual(str(Date.parse("19850329")), "1985-03-29")
         self.assertEqual(str(Date.parse("1985/03/29")), "1985-03-29")
 
+    def test_parses_written_formats(self):
+        moment = datetime(2020, 5, 17, 8, 30, 12, 345678)
+        for value in (date(2020, 5, 17), moment, moment.replace(microsecond=0),
+                      moment.replace(tzinfo=timezone.utc)):
+            self.assertEqual(Date(str(Date(value))).dt_value, value)
+        self.assertEqual(Date('2020-05-17 08:30:12.345678').dt_value, moment)
+        self.assertEqual(Date(str(Date.soon())), Date.soon())
+        self.assertEqual(Date(str(Date.someday())), Date.someday())
+
+    def test_now_is_not_cached(self):
+        first = Date('now').dt_value
+        time.sleep(0.001)
+        self.assertGreater(Date('now').dt_value, first)
+
+    def test_comparisons_match_casting(self):
+        today = date.today()
+        values = [Date.soon(), Date.someday(), Date.no_date(),
+                  Date(today), Date(today + timedelta(15)),
+                  Date(today + timedelta(365)), Date(today - timedelta(3)),
+                  Date(datetime.now()), Date(today + timedelta(400)),
+                  today + timedelta(15)]
+        for first in values[:-1]:
+            for second in values:
+                a, b = first._cast_for_operation(second)
+                self.assertEqual(first < second, a < b)
+                self.assertEqual(first <= second, a <= b)
+                self.assertEqual(first == second, a == b)
+                self.assertEqual(first > second, a > b)
+                self.assertEqual(first >= second, a >= b)
+
     def test_parses_todays_month_day_format(self):
         today = date.today()
         parse_string = "%02d%02d" % (today.month, today.day)